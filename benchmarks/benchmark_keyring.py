@@ -0,0 +1,32 @@
+"""
+In-memory keyring backend signed in to the mock TIM server.
+
+Used by the end-to-end benchmark through ``PYTHON_KEYRING_BACKEND`` so that
+the benchmarked commands never touch the credentials of the real user.
+"""
+
+from keyring.backend import KeyringBackend
+
+from mock_tim import BENCHMARK_TOKEN, BENCHMARK_USER
+
+
+class BenchmarkKeyring(KeyringBackend):
+    """Keyring holding only the benchmark user and token."""
+
+    priority = 1
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._passwords = {
+            ("TIDE", "username"): BENCHMARK_USER,
+            ("TIDE", BENCHMARK_USER): BENCHMARK_TOKEN,
+        }
+
+    def get_password(self, service: str, username: str) -> str | None:
+        return self._passwords.get((service, username))
+
+    def set_password(self, service: str, username: str, password: str) -> None:
+        self._passwords[(service, username)] = password
+
+    def delete_password(self, service: str, username: str) -> None:
+        self._passwords.pop((service, username), None)
@@ -0,0 +1,222 @@
+"""
+End-to-end benchmark of the CLI commands against a local mock TIM server.
+
+Each command is run in a fresh interpreter against the server in
+``mock_tim.py``, for every course size. Every run starts in an empty
+folder with an empty cache, signed in through an in-memory keyring. The
+wall time, the number of requests the server received and the peak memory
+(maximum resident set size) of the command are reported.
+
+Usage:
+    python benchmarks/e2e.py [--sizes small medium huge] [--runs N]
+        [--latency-ms MS] [--asset-kib KIB] [--output results.json]
+    python benchmarks/e2e.py --baseline results.json [--tolerance 0.25]
+
+With --baseline, the script exits with status 1 if the median wall time
+of any command grew more than the tolerance compared to the baseline.
+Peak memory is measured with os.wait4 and is not available on Windows.
+"""
+
+import argparse
+import dataclasses
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from mock_tim import SIZES, MockCourse, MockTimServer, demo_path, COURSE_PATH
+
+BENCHMARK_DIR = Path(__file__).resolve().parent
+SRC_DIR = BENCHMARK_DIR.parent / "src"
+
+COMMANDS = {
+    "courses": {"args": ["courses"]},
+    "task list": {"args": ["task", "list", demo_path(0)]},
+    "task create --all": {"args": ["task", "create", demo_path(0), "--all"]},
+    "course create": {"args": ["course", "create", "--path", COURSE_PATH]},
+    "submit": {
+        "setup": ["task", "create", demo_path(0), "t0"],
+        "args": ["submit", "--force", "demo0/t0"],
+    },
+}
+"""Benchmarked commands, their arguments and commands run before them."""
+
+
+def cli_env() -> dict[str, str]:
+    """Environment in which the CLI uses the sources and the benchmark keyring."""
+    env = dict(os.environ)
+    env.update(
+        {
+            "PYTHONPATH": os.pathsep.join([str(SRC_DIR), str(BENCHMARK_DIR)]),
+            "PYTHON_KEYRING_BACKEND": "benchmark_keyring.BenchmarkKeyring",
+        }
+    )
+    env.pop("DEV", None)
+    return env
+
+
+def run_cli(args: list[str], env: dict[str, str], cwd: Path) -> dict:
+    """Run the CLI once and return its wall time and peak memory."""
+    start = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "tidecli.main", *args],
+        env=env,
+        cwd=cwd,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+    )
+    if hasattr(os, "wait4"):
+        stderr = proc.stderr.read()
+        _, status, usage = os.wait4(proc.pid, 0)
+        proc.returncode = os.waitstatus_to_exitcode(status)
+        # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+        peak = usage.ru_maxrss if sys.platform == "darwin" else usage.ru_maxrss * 1024
+    else:
+        _, stderr = proc.communicate()
+        peak = None
+    wall = time.perf_counter() - start
+    proc.stderr.close()
+
+    if proc.returncode != 0:
+        raise RuntimeError(
+            f"'{' '.join(args)}' failed with status {proc.returncode}:\n"
+            f"{stderr.decode(errors='replace')}"
+        )
+    return {
+        "wall_ms": wall * 1000,
+        "peak_mib": peak / 1024 / 1024 if peak is not None else None,
+    }
+
+
+def run_command(
+    command: dict, server: MockTimServer, base_env: dict[str, str], runs: int
+) -> dict:
+    """Run one command several times and summarize the samples."""
+    samples = []
+    for _ in range(runs):
+        with tempfile.TemporaryDirectory() as tmp:
+            work_dir = Path(tmp) / "work"
+            work_dir.mkdir()
+            env = dict(base_env, TIDECLI_CACHE_DIR=str(Path(tmp) / "cache"))
+            if "setup" in command:
+                run_cli(command["setup"], env, work_dir)
+            server.reset_counts()
+            sample = run_cli(command["args"], env, work_dir)
+            sample["requests"] = server.reset_counts()
+            samples.append(sample)
+
+    peaks = [s["peak_mib"] for s in samples if s["peak_mib"] is not None]
+    return {
+        "wall_ms": statistics.median(s["wall_ms"] for s in samples),
+        "wall_ms_min": min(s["wall_ms"] for s in samples),
+        "requests": sum(samples[-1]["requests"].values()),
+        "requests_by_endpoint": samples[-1]["requests"],
+        "peak_mib": max(peaks) if peaks else None,
+    }
+
+
+def benchmark(sizes: list[str], runs: int, latency_ms: float, asset_kib: int | None):
+    """Benchmark every command for every course size."""
+    env = cli_env()
+
+    results = {}
+    for name in sizes:
+        size = SIZES[name]
+        if asset_kib is not None:
+            size = dataclasses.replace(size, asset_kib=asset_kib)
+        server = MockTimServer(MockCourse(size), latency_ms).start()
+        try:
+            size_env = dict(env, TIM_URL=server.url)
+            results[name] = {
+                "course": dataclasses.asdict(size),
+                "commands": {
+                    command_name: run_command(command, server, size_env, runs)
+                    for command_name, command in COMMANDS.items()
+                },
+            }
+        finally:
+            server.stop()
+    return results
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    """Return descriptions of commands that got slower than allowed."""
+    regressions = []
+    for size, size_results in results.items():
+        old_size = baseline.get("sizes", {}).get(size, {})
+        for name, result in size_results["commands"].items():
+            old = old_size.get("commands", {}).get(name)
+            if old is None:
+                continue
+            limit = old["wall_ms"] * (1 + tolerance)
+            if result["wall_ms"] > limit:
+                regressions.append(
+                    f"{size} {name}: {result['wall_ms']:.1f} ms > "
+                    f"{old['wall_ms']:.1f} ms + {tolerance:.0%}"
+                )
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--sizes", nargs="+", choices=SIZES, default=list(SIZES), help="course sizes"
+    )
+    parser.add_argument("--runs", type=int, default=3, help="runs per command")
+    parser.add_argument(
+        "--latency-ms", type=float, default=20, help="latency of every response"
+    )
+    parser.add_argument(
+        "--asset-kib", type=int, help="size of the downloaded file of each task"
+    )
+    parser.add_argument("--output", type=Path, help="write results as JSON")
+    parser.add_argument("--baseline", type=Path, help="compare against results")
+    parser.add_argument(
+        "--tolerance", type=float, default=0.25, help="allowed slowdown (0.25 = 25%%)"
+    )
+    options = parser.parse_args()
+
+    results = benchmark(
+        options.sizes, options.runs, options.latency_ms, options.asset_kib
+    )
+
+    print(
+        f"{'size':<7} {'command':<18} {'wall ms':>9} {'min ms':>9} "
+        f"{'requests':>8} {'peak MiB':>9}"
+    )
+    for size, size_results in results.items():
+        for name, r in size_results["commands"].items():
+            peak = f"{r['peak_mib']:.1f}" if r["peak_mib"] is not None else "-"
+            print(
+                f"{size:<7} {name:<18} {r['wall_ms']:>9.1f} {r['wall_ms_min']:>9.1f} "
+                f"{r['requests']:>8} {peak:>9}"
+            )
+
+    if options.output:
+        options.output.write_text(
+            json.dumps(
+                {
+                    "python": sys.version.split()[0],
+                    "runs": options.runs,
+                    "latency_ms": options.latency_ms,
+                    "sizes": results,
+                },
+                indent=4,
+            )
+        )
+
+    if options.baseline:
+        baseline = json.loads(options.baseline.read_text())
+        regressions = compare(results, baseline, options.tolerance)
+        for regression in regressions:
+            print(f"Regression: {regression}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,122 @@
+"""
+Benchmark for scanning task files for gaps.
+
+Large source files with gaps are generated and the time of finding the
+gaps, splitting the file for submission and resetting the non-editable
+sections is measured. The previous scanner, which ran two uncompiled
+regular expression searches on every line, is timed for comparison, also
+together with the regular expression line split it was used with.
+
+Usage:
+    python benchmarks/gap_scan.py [--lines 200000] [--gaps 10] [--runs 10]
+    python benchmarks/gap_scan.py --output results.json
+"""
+
+import argparse
+import json
+import re
+import statistics
+import sys
+import time
+from pathlib import Path
+
+SRC_DIR = Path(__file__).resolve().parent.parent / "src"
+
+BEGIN = "// --- Write your code below this line. ---"
+END = "// --- Write your code above this line. ---"
+
+
+def legacy_find_gap(lines: list[str]) -> tuple[int, int] | None:
+    """The scanner used before, finds only the last gap."""
+    start = None
+    end = None
+    for i, line in enumerate(lines):
+        if re.search(r"Write your code below this line", line):
+            start = i
+        if re.search(r"Write your code above this line", line):
+            end = i
+    if start is None or end is None:
+        return None
+    return start, end
+
+
+def generate_source(lines: int, gaps: int, gap_line: str) -> str:
+    """Generate a source file with evenly spaced gaps."""
+    result = []
+    section = max(1, lines // (gaps + 1))
+    for i in range(lines):
+        result.append(f"    int value{i} = compute({i}); // line {i}")
+        if gaps and i % section == section - 1 and len(result) < lines:
+            result.extend([BEGIN, gap_line, END])
+            gaps -= 1
+    return "\n".join(result)
+
+
+def measure(function, runs: int) -> dict:
+    """Run the function several times and return the timings in milliseconds."""
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        function()
+        samples.append((time.perf_counter() - start) * 1000)
+    return {"median_ms": statistics.median(samples), "min_ms": min(samples)}
+
+
+def benchmark(lines: int, gaps: int, runs: int) -> dict:
+    """Benchmark the gap operations on a generated file."""
+    from tidecli.utils import file_handler
+
+    original = generate_source(lines, gaps, "    // your code here")
+    answer = generate_source(lines, gaps, "    return 42;")
+    answer_lines = file_handler.split_lines(answer)
+
+    return {
+        "lines": len(answer_lines),
+        "gaps": len(file_handler.find_gaps_in_tasks(answer_lines)),
+        "operations": {
+            "legacy find": measure(lambda: legacy_find_gap(answer_lines), runs),
+            "find": measure(
+                lambda: file_handler.find_gaps_in_tasks(answer_lines), runs
+            ),
+            "legacy split": measure(
+                lambda: legacy_find_gap(re.split(r"\r?\n", answer)), runs
+            ),
+            "split": measure(lambda: file_handler.split_file_contents(answer), runs),
+            "reset": measure(
+                lambda: file_handler.answer_with_original_noneditable_sections(
+                    answer, original
+                ),
+                runs,
+            ),
+        },
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--lines", type=int, default=200_000, help="lines per file")
+    parser.add_argument("--gaps", type=int, default=10, help="gaps per file")
+    parser.add_argument("--runs", type=int, default=10, help="runs per operation")
+    parser.add_argument("--output", type=Path, help="write results as JSON")
+    options = parser.parse_args()
+
+    sys.path.insert(0, str(SRC_DIR))
+    results = benchmark(options.lines, options.gaps, options.runs)
+
+    print(f"{results['lines']} lines, {results['gaps']} gaps")
+    print(f"{'operation':<13} {'median ms':>10} {'min ms':>9}")
+    for name, r in results["operations"].items():
+        print(f"{name:<13} {r['median_ms']:>10.2f} {r['min_ms']:>9.2f}")
+
+    if options.output:
+        options.output.write_text(
+            json.dumps(
+                {"python": sys.version.split()[0], "runs": options.runs, **results},
+                indent=4,
+            )
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,143 @@
+"""
+Load-time benchmark for .timdata metadata.
+
+A course with the given number of tasks is written to a temporary folder
+and loaded with ``get_metadata`` in three ways:
+
+- ``parse``: JSON decoding and pydantic validation, no caches
+- ``sidecar``: the pickled metadata in the cache folder is used
+- ``memory``: the metadata parsed earlier in the same process is reused
+
+Usage:
+    python benchmarks/metadata_load.py [--tasks 500] [--runs 20] [--output results.json]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+SRC_DIR = Path(__file__).resolve().parent.parent / "src"
+
+TASKS_PER_PART = 20
+FILES_PER_TASK = 3
+
+
+def write_course(folder: Path, tasks: int) -> Path:
+    """Write a .timdata file with the given number of tasks."""
+    from tidecli.models.task_data import (
+        TaskData,
+        TideCourseData,
+        TideCoursePartData,
+    )
+    from tidecli.utils.file_handler import METADATA_NAME
+
+    course = TideCourseData()
+    for i in range(tasks):
+        part = f"kurssit/ohj1/demo{i // TASKS_PER_PART}"
+        ide_task_id = f"t{i % TASKS_PER_PART}"
+        task = TaskData(
+            path=part,
+            type="py",
+            doc_id=i // TASKS_PER_PART,
+            ide_task_id=ide_task_id,
+            header=f"Task {i}",
+            stem="Write a program that prints the answer.",
+            task_files=[
+                {
+                    "task_id_ext": f"{i}.{ide_task_id}",
+                    "content": "def main():\n    print(42)\n" * 20,
+                    "file_name": f"file{f}.py",
+                    "task_type": "py",
+                }
+                for f in range(FILES_PER_TASK)
+            ],
+        )
+        course.course_parts.setdefault(part, TideCoursePartData()).tasks[
+            ide_task_id
+        ] = task
+
+    metadata_path = folder / METADATA_NAME
+    metadata_path.write_text(course.model_dump_json(indent=4), encoding="utf-8")
+    return metadata_path
+
+
+def measure(load, runs: int) -> dict:
+    """Run load several times and return the timings in milliseconds."""
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        load()
+        samples.append((time.perf_counter() - start) * 1000)
+    return {"median_ms": statistics.median(samples), "min_ms": min(samples)}
+
+
+def benchmark(tasks: int, runs: int) -> dict:
+    """Benchmark the ways of loading the metadata."""
+    from tidecli.utils import file_handler, metadata_cache
+
+    with tempfile.TemporaryDirectory() as tmp:
+        folder = Path(tmp)
+        metadata_path = write_course(folder, tasks)
+
+        def parse():
+            file_handler._metadata_cache.clear()
+            metadata_cache.clear_metadata_cache()
+            file_handler.get_metadata(folder)
+
+        def sidecar():
+            file_handler._metadata_cache.clear()
+            file_handler.get_metadata(folder)
+
+        def memory():
+            file_handler.get_metadata(folder)
+
+        results = {"parse": measure(parse, runs)}
+        # The last parse left the sidecar in place
+        results["sidecar"] = measure(sidecar, runs)
+        results["memory"] = measure(memory, runs)
+        return {
+            "tasks": tasks,
+            "file_size": metadata_path.stat().st_size,
+            "loads": results,
+        }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--tasks", type=int, default=500, help="tasks in the course")
+    parser.add_argument("--runs", type=int, default=20, help="loads per method")
+    parser.add_argument("--output", type=Path, help="write results as JSON")
+    options = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        # Keep the user's cache untouched, must be set before tidecli is imported
+        os.environ["TIDECLI_CACHE_DIR"] = cache_dir
+        os.environ.pop("TIDECLI_METADATA_CACHE", None)
+        sys.path.insert(0, str(SRC_DIR))
+        results = benchmark(options.tasks, options.runs)
+
+    print(
+        f"{results['tasks']} tasks, "
+        f".timdata {results['file_size'] / 1024 / 1024:.1f} MiB"
+    )
+    print(f"{'load':<8} {'median ms':>10} {'min ms':>9}")
+    for name, r in results["loads"].items():
+        print(f"{name:<8} {r['median_ms']:>10.2f} {r['min_ms']:>9.2f}")
+
+    if options.output:
+        options.output.write_text(
+            json.dumps(
+                {"python": sys.version.split()[0], "runs": options.runs, **results},
+                indent=4,
+            )
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,349 @@
+"""
+Local stand-in for the TIM endpoints used by the CLI.
+
+Serves the ``/oauth/*`` and ``/ide/*`` endpoints and task files of a
+generated course. The size of the course, the size of the files and the
+latency of every response can be configured. Requests and the bytes of
+request and response bodies are counted so that benchmarks can report how
+many requests a command made and how much data was transferred.
+
+Responses are gzip compressed for clients that accept it when the server
+is created with gzip_responses. Compressed request bodies are decoded, or
+refused with 415 Unsupported Media Type unless accept_gzip_requests is set.
+
+Requests must use the token ``BENCHMARK_TOKEN``.
+
+Usage:
+    python benchmarks/mock_tim.py [--size medium] [--latency-ms 20] [--port 8000]
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import random
+import threading
+import time
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+BENCHMARK_USER = "benchmark"
+BENCHMARK_TOKEN = "benchmark-token"
+COURSE_PATH = "kurssit/benchmark"
+
+GAP_BEGIN = "# --- Write your code below this line. ---"
+GAP_END = "# --- Write your code above this line. ---"
+
+
+@dataclass(frozen=True)
+class CourseSize:
+    """Shape of the generated course."""
+
+    demos: int
+    """Number of demo documents in the course."""
+
+    tasks_per_demo: int
+    """Number of tasks in each demo document."""
+
+    files_per_task: int = 1
+    """Number of code files in each task."""
+
+    code_lines: int = 40
+    """Number of lines in each code file."""
+
+    asset_kib: int = 16
+    """Size of the supplementary file downloaded for each task, 0 for none."""
+
+
+SIZES = {
+    "small": CourseSize(demos=2, tasks_per_demo=5, asset_kib=8),
+    "medium": CourseSize(demos=8, tasks_per_demo=10, files_per_task=2, asset_kib=32),
+    "huge": CourseSize(
+        demos=30, tasks_per_demo=20, files_per_task=3, code_lines=200, asset_kib=64
+    ),
+}
+"""Predefined course sizes."""
+
+
+def demo_path(demo: int) -> str:
+    """Return the TIM path of a demo document."""
+    return f"{COURSE_PATH}/demo{demo}"
+
+
+class MockCourse:
+    """Generated course content served by the mock server."""
+
+    def __init__(self, size: CourseSize) -> None:
+        self.size = size
+        self.demos = {
+            demo_path(d): [self._task(d, t) for t in range(size.tasks_per_demo)]
+            for d in range(size.demos)
+        }
+
+    def _code(self, demo: int, task: int, file: int) -> str:
+        body = [
+            f"value_{i} = {demo} * {task} + {i}" for i in range(self.size.code_lines)
+        ]
+        half = len(body) // 2
+        return "\n".join(
+            [f"# Demo {demo}, task {task}, file {file}"]
+            + body[:half]
+            + [GAP_BEGIN, "pass", GAP_END]
+            + body[half:]
+        )
+
+    def _task(self, demo: int, task: int) -> dict:
+        doc_id = 1000 + demo
+        supplementary = []
+        if self.size.asset_kib:
+            supplementary.append(
+                {
+                    "file_name": "data.bin",
+                    "content": None,
+                    "source": f"/files/demo{demo}/t{task}/data.bin",
+                    "task_directory": None,
+                }
+            )
+        return {
+            "task_files": [
+                {
+                    "task_id_ext": f"{doc_id}.task{task}.par{task}",
+                    "content": self._code(demo, task, f),
+                    "file_name": f"main{f}.py",
+                    "task_directory": None,
+                    "task_type": "py",
+                    "user_input": "",
+                    "user_args": "",
+                }
+                for f in range(self.size.files_per_task)
+            ],
+            "supplementary_files": supplementary,
+            "path": demo_path(demo),
+            "task_directory": None,
+            "header": f"Task {task}",
+            "stem": "Complete the program.",
+            "max_points": 1,
+            "type": "py",
+            "task_id": f"task{task}",
+            "doc_id": doc_id,
+            "par_id": f"par{task}",
+            "ide_task_id": f"t{task}",
+        }
+
+    def courses(self) -> list[dict]:
+        return [
+            {
+                "name": "Benchmark course",
+                "id": 999,
+                "path": COURSE_PATH,
+                "tasks": [
+                    {"name": path.rsplit("/", 1)[-1], "path": path, "doc_id": 1000 + d}
+                    for d, path in enumerate(self.demos)
+                ],
+            }
+        ]
+
+    def file(self, path: str) -> bytes:
+        """Return deterministic, incompressible content of a supplementary file."""
+        return random.Random(path).randbytes(self.size.asset_kib * 1024)
+
+
+class MockTimServer(ThreadingHTTPServer):
+    """HTTP server answering like TIM for the generated course."""
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        course: MockCourse,
+        latency_ms: float = 0,
+        port: int = 0,
+        gzip_responses: bool = False,
+        accept_gzip_requests: bool = True,
+    ) -> None:
+        super().__init__(("127.0.0.1", port), _Handler)
+        self.course = course
+        self.latency = latency_ms / 1000
+        self.gzip_responses = gzip_responses
+        self.accept_gzip_requests = accept_gzip_requests
+        self._lock = threading.Lock()
+        self._requests: dict[str, int] = {}
+        self._bytes = {"received": 0, "sent": 0}
+        self._thread: threading.Thread | None = None
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def count(self, endpoint: str) -> None:
+        with self._lock:
+            self._requests[endpoint] = self._requests.get(endpoint, 0) + 1
+
+    def count_bytes(self, direction: str, size: int) -> None:
+        with self._lock:
+            self._bytes[direction] += size
+
+    def reset_counts(self) -> dict[str, int]:
+        """Return the request counts by endpoint and start counting again."""
+        with self._lock:
+            counts, self._requests = self._requests, {}
+        return counts
+
+    def reset_bytes(self) -> dict[str, int]:
+        """
+        Return the bytes of request and response bodies and start counting again.
+
+        Bodies are counted as transferred, compressed if they were sent
+        compressed.
+        """
+        with self._lock:
+            counts, self._bytes = self._bytes, {"received": 0, "sent": 0}
+        return counts
+
+    def start(self) -> "MockTimServer":
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: MockTimServer
+
+    def log_message(self, format, *args) -> None:
+        pass
+
+    def _body(self) -> dict | None:
+        """Return the JSON body of the request, None if it was refused."""
+        length = int(self.headers.get("Content-Length") or 0)
+        data = self.rfile.read(length) if length else b""
+        self.server.count_bytes("received", len(data))
+        if self.headers.get("Content-Encoding") == "gzip":
+            if not self.server.accept_gzip_requests:
+                return None
+            data = gzip.decompress(data)
+        return json.loads(data or b"{}")
+
+    def _send(
+        self, status: int, body: bytes, content_type: str, headers: dict | None = None
+    ) -> None:
+        headers = dict(headers or {})
+        if (
+            self.server.gzip_responses
+            and status == 200
+            and len(body) >= 256
+            and "gzip" in self.headers.get("Accept-Encoding", "")
+        ):
+            body = gzip.compress(body, compresslevel=6)
+            headers["Content-Encoding"] = "gzip"
+        self.server.count_bytes("sent", len(body))
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _json(self, data, status: int = 200) -> None:
+        self._send(status, json.dumps(data).encode("utf-8"), "application/json")
+
+    def _handle(self) -> None:
+        path = urlparse(self.path).path
+        endpoint = "/files" if path.startswith("/files/") else path
+        self.server.count(endpoint)
+        body = self._body()
+        if self.server.latency:
+            time.sleep(self.server.latency)
+
+        if self.headers.get("Authorization") != f"Bearer {BENCHMARK_TOKEN}":
+            self._json({"error": "invalid_token"}, status=401)
+            return
+        if body is None:
+            self._json({"error": "Compressed requests are not supported"}, status=415)
+            return
+
+        course = self.server.course
+        if path.startswith("/files/"):
+            content = course.file(path)
+            etag = '"' + hashlib.sha256(content).hexdigest()[:16] + '"'
+            if self.headers.get("If-None-Match") == etag:
+                self._send(304, b"", "application/octet-stream", {"ETag": etag})
+            else:
+                self._send(200, content, "application/octet-stream", {"ETag": etag})
+        elif path == "/oauth/introspect":
+            now = int(time.time())
+            self._json(
+                {
+                    "active": True,
+                    "client_id": "oauth2_tide",
+                    "token_type": "Bearer",
+                    "username": BENCHMARK_USER,
+                    "scope": "profile user_tasks user_courses",
+                    "exp": now + 3600,
+                    "iat": now,
+                }
+            )
+        elif path == "/oauth/profile":
+            self._json({"id": 1, "username": BENCHMARK_USER, "real_name": "Bench"})
+        elif path == "/ide/ideCourses":
+            self._json(course.courses())
+        elif path == "/ide/tasksByDoc":
+            self._json(course.demos.get(body.get("doc_path"), []))
+        elif path == "/ide/taskByIdeTaskId":
+            tasks = course.demos.get(body.get("doc_path"), [])
+            task = next(
+                (t for t in tasks if t["ide_task_id"] == body.get("ide_task_id")), None
+            )
+            self._json(task or {"error": "Task not found"})
+        elif path == "/ide/tasksByCourse":
+            self._json([[tasks] for tasks in course.demos.values()])
+        elif path == "/ide/submitTask":
+            self._json(
+                {
+                    "result": {
+                        "web": {"console": "ok\n", "error": "", "language": None},
+                        "savedNew": 1,
+                        "valid": True,
+                    },
+                    "plugin": None,
+                }
+            )
+        elif path == "/ide/taskPoints":
+            self._json({"current_points": 1.0})
+        else:
+            self._json({"error": f"Unknown endpoint {path}"}, status=404)
+
+    do_GET = _handle
+    do_POST = _handle
+    do_PUT = _handle
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--size", choices=SIZES, default="medium")
+    parser.add_argument("--latency-ms", type=float, default=0)
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--gzip", action="store_true", help="compress responses")
+    options = parser.parse_args()
+
+    server = MockTimServer(
+        MockCourse(SIZES[options.size]),
+        options.latency_ms,
+        options.port,
+        gzip_responses=options.gzip,
+    )
+    print(f"Serving a {options.size} course at {server.url}, token {BENCHMARK_TOKEN}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+"""
+Cold-start benchmark for the CLI commands.
+
+Every command is run several times in a fresh interpreter with
+``python -X importtime``. The wall time of the process and the time spent
+importing modules are reported for each command, together with the heavy
+dependencies the command loaded.
+
+Commands are run without credentials (null keyring) and in a temporary
+folder, so they stop before making any requests to TIM.
+
+Usage:
+    python benchmarks/startup.py [--runs N] [--output results.json]
+    python benchmarks/startup.py --baseline results.json [--tolerance 0.25]
+
+With --baseline, the script exits with status 1 if the median wall time
+of any command grew more than the tolerance compared to the baseline.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+SRC_DIR = Path(__file__).resolve().parent.parent / "src"
+
+COMMANDS = {
+    "--help": ["--help"],
+    "logout": ["logout"],
+    "check-login": ["check-login"],
+    "courses": ["courses"],
+    "task list": ["task", "list", "kurssit/demo"],
+    "task create": ["task", "create", "kurssit/demo", "--all"],
+    "task info": ["task", "info", "."],
+    "submit": ["submit", "."],
+    "cache stats": ["cache", "stats"],
+}
+"""Benchmarked commands and their arguments."""
+
+HEAVY_MODULES = ["requests", "pydantic", "keyring"]
+"""Dependencies that should only be imported by commands that need them."""
+
+
+def run_once(args: list[str], env: dict[str, str], cwd: str) -> dict:
+    """Run the command once and parse its import times."""
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-m", "tidecli.main", *args],
+        env=env,
+        cwd=cwd,
+        capture_output=True,
+        text=True,
+    )
+    wall = time.perf_counter() - start
+
+    import_us = 0
+    modules = set()
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        self_us, _, name = line[len("import time:") :].split("|")
+        if not self_us.strip().isdigit():
+            continue
+        import_us += int(self_us)
+        modules.add(name.strip())
+
+    return {
+        "wall_ms": wall * 1000,
+        "import_ms": import_us / 1000,
+        "heavy_modules": [m for m in HEAVY_MODULES if m in modules],
+    }
+
+
+def benchmark(runs: int) -> dict:
+    """Benchmark every command and return the results keyed by command."""
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ)
+        env.update(
+            {
+                "PYTHONPATH": str(SRC_DIR),
+                "PYTHON_KEYRING_BACKEND": "keyring.backends.null.Keyring",
+                "TIDECLI_CACHE_DIR": str(Path(tmp) / "cache"),
+                "TIM_URL": "http://127.0.0.1:9",
+            }
+        )
+        for name, args in COMMANDS.items():
+            samples = [run_once(args, env, tmp) for _ in range(runs)]
+            results[name] = {
+                "wall_ms": statistics.median(s["wall_ms"] for s in samples),
+                "wall_ms_min": min(s["wall_ms"] for s in samples),
+                "import_ms": statistics.median(s["import_ms"] for s in samples),
+                "heavy_modules": samples[-1]["heavy_modules"],
+            }
+    return results
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    """Return descriptions of commands that got slower than allowed."""
+    regressions = []
+    for name, result in results.items():
+        old = baseline.get("commands", {}).get(name)
+        if old is None:
+            continue
+        limit = old["wall_ms"] * (1 + tolerance)
+        if result["wall_ms"] > limit:
+            regressions.append(
+                f"{name}: {result['wall_ms']:.1f} ms > {old['wall_ms']:.1f} ms "
+                f"+ {tolerance:.0%}"
+            )
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--runs", type=int, default=5, help="runs per command")
+    parser.add_argument("--output", type=Path, help="write results as JSON")
+    parser.add_argument("--baseline", type=Path, help="compare against results")
+    parser.add_argument(
+        "--tolerance", type=float, default=0.25, help="allowed slowdown (0.25 = 25%%)"
+    )
+    options = parser.parse_args()
+
+    results = benchmark(options.runs)
+
+    print(f"{'command':<14} {'wall ms':>9} {'min ms':>9} {'import ms':>10}  heavy")
+    for name, r in results.items():
+        print(
+            f"{name:<14} {r['wall_ms']:>9.1f} {r['wall_ms_min']:>9.1f} "
+            f"{r['import_ms']:>10.1f}  {', '.join(r['heavy_modules']) or '-'}"
+        )
+
+    if options.output:
+        options.output.write_text(
+            json.dumps(
+                {
+                    "python": sys.version.split()[0],
+                    "runs": options.runs,
+                    "commands": results,
+                },
+                indent=4,
+            )
+        )
+
+    if options.baseline:
+        baseline = json.loads(options.baseline.read_text())
+        regressions = compare(results, baseline, options.tolerance)
+        for regression in regressions:
+            print(f"Regression: {regression}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,164 @@
+"""
+Benchmark of the bytes transferred when downloading and submitting a course.
+
+A full course is created with ``course create`` and the tasks of its first
+demo are then submitted one task at a time with ``submit``, against the
+mock TIM server in ``mock_tim.py``. Only the content of the gaps is
+submitted, so an answer of ``--answer-lines`` lines is written to every gap
+before submitting. The bytes of request and response bodies, as
+transferred, are counted by the server in three setups:
+
+- ``identity``: nothing is compressed
+- ``gzip responses``: the server compresses responses
+- ``gzip responses and submits``: submit bodies are also compressed
+  (``TIDECLI_HTTP_GZIP_REQUESTS=1``)
+
+The supplementary files of the generated course are random bytes that do
+not compress, like most binary files. Use ``--asset-kib 0`` to leave them
+out and measure the JSON payloads only.
+
+Usage:
+    python benchmarks/wire_size.py [--size huge] [--asset-kib KIB]
+        [--answer-lines 300] [--output results.json]
+"""
+
+import argparse
+import dataclasses
+import json
+import sys
+import tempfile
+from pathlib import Path
+
+from e2e import cli_env, run_cli
+from mock_tim import (
+    COURSE_PATH,
+    GAP_BEGIN,
+    SIZES,
+    MockCourse,
+    MockTimServer,
+    demo_path,
+)
+
+SETUPS = {
+    "identity": {"gzip_responses": False, "env": {}},
+    "gzip responses": {"gzip_responses": True, "env": {}},
+    "gzip responses and submits": {
+        "gzip_responses": True,
+        "env": {"TIDECLI_HTTP_GZIP_REQUESTS": "1"},
+    },
+}
+"""Compression setups that are compared."""
+
+
+DEMO = demo_path(0).rsplit("/", 1)[-1]
+"""Folder of the demo whose tasks are submitted."""
+
+
+def commands(course: MockCourse) -> dict[str, list[list[str]]]:
+    """Return the runs of each measured command, run in order in one folder."""
+    return {
+        "course create": [["course", "create", "--path", COURSE_PATH]],
+        "submit": [
+            ["submit", "--force", "--workers", "8", f"{DEMO}/t{task}"]
+            for task in range(course.size.tasks_per_demo)
+        ],
+    }
+
+
+def write_answers(folder: Path, lines: int) -> None:
+    """Replace the content of every gap in the folder with an answer."""
+    answer = "\n".join(
+        f"    result_{i} = sum(value * {i} for value in range({i % 50}))"
+        for i in range(lines)
+    )
+    for path in folder.rglob("*.py"):
+        content = path.read_text(encoding="utf-8")
+        path.write_text(
+            content.replace(f"{GAP_BEGIN}\npass", f"{GAP_BEGIN}\n{answer}"),
+            encoding="utf-8",
+        )
+
+
+def measure(
+    course: MockCourse, gzip_responses: bool, env: dict[str, str], answer_lines: int
+) -> dict:
+    """Run the commands once and return the bytes transferred by each."""
+    server = MockTimServer(course, gzip_responses=gzip_responses).start()
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            work_dir = Path(tmp) / "work"
+            work_dir.mkdir()
+            run_env = dict(
+                env, TIM_URL=server.url, TIDECLI_CACHE_DIR=str(Path(tmp) / "cache")
+            )
+            results = {}
+            for name, runs in commands(course).items():
+                if name == "submit":
+                    write_answers(work_dir / DEMO, answer_lines)
+                server.reset_bytes()
+                for args in runs:
+                    run_cli(args, run_env, work_dir)
+                requests = sum(server.reset_counts().values())
+                results[name] = {"requests": requests, **server.reset_bytes()}
+            return results
+    finally:
+        server.stop()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--size", choices=SIZES, default="huge", help="course size")
+    parser.add_argument(
+        "--asset-kib", type=int, help="size of the downloaded file of each task"
+    )
+    parser.add_argument(
+        "--answer-lines", type=int, default=300, help="lines of each submitted answer"
+    )
+    parser.add_argument("--output", type=Path, help="write results as JSON")
+    options = parser.parse_args()
+
+    size = SIZES[options.size]
+    if options.asset_kib is not None:
+        size = dataclasses.replace(size, asset_kib=options.asset_kib)
+    course = MockCourse(size)
+
+    base_env = cli_env()
+    results = {
+        name: measure(
+            course,
+            setup["gzip_responses"],
+            dict(base_env, **setup["env"]),
+            options.answer_lines,
+        )
+        for name, setup in SETUPS.items()
+    }
+
+    print(
+        f"{'setup':<27} {'command':<14} {'requests':>8} "
+        f"{'sent KiB':>10} {'received KiB':>13}"
+    )
+    for name, commands in results.items():
+        for command, r in commands.items():
+            # Sent and received are from the point of view of the client
+            print(
+                f"{name:<27} {command:<14} {r['requests']:>8} "
+                f"{r['received'] / 1024:>10.1f} {r['sent'] / 1024:>13.1f}"
+            )
+
+    if options.output:
+        options.output.write_text(
+            json.dumps(
+                {
+                    "python": sys.version.split()[0],
+                    "course": dataclasses.asdict(size),
+                    "answer_lines": options.answer_lines,
+                    "setups": results,
+                },
+                indent=4,
+            )
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
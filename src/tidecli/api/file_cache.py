@@ -0,0 +1,269 @@
+"""
+On-disk cache for files downloaded from TIM.
+
+Cached files are revalidated with conditional requests, so a file that
+has not changed costs a 304 response instead of a full download.
+"""
+
+__authors__ = ["Olli-Pekka Riikola, Olli Rutanen, Joni Sinokki"]
+__license__ = "MIT"
+__date__ = "18.10.2026"
+
+import hashlib
+import json
+import shutil
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from tidecli.tide_config import CACHE_DIR, FILE_CACHE_MAX_BYTES
+from tidecli.utils.atomic import open_atomic, write_atomic
+
+BODY_SUFFIX = ".bin"
+META_SUFFIX = ".json"
+
+
+@dataclass
+class CacheEntry:
+    """Metadata of a single cached file."""
+
+    url: str
+    """URL the file was downloaded from."""
+
+    body_path: Path
+    """Path to the cached content."""
+
+    etag: str | None = None
+    """ETag header of the response."""
+
+    last_modified: str | None = None
+    """Last-Modified header of the response."""
+
+    size: int = 0
+    """Size of the content in bytes."""
+
+    accessed: float = 0.0
+    """Time of the last use, used for LRU eviction."""
+
+    def validation_headers(self) -> dict[str, str]:
+        """Return headers for revalidating the entry with a conditional GET."""
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+@dataclass
+class FileCache:
+    """Size-capped LRU cache of downloaded files keyed by URL."""
+
+    directory: Path = CACHE_DIR / "files"
+    """Folder where cached files are stored."""
+
+    max_bytes: int = FILE_CACHE_MAX_BYTES
+    """Maximum total size of cached content."""
+
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    _total: int | None = field(default=None, init=False, repr=False)
+    """Upper bound of the cached size, so that not every store scans the cache."""
+
+    def _key(self, url: str) -> str:
+        return hashlib.sha256(url.encode("utf-8")).hexdigest()
+
+    def _meta_path(self, key: str) -> Path:
+        return self.directory / f"{key}{META_SUFFIX}"
+
+    def _load_entry(self, meta_path: Path) -> CacheEntry | None:
+        try:
+            meta = json.loads(meta_path.read_text(encoding="utf-8"))
+            entry = CacheEntry(
+                url=meta["url"],
+                body_path=meta_path.with_suffix(BODY_SUFFIX),
+                etag=meta.get("etag"),
+                last_modified=meta.get("last_modified"),
+                size=meta.get("size", 0),
+                accessed=meta.get("accessed", 0.0),
+            )
+        except (OSError, ValueError, KeyError):
+            return None
+        if not entry.body_path.exists():
+            return None
+        return entry
+
+    def _save_meta(self, entry: CacheEntry) -> None:
+        meta = {
+            "url": entry.url,
+            "etag": entry.etag,
+            "last_modified": entry.last_modified,
+            "size": entry.size,
+            "accessed": entry.accessed,
+        }
+        write_atomic(
+            entry.body_path.with_suffix(META_SUFFIX),
+            json.dumps(meta).encode("utf-8"),
+        )
+
+    def get(self, url: str) -> CacheEntry | None:
+        """
+        Get the cache entry of the URL.
+
+        :param url: URL of the file
+        return: Cache entry, or None if the URL is not cached
+        """
+        entry = self._load_entry(self._meta_path(self._key(url)))
+        if entry is None or entry.url != url:
+            return None
+        return entry
+
+    def _touch(self, entry: CacheEntry) -> None:
+        """Mark the entry as recently used."""
+        entry.accessed = time.time()
+        try:
+            self._save_meta(entry)
+        except OSError:
+            pass
+
+    def copy_to(self, entry: CacheEntry, file_path: Path) -> int:
+        """
+        Copy the cached content to a file and mark the entry as recently used.
+
+        The content is copied in chunks and the target is replaced atomically.
+
+        :param entry: Cache entry
+        :param file_path: Path of the file to write
+        return: Number of bytes copied
+        """
+        with open(entry.body_path, "rb") as src, open_atomic(
+            file_path, shared=True
+        ) as dst:
+            shutil.copyfileobj(src, dst)
+            size = dst.tell()
+        self._touch(entry)
+        return size
+
+    def _new_entry(
+        self, url: str, size: int, etag: str | None, last_modified: str | None
+    ) -> CacheEntry | None:
+        """Create an entry for the URL, or None if it should not be cached."""
+        if not (etag or last_modified) or size > self.max_bytes:
+            return None
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        return CacheEntry(
+            url=url,
+            body_path=self.directory / f"{self._key(url)}{BODY_SUFFIX}",
+            etag=etag,
+            last_modified=last_modified,
+            size=size,
+            accessed=time.time(),
+        )
+
+    def store_file(
+        self,
+        url: str,
+        file_path: Path,
+        etag: str | None,
+        last_modified: str | None,
+    ) -> None:
+        """
+        Store a downloaded file if it can be revalidated later.
+
+        Files without an ETag or Last-Modified header, or larger than the
+        whole cache, are not stored. The content is copied in chunks.
+
+        :param url: URL of the file
+        :param file_path: Path of the downloaded file
+        :param etag: ETag header of the response
+        :param last_modified: Last-Modified header of the response
+        """
+        entry = self._new_entry(url, file_path.stat().st_size, etag, last_modified)
+        if entry is None:
+            return
+
+        with self._lock:
+            with open(file_path, "rb") as src, open_atomic(entry.body_path) as dst:
+                shutil.copyfileobj(src, dst)
+            self._save_meta(entry)
+            self._evict(entry.size)
+
+    def entries(self) -> list[CacheEntry]:
+        """Return all valid cache entries."""
+        if not self.directory.exists():
+            return []
+        entries = []
+        for meta_path in self.directory.glob(f"*{META_SUFFIX}"):
+            entry = self._load_entry(meta_path)
+            if entry is not None:
+                entries.append(entry)
+        return entries
+
+    def _remove(self, entry: CacheEntry) -> None:
+        entry.body_path.with_suffix(META_SUFFIX).unlink(missing_ok=True)
+        entry.body_path.unlink(missing_ok=True)
+
+    def _evict(self, added: int) -> None:
+        """
+        Remove least recently used entries until the cache fits its size.
+
+        The cache folder is scanned only when the size may exceed the limit.
+        Replaced entries and other processes can make the running total too
+        large, which only causes an extra scan.
+
+        :param added: Size of the entry just stored
+        """
+        if self._total is not None:
+            self._total += added
+            if self._total <= self.max_bytes:
+                return
+
+        entries = sorted(self.entries(), key=lambda e: e.accessed)
+        total = sum(e.size for e in entries)
+        while entries and total > self.max_bytes:
+            oldest = entries.pop(0)
+            self._remove(oldest)
+            total -= oldest.size
+        self._total = total
+
+    def stats(self) -> dict:
+        """Return the number of entries and total size of the cache."""
+        entries = self.entries()
+        return {
+            "directory": str(self.directory),
+            "entries": len(entries),
+            "size": sum(e.size for e in entries),
+            "max_size": self.max_bytes,
+        }
+
+    def clear(self) -> int:
+        """
+        Remove all cached files.
+
+        return: Number of removed entries
+        """
+        with self._lock:
+            entries = self.entries()
+            for entry in entries:
+                self._remove(entry)
+            self._total = None
+            if self.directory.exists():
+                for leftover in self.directory.glob(".tmp-*"):
+                    leftover.unlink(missing_ok=True)
+        return len(entries)
+
+
+_file_cache: FileCache | None = None
+_file_cache_lock = threading.Lock()
+
+
+def get_file_cache() -> FileCache:
+    """Get the process-wide file cache."""
+    global _file_cache
+    if _file_cache is None:
+        with _file_cache_lock:
+            if _file_cache is None:
+                _file_cache = FileCache()
+    return _file_cache
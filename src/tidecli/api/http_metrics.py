@@ -0,0 +1,170 @@
+"""
+Metrics of the HTTP requests made by the CLI.
+
+Every request is recorded with its endpoint, method, status, the number of
+bytes sent and received and its latency. The requests are summarized per
+endpoint into a latency histogram, status counts and byte totals, which can
+be appended to a file as JSON lines when the command exits.
+"""
+
+__authors__ = ["Olli-Pekka Riikola, Olli Rutanen, Joni Sinokki"]
+__license__ = "MIT"
+__date__ = "18.10.2026"
+
+import bisect
+import json
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from urllib.parse import urlsplit
+
+from tidecli.tide_config import TIM_URL
+
+LATENCY_BUCKETS_MS = (10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+"""Upper bounds of the latency histogram buckets in milliseconds."""
+
+
+@dataclass
+class EndpointMetrics:
+    """Requests made to one endpoint with one method."""
+
+    endpoint: str
+    method: str
+    requests: int = 0
+    statuses: dict[str, int] = field(default_factory=dict)
+    """Number of responses by status code, "error" if no response was received."""
+    bytes_sent: int = 0
+    bytes_received: int = 0
+    latency_ms_total: float = 0.0
+    latency_ms_max: float = 0.0
+    buckets: list[int] = field(
+        default_factory=lambda: [0] * (len(LATENCY_BUCKETS_MS) + 1)
+    )
+    """Request counts by latency, the last bucket has no upper bound."""
+
+    def add(self, status: str, sent: int, received: int, latency_ms: float) -> None:
+        """Add one request to the metrics."""
+        self.requests += 1
+        self.statuses[status] = self.statuses.get(status, 0) + 1
+        self.bytes_sent += sent
+        self.bytes_received += received
+        self.latency_ms_total += latency_ms
+        self.latency_ms_max = max(self.latency_ms_max, latency_ms)
+        self.buckets[bisect.bisect_left(LATENCY_BUCKETS_MS, latency_ms)] += 1
+
+    def to_dict(self) -> dict:
+        """
+        Convert the metrics to a JSON serializable dictionary.
+
+        return: Metrics with the histogram keyed by bucket upper bound
+        """
+        bounds = [str(bound) for bound in LATENCY_BUCKETS_MS] + ["inf"]
+        return {
+            "endpoint": self.endpoint,
+            "method": self.method,
+            "requests": self.requests,
+            "statuses": dict(self.statuses),
+            "bytes_sent": self.bytes_sent,
+            "bytes_received": self.bytes_received,
+            "latency_ms_mean": round(self.latency_ms_total / self.requests, 3),
+            "latency_ms_max": round(self.latency_ms_max, 3),
+            "latency_ms_histogram": dict(zip(bounds, self.buckets)),
+        }
+
+
+_metrics: dict[tuple[str, str], EndpointMetrics] = {}
+_lock = threading.Lock()
+
+
+def endpoint_label(url: str) -> str:
+    """
+    Name the endpoint of a URL so that similar requests are grouped.
+
+    Paths with up to two segments, such as the /ide and /oauth endpoints,
+    are kept as is. Longer paths are cut to their first segment, so
+    downloads of different files share one label. The host is included
+    only for addresses outside TIM.
+
+    :param url: Full URL of the request
+    return: Label of the endpoint, e.g. /ide/tasksByDoc or /files/*
+    """
+    parts = urlsplit(url)
+    segments = parts.path.strip("/").split("/")
+    if len(segments) > 2:
+        label = f"/{segments[0]}/*"
+    else:
+        label = "/" + "/".join(segments)
+    if parts.netloc != urlsplit(TIM_URL).netloc:
+        label = parts.netloc + label
+    return label
+
+
+def record(
+    endpoint: str,
+    method: str,
+    status: int | None,
+    sent: int,
+    received: int,
+    seconds: float,
+) -> None:
+    """
+    Record one request.
+
+    :param endpoint: Label of the endpoint
+    :param method: HTTP method
+    :param status: Status code of the response, None if the request failed
+    :param sent: Size of the request body in bytes
+    :param received: Size of the response body in bytes
+    :param seconds: Time from sending the request to reading the response
+    """
+    key = (endpoint, method.upper())
+    with _lock:
+        metrics = _metrics.get(key)
+        if metrics is None:
+            metrics = _metrics[key] = EndpointMetrics(*key)
+        metrics.add(
+            str(status) if status is not None else "error",
+            sent,
+            received,
+            seconds * 1000,
+        )
+
+
+def snapshot() -> list[dict]:
+    """
+    Get the metrics of every endpoint, the most requested endpoint first.
+
+    return: List of endpoint metrics as dictionaries
+    """
+    with _lock:
+        metrics = sorted(_metrics.values(), key=lambda m: m.requests, reverse=True)
+        return [m.to_dict() for m in metrics]
+
+
+def reset() -> None:
+    """Forget all recorded requests."""
+    with _lock:
+        _metrics.clear()
+
+
+def export_json_lines(path: Path, command: str | None = None) -> int:
+    """
+    Append the metrics of every endpoint to a file, one JSON object per line.
+
+    :param path: File to append to, created if it does not exist
+    :param command: Name of the command that made the requests
+    return: Number of lines written
+    """
+    timestamp = round(time.time(), 3)
+    lines = [
+        json.dumps({"timestamp": timestamp, "command": command, **metrics})
+        for metrics in snapshot()
+    ]
+    if not lines:
+        return 0
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # A single write keeps lines of concurrent commands from interleaving
+    with open(path, "a", encoding="utf-8") as file:
+        file.write("\n".join(lines) + "\n")
+    return len(lines)
@@ -19,6 +19,7 @@ from dataclasses import dataclass
 import click
 import requests
 
+from tidecli.api import session
 from tidecli.tide_config import (
     CLIENT_ID,
     REDIRECT_URI,
@@ -108,8 +109,9 @@ class OAuthAuthenticator:
                     "code_verifier": code_verifier,
                 }
 
-                response = requests.post(
-                    url=f"{TIM_URL}{TOKEN_ENDPOINT}",
+                response = session.request(
+                    "POST",
+                    f"{TIM_URL}{TOKEN_ENDPOINT}",
                     data=token_params,
                 )
 
@@ -125,7 +127,8 @@ class OAuthAuthenticator:
 
                 # Get the user profile to save token for right user
                 try:
-                    res = requests.get(
+                    res = session.request(
+                        "GET",
                         f"{TIM_URL}{PROFILE_ENDPOINT}",
                         headers={"Authorization": f"Bearer {access_token}"},
                     )
@@ -0,0 +1,197 @@
+"""
+Client-side rate limiting of the requests made to TIM.
+
+Requests take a token from a token bucket before they are sent, so that a
+command never sends more than the configured number of requests per
+second after an initial burst. Operations such as API calls and file
+downloads also take a slot, limiting how many are in flight at once.
+
+The limits adapt to the load of TIM: when TIM answers 429 or 503, a request
+fails or a response that only reads data is slow, the rate and the number
+of slots are halved.
+They grow back gradually while requests succeed, so that many clients
+starting at the same time spread their requests out instead of
+overloading TIM together.
+"""
+
+__authors__ = ["Olli-Pekka Riikola, Olli Rutanen, Joni Sinokki"]
+__license__ = "MIT"
+__date__ = "18.10.2026"
+
+import threading
+import time
+from contextlib import contextmanager
+from typing import Iterator
+
+from tidecli.tide_config import (
+    HTTP_MAX_IN_FLIGHT,
+    HTTP_RATE_BURST,
+    HTTP_RATE_LIMIT,
+    HTTP_SLOW_REQUEST_MS,
+)
+
+OVERLOAD_STATUSES = frozenset({429, 503})
+"""Response statuses telling that TIM is overloaded."""
+
+
+class RequestGovernor:
+    """Token bucket and in-flight limit that back off when TIM is overloaded."""
+
+    def __init__(
+        self,
+        rate: float = HTTP_RATE_LIMIT,
+        burst: int = HTTP_RATE_BURST,
+        max_in_flight: int = HTTP_MAX_IN_FLIGHT,
+        slow_seconds: float = HTTP_SLOW_REQUEST_MS / 1000,
+        min_rate: float = 1.0,
+    ) -> None:
+        """
+        Create a governor with full limits.
+
+        :param rate: Requests per second, 0 for no rate limit
+        :param burst: Requests that can be sent at once before the rate applies
+        :param max_in_flight: Operations in flight at once, 0 for no limit
+        :param slow_seconds: Response time after which TIM is considered overloaded
+        :param min_rate: Lowest rate the governor backs off to
+        """
+        self.max_rate = rate
+        self.rate = rate
+        self.min_rate = min(min_rate, rate) if rate else 0
+        self.burst = max(1, burst)
+        self.max_in_flight = max_in_flight
+        self.in_flight_limit = max_in_flight
+        self.slow_seconds = slow_seconds
+
+        self._tokens = float(self.burst)
+        self._refilled = time.monotonic()
+        self._in_flight = 0
+        self._successes = 0
+        self._backed_off = 0.0
+        self._condition = threading.Condition()
+        self._held = threading.local()
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(
+            self.burst, self._tokens + (now - self._refilled) * self.rate
+        )
+        self._refilled = now
+
+    def take_token(self) -> float:
+        """
+        Wait until a request may be sent.
+
+        return: Seconds waited
+        """
+        if not self.max_rate:
+            return 0.0
+        start = time.monotonic()
+        with self._condition:
+            while True:
+                now = time.monotonic()
+                self._refill(now)
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return now - start
+                self._condition.wait((1 - self._tokens) / self.rate)
+
+    def _acquire(self, count: int) -> None:
+        with self._condition:
+            for _ in range(count):
+                while self._in_flight >= self.in_flight_limit:
+                    self._condition.wait()
+                self._in_flight += 1
+
+    def _release(self, count: int) -> None:
+        with self._condition:
+            self._in_flight -= count
+            self._condition.notify_all()
+
+    @contextmanager
+    def slot(self) -> Iterator[None]:
+        """Wait until fewer operations than the limit are in flight, and hold a slot."""
+        if not self.max_in_flight:
+            yield
+            return
+        self._acquire(1)
+        self._held.count = getattr(self._held, "count", 0) + 1
+        try:
+            yield
+        finally:
+            self._held.count -= 1
+            self._release(1)
+
+    @contextmanager
+    def released(self) -> Iterator[None]:
+        """
+        Give up the slots held by this thread for a while, e.g. while waiting
+        before a retry, and wait for them again afterwards.
+        """
+        count = getattr(self._held, "count", 0)
+        if not count:
+            yield
+            return
+        self._release(count)
+        try:
+            yield
+        finally:
+            self._acquire(count)
+
+    def feedback(self, status: int | None, seconds: float, timed: bool = True) -> None:
+        """
+        Adapt the limits to the outcome of a request.
+
+        The limits are halved at most once per slow_seconds, so that a burst
+        of failures caused by the same overload counts only once.
+
+        :param status: Status of the response, None if the request failed
+        :param seconds: Time until the response was received
+        :param timed: If a slow response means that TIM is overloaded. Submits
+            compile and run the answer, so their time says little about the load.
+        """
+        overloaded = (
+            status is None
+            or status in OVERLOAD_STATUSES
+            or (timed and seconds > self.slow_seconds)
+        )
+        with self._condition:
+            now = time.monotonic()
+            if overloaded:
+                self._successes = 0
+                if now - self._backed_off < self.slow_seconds:
+                    return
+                self._backed_off = now
+                if self.max_rate:
+                    self._refill(now)
+                    self.rate = max(self.min_rate, self.rate / 2)
+                self.in_flight_limit = max(1, self.in_flight_limit // 2)
+                return
+
+            # Grow back by a tenth of the full rate and one slot at a time
+            self._successes += 1
+            if self._successes < max(1, self.in_flight_limit):
+                return
+            self._successes = 0
+            if self.max_rate and self.rate < self.max_rate:
+                self._refill(now)
+                self.rate = min(self.max_rate, self.rate + self.max_rate / 10)
+            if self.in_flight_limit < self.max_in_flight:
+                self.in_flight_limit += 1
+                self._condition.notify_all()
+
+
+_governor: RequestGovernor | None = None
+_governor_lock = threading.Lock()
+
+
+def get_governor() -> RequestGovernor:
+    """
+    Get the governor shared by all requests of the process.
+
+    return: The process-wide governor
+    """
+    global _governor
+    if _governor is None:
+        with _governor_lock:
+            if _governor is None:
+                _governor = RequestGovernor()
+    return _governor
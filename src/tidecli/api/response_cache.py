@@ -0,0 +1,201 @@
+"""
+On-disk cache of TIM API responses that list courses and tasks.
+
+Responses are cached per user and request. A cached response is used
+without asking TIM until it is older than the TTL of its endpoint. For
+RESPONSE_CACHE_STALE_SECONDS after that, the cached response is used at
+once and refreshed from TIM in the background. Older responses are
+fetched again, but if TIM cannot be reached the cached response is used
+instead.
+
+In offline mode nothing is fetched and every response comes from the
+cache. Responses that were older than their TTL when used are recorded so
+that the command can tell the user the output may be out of date.
+"""
+
+__authors__ = ["Olli-Pekka Riikola, Olli Rutanen, Joni Sinokki"]
+__license__ = "MIT"
+__date__ = "18.10.2026"
+
+import hashlib
+import json
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable
+
+from tidecli.tide_config import CACHE_DIR, OFFLINE, RESPONSE_CACHE_ENABLED
+from tidecli.utils.atomic import write_atomic
+
+RESPONSE_CACHE_DIR = CACHE_DIR / "responses"
+
+# Increase when the format of the cache files changes
+FORMAT_VERSION = 1
+
+_offline = OFFLINE
+_stale: list["StaleResponse"] = []
+_revalidations: list[threading.Thread] = []
+_lock = threading.Lock()
+
+
+@dataclass
+class CachedResponse:
+    """Response loaded from the cache."""
+
+    data: Any
+    stored_at: float
+
+    @property
+    def age(self) -> float:
+        """Seconds since the response was received from TIM."""
+        return max(0.0, time.time() - self.stored_at)
+
+
+@dataclass
+class StaleResponse:
+    """Cached response that was used although it was older than its TTL."""
+
+    endpoint: str
+    age: float
+
+
+def set_offline(offline: bool) -> None:
+    """
+    Set whether responses are served only from the cache.
+
+    :param offline: True to never contact TIM for cached endpoints
+    """
+    global _offline
+    _offline = offline
+
+
+def is_offline() -> bool:
+    """Check if responses are served only from the cache."""
+    return _offline
+
+
+def cache_key(username: str, url: str, params: dict | None) -> str:
+    """
+    Get the key of a request in the cache.
+
+    :param username: User the response belongs to
+    :param url: URL of the endpoint
+    :param params: Parameters of the request
+    return: Key of the cached response
+    """
+    request = json.dumps([username, url, params], sort_keys=True)
+    return hashlib.sha256(request.encode("utf-8")).hexdigest()
+
+
+def load_response(key: str) -> CachedResponse | None:
+    """
+    Load a cached response.
+
+    :param key: Key of the request
+    return: The cached response, or None if it is not cached
+    """
+    if not RESPONSE_CACHE_ENABLED:
+        return None
+    try:
+        entry = json.loads((RESPONSE_CACHE_DIR / f"{key}.json").read_text("utf-8"))
+        if entry["version"] != FORMAT_VERSION:
+            return None
+        return CachedResponse(entry["data"], float(entry["stored_at"]))
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+
+def save_response(key: str, endpoint: str, data: Any) -> None:
+    """
+    Cache a response received from TIM.
+
+    Failing to write the cache is ignored, the response is then fetched
+    again next time.
+
+    :param key: Key of the request
+    :param endpoint: Endpoint the response is from
+    :param data: JSON response
+    """
+    if not RESPONSE_CACHE_ENABLED:
+        return
+    entry = {
+        "version": FORMAT_VERSION,
+        "endpoint": endpoint,
+        "stored_at": time.time(),
+        "data": data,
+    }
+    try:
+        RESPONSE_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        write_atomic(RESPONSE_CACHE_DIR / f"{key}.json", json.dumps(entry))
+    except OSError:
+        pass
+
+
+def mark_stale(endpoint: str, age: float) -> None:
+    """
+    Record that a response older than its TTL was used.
+
+    :param endpoint: Endpoint of the response
+    :param age: Age of the response in seconds
+    """
+    with _lock:
+        _stale.append(StaleResponse(endpoint, age))
+
+
+def stale_responses() -> list[StaleResponse]:
+    """
+    Get and forget the stale responses used since the last call.
+
+    return: Stale responses in the order they were used
+    """
+    with _lock:
+        stale = list(_stale)
+        _stale.clear()
+    return stale
+
+
+def revalidate(fetch: Callable[[], object]) -> None:
+    """
+    Refresh a cached response in the background.
+
+    Errors are ignored, the cached response is then used until it is
+    refreshed successfully.
+
+    :param fetch: Fetches the response from TIM and caches it
+    """
+
+    def run() -> None:
+        try:
+            fetch()
+        except Exception:
+            pass
+
+    thread = threading.Thread(target=run, name="tide-revalidate")
+    with _lock:
+        _revalidations.append(thread)
+    thread.start()
+
+
+def wait_for_revalidation() -> None:
+    """Wait until the responses being refreshed in the background are cached."""
+    while True:
+        with _lock:
+            if not _revalidations:
+                return
+            thread = _revalidations.pop()
+        thread.join()
+
+
+def clear_response_cache() -> int:
+    """
+    Remove all cached responses.
+
+    return: Number of removed files
+    """
+    if not RESPONSE_CACHE_DIR.exists():
+        return 0
+    removed = 0
+    for cache_file in RESPONSE_CACHE_DIR.glob("*.json"):
+        cache_file.unlink(missing_ok=True)
+        removed += 1
+    return removed
@@ -0,0 +1,138 @@
+"""
+Retry and timeout policy of the requests made to TIM.
+
+Failed requests are retried after an exponentially growing delay with full
+jitter, so that clients that failed at the same time do not retry at the
+same time. A Retry-After header sent with the response is respected.
+
+Only requests that can safely be repeated are retried after a response or
+a lost connection. Other requests, such as submits, are retried only when
+the connection could not be opened, in which case the request was never
+sent.
+
+The policy is read from the TIDECLI_HTTP_* environment variables and can be
+changed for a single command with the --retries and --timeout options.
+"""
+
+__authors__ = ["Olli-Pekka Riikola, Olli Rutanen, Joni Sinokki"]
+__license__ = "MIT"
+__date__ = "18.10.2026"
+
+import random
+import time
+from dataclasses import dataclass, replace
+from email.utils import parsedate_to_datetime
+
+from tidecli.tide_config import (
+    HTTP_CONNECT_TIMEOUT,
+    HTTP_READ_TIMEOUT,
+    HTTP_RETRIES,
+    HTTP_RETRY_BACKOFF_MS,
+    HTTP_RETRY_MAX_DELAY,
+)
+
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+"""Methods that are retried unless the caller says otherwise."""
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """How failed requests are retried and how long responses are waited for."""
+
+    retries: int = HTTP_RETRIES
+    """Number of retries after the first attempt."""
+
+    backoff: float = HTTP_RETRY_BACKOFF_MS / 1000
+    """Delay before the first retry in seconds, doubled for every retry."""
+
+    max_delay: float = HTTP_RETRY_MAX_DELAY
+    """Longest delay between attempts in seconds. A longer Retry-After ends the retries."""
+
+    statuses: frozenset[int] = frozenset({429, 502, 503, 504})
+    """Response statuses that are retried."""
+
+    connect_timeout: float = HTTP_CONNECT_TIMEOUT
+    """Seconds to wait for a connection to open."""
+
+    read_timeout: float = HTTP_READ_TIMEOUT
+    """Seconds to wait for the server to send data."""
+
+    @property
+    def timeout(self) -> tuple[float, float]:
+        """Connect and read timeouts in the form requests expects."""
+        return self.connect_timeout, self.read_timeout
+
+    def delay(self, retry: int, retry_after: str | None = None) -> float | None:
+        """
+        Get the delay before a retry.
+
+        :param retry: Number of the retry, starting from 0
+        :param retry_after: Value of the Retry-After header of the response
+        return: Seconds to wait, or None if the server asked to wait longer
+            than max_delay
+        """
+        if retry_after is not None:
+            seconds = parse_retry_after(retry_after)
+            if seconds is not None:
+                return seconds if seconds <= self.max_delay else None
+        # Full jitter: a random delay up to the exponential backoff
+        return random.uniform(0, min(self.max_delay, self.backoff * 2**retry))
+
+    def sleep(self, seconds: float) -> None:
+        """Wait before the next attempt."""
+        time.sleep(seconds)
+
+
+def parse_retry_after(value: str) -> float | None:
+    """
+    Parse a Retry-After header.
+
+    :param value: Number of seconds or an HTTP date
+    return: Seconds to wait, or None if the value is not valid
+    """
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, retry_at.timestamp() - time.time())
+
+
+_default_policy = RetryPolicy()
+
+
+def get_default_policy() -> RetryPolicy:
+    """Get the policy used by requests that do not give their own."""
+    return _default_policy
+
+
+def set_default_policy(policy: RetryPolicy) -> None:
+    """
+    Use the policy for requests that do not give their own.
+
+    :param policy: The new default policy
+    """
+    global _default_policy
+    _default_policy = policy
+
+
+def configure(
+    retries: int | None = None, read_timeout: float | None = None
+) -> RetryPolicy:
+    """
+    Change the default policy for the rest of the command.
+
+    :param retries: Number of retries after the first attempt
+    :param read_timeout: Seconds to wait for the server to send data
+    return: The new default policy
+    """
+    global _default_policy
+    changes: dict = {}
+    if retries is not None:
+        changes["retries"] = retries
+    if read_timeout is not None:
+        changes["read_timeout"] = read_timeout
+    _default_policy = replace(_default_policy, **changes)
+    return _default_policy
@@ -8,17 +8,32 @@ __authors__ = ["Olli-Pekka Riikola, Olli Rutanen, Joni Sinokki"]
 __license__ = "MIT"
 __date__ = "11.5.2024"
 
-from typing import Any
+import gzip
+import json
+import time
+from pathlib import Path
+from typing import Callable
 import click
 import requests
 from itertools import chain
 
 from urllib.parse import urljoin
+from tidecli.api import http_metrics, response_cache, session
+from tidecli.api.file_cache import get_file_cache
+from tidecli.api.rate_limit import get_governor
+from tidecli.api.retry import get_default_policy
 from tidecli.models.course import Course
 from tidecli.models.submit_data import SubmitData
 from tidecli.models.task_data import TaskData
 from tidecli.models.tim_feedback import PointsData, TimFeedback
 from tidecli.tide_config import (
+    COURSES_CACHE_TTL,
+    DOWNLOAD_CHUNK_SIZE,
+    FILE_CACHE_ENABLED,
+    HTTP_GZIP_MIN_BYTES,
+    HTTP_GZIP_REQUESTS,
+    RESPONSE_CACHE_STALE_SECONDS,
+    TASKS_CACHE_TTL,
     TIM_URL,
     INTROSPECT_ENDPOINT,
     PROFILE_ENDPOINT,
@@ -29,19 +44,67 @@ from tidecli.tide_config import (
     TASKS_BY_DOC_ENDPOINT,
     TASKS_BY_COURSE_ENDPOINT,
 )
-from tidecli.utils.error_logger import Logger
-from tidecli.utils.handle_token import get_signed_in_user
+from tidecli.utils.atomic import open_atomic
+from tidecli.utils.handle_token import (
+    clear_credential_cache,
+    clear_introspection,
+    get_signed_in_user,
+)
+from tidecli.utils.profiling import phase
+
+_gzip_rejected = False
+"""Set when TIM has refused a compressed request body."""
+
+
+class TimConnectionError(click.ClickException):
+    """TIM could not be reached or failed to process the request."""
+
+    @property
+    def request_sent(self) -> bool:
+        """
+        Check if the request may have reached TIM.
+
+        return: False only if the connection to TIM could not be opened, after
+            a timeout or a server error TIM may have processed the request
+        """
+        cause = self.__cause__
+        return not (isinstance(cause, Exception) and session.is_connect_error(cause))
+
 
+class TimRejectedError(click.ClickException):
+    """TIM processed the request and answered with an error."""
 
-def get_file_content(url: str, is_tim_file: bool = True) -> bytes | Any:
+
+class TokenRejectedError(click.ClickException):
+    """TIM did not accept the token, the request was not processed."""
+
+
+def download_file(
+    url: str,
+    file_path: Path,
+    is_tim_file: bool = True,
+    on_progress: Callable[[int, int | None], None] | None = None,
+) -> int:
     """
-    Get the content of the file from the URL.
+    Download a file from the URL directly to disk.
+
+    The response is streamed in chunks to a temporary file that replaces
+    file_path when the download is complete, so the content is never held
+    in memory as a whole. Previously downloaded files are revalidated with
+    a conditional request and copied from the file cache when they have
+    not changed.
 
     :param url: URL of the file
+    :param file_path: Path where the file is saved
     :param is_tim_file: If the file is from TIM
-    return: Content of the file
+    :param on_progress: Called with the downloaded and the total number of
+        bytes after every chunk, total is None if it is not known
+    return: Size of the file in bytes
     """
-    headers = None
+    headers = {}
+
+    if response_cache.is_offline():
+        raise click.ClickException(f"Cannot download {url} in offline mode")
 
     if is_tim_file:
         url = urljoin(TIM_URL, url)
@@ -52,20 +115,109 @@ def get_file_content(url: str, is_tim_file: bool = True) -> bytes | Any:
         token: str = signed_in_user.password
         headers = {"Authorization": f"Bearer {token}"}
 
+    cache = get_file_cache() if FILE_CACHE_ENABLED else None
+    cached = cache.get(url) if cache else None
+    if cached:
+        headers.update(cached.validation_headers())
+
+    endpoint = http_metrics.endpoint_label(url)
+    policy = get_default_policy()
     try:
-        res = requests.get(url, headers=headers)
-        res.raise_for_status()
-        return res.content
+        attempt = 0
+        while True:
+            # The slot is not held while waiting before a retry
+            with get_governor().slot():
+                start = time.perf_counter()
+                res = session.request(
+                    "GET",
+                    url,
+                    endpoint=endpoint,
+                    retry=policy,
+                    headers=headers,
+                    stream=True,
+                )
+                size = 0
+                try:
+                    if cache and cached and res.status_code == 304:
+                        with phase("disk write"):
+                            copied = cache.copy_to(cached, file_path)
+                        if on_progress:
+                            on_progress(copied, copied)
+                        return copied
+                    if res.status_code == 401:
+                        # Token was rejected, read and validate it again
+                        clear_credential_cache()
+                        clear_introspection()
+                    res.raise_for_status()
+
+                    length = res.headers.get("Content-Length")
+                    total = int(length) if length and length.isdigit() else None
+                    if res.headers.get("Content-Encoding"):
+                        # Length of a compressed response is not the file size
+                        total = None
+                    with phase("download"), open_atomic(file_path, shared=True) as file:
+                        for chunk in res.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                            file.write(chunk)
+                            size += len(chunk)
+                            if on_progress:
+                                on_progress(size, total)
+                    break
+                except session.RETRIED_ERRORS:
+                    # The connection was lost while reading the file, the partial
+                    # file was discarded and the download starts over
+                    if attempt >= policy.retries:
+                        raise
+                finally:
+                    res.close()
+                    http_metrics.record(
+                        endpoint,
+                        "GET",
+                        res.status_code,
+                        0,
+                        size,
+                        time.perf_counter() - start,
+                    )
+            delay = policy.delay(attempt)
+            if delay is not None:
+                policy.sleep(delay)
+            attempt += 1
+
+        if cache:
+            with phase("disk write"):
+                cache.store_file(
+                    url,
+                    file_path,
+                    etag=res.headers.get("ETag"),
+                    last_modified=res.headers.get("Last-Modified"),
+                )
+        return size
     except Exception as e:
         raise click.ClickException(
             f"Could not get the content of the file from {url}\n{e}"
         ) from e
 
 
+def gzip_json_body(params: dict | None) -> bytes | None:
+    """
+    Compress a JSON request body if compression is enabled and worthwhile.
+
+    :param params: data to send
+    return: gzip compressed JSON, or None if the body is sent uncompressed
+    """
+    if not HTTP_GZIP_REQUESTS or _gzip_rejected or params is None:
+        return None
+    body = json.dumps(params, allow_nan=False).encode("utf-8")
+    if len(body) < HTTP_GZIP_MIN_BYTES:
+        return None
+    return gzip.compress(body, compresslevel=6, mtime=0)
+
+
 def tim_request(
     endpoint: str,
     method: str = "GET",
     params: dict[str, str | None] | None = None,
+    idempotent: bool | None = None,
+    compress: bool = False,
 ) -> dict:
     """
     Make a request to the TIM API.
@@ -73,44 +225,170 @@ def tim_request(
     :param endpoint: API endpoint
     :param method: HTTP method
     :param params: data to send
+    :param idempotent: If the request can be retried after a failure, by
+        default only GET requests are
+    :param compress: If a large body may be sent gzip compressed
     return: JSON response
     """
+    global _gzip_rejected
+
+    if response_cache.is_offline():
+        raise TimConnectionError(
+            f"Could not complete API call {endpoint}\nTIM is not contacted in offline mode"
+        )
+
     signed_in_user = get_signed_in_user()
     if not signed_in_user:
         raise click.ClickException("User not logged in")
 
     token: str = signed_in_user.password
+    headers = {"Authorization": f"Bearer {token}"}
+    body = gzip_json_body(params) if compress else None
 
     try:
-        res = requests.request(
-            method,
-            f"{TIM_URL}{endpoint}",
-            headers={"Authorization": f"Bearer {token}"},
-            json=params,
-        )
-
-        res_json = res.json()
+        with get_governor().slot():
+            res = None
+            if body is not None:
+                res = session.request(
+                    method,
+                    f"{TIM_URL}{endpoint}",
+                    idempotent=idempotent,
+                    headers={
+                        **headers,
+                        "Content-Type": "application/json",
+                        "Content-Encoding": "gzip",
+                    },
+                    data=body,
+                )
+                if res.status_code == 415:
+                    # TIM refused the body without processing it, so it is
+                    # safe to send it again uncompressed
+                    _gzip_rejected = True
+                    res = None
+            if res is None:
+                res = session.request(
+                    method,
+                    f"{TIM_URL}{endpoint}",
+                    idempotent=idempotent,
+                    headers=headers,
+                    json=params,
+                )
+        if res.status_code == 401:
+            # Token was rejected, read and validate it again
+            clear_credential_cache()
+            clear_introspection()
+        if res.status_code in (401, 403):
+            raise TokenRejectedError(
+                f"Could not complete API call {endpoint}\n{_error_message(res)}"
+            )
+        if res.status_code >= 500:
+            # TIM failed to process the request, it may succeed later
+            raise TimConnectionError(
+                f"Could not complete API call {endpoint}\n"
+                f"{res.status_code} Server Error: {res.reason}"
+            )
+
+        with phase("parse"):
+            res_json = res.json()
         if "error" in res_json:
-            error = res_json["error"]
-            if "error_description" in res_json:
-                raise Exception(error + "\n" + res_json["error_description"])
-            else:
-                raise Exception(error)
+            raise TimRejectedError(
+                f"Could not complete API call {endpoint}\n{_error_message(res)}"
+            )
         return res_json
 
+    except (requests.ConnectionError, requests.Timeout) as e:
+        raise TimConnectionError(f"Could not complete API call {endpoint}\n{e}") from e
+    except click.ClickException:
+        raise
     except Exception as e:
         raise click.ClickException(
             f"Could not complete API call {endpoint}\n{e}"
         ) from e
 
 
+def _error_message(res: requests.Response) -> str:
+    """
+    Get the error TIM answered with.
+
+    :param res: Response with an error
+    return: Error and its description, or the status if there is none
+    """
+    try:
+        res_json = res.json()
+        error = res_json["error"]
+    except (ValueError, KeyError, TypeError):
+        return f"{res.status_code} {res.reason}"
+    if "error_description" in res_json:
+        error += "\n" + res_json["error_description"]
+    return error
+
+
+def cached_tim_request(
+    endpoint: str, ttl: int, params: dict[str, str | None] | None = None
+) -> dict | list:
+    """
+    Make a GET request to the TIM API, using a cached response when possible.
+
+    A cached response younger than ttl is used as is. A response that has
+    been stale for less than RESPONSE_CACHE_STALE_SECONDS is used and
+    refreshed in the background. Otherwise the response is fetched, falling
+    back to the cached response if TIM cannot be reached. In offline mode
+    only the cache is used.
+
+    :param endpoint: API endpoint
+    :param ttl: Seconds a cached response is used without asking TIM
+    :param params: data to send
+    return: JSON response
+    """
+    signed_in_user = get_signed_in_user()
+    if not signed_in_user:
+        raise click.ClickException("User not logged in")
+
+    key = response_cache.cache_key(
+        signed_in_user.username, f"{TIM_URL}{endpoint}", params
+    )
+    cached = response_cache.load_response(key)
+
+    def fetch() -> dict | list:
+        res = tim_request(endpoint=endpoint, params=params)
+        response_cache.save_response(key, endpoint, res)
+        return res
+
+    if response_cache.is_offline():
+        if cached is None:
+            raise click.ClickException(
+                f"Could not complete API call {endpoint}\n"
+                "The response has not been cached, it is not available offline"
+            )
+        if cached.age >= ttl:
+            response_cache.mark_stale(endpoint, cached.age)
+        return cached.data
+
+    if cached is not None and cached.age < ttl:
+        return cached.data
+    if cached is not None and cached.age < ttl + RESPONSE_CACHE_STALE_SECONDS:
+        response_cache.revalidate(fetch)
+        return cached.data
+
+    try:
+        return fetch()
+    except TimConnectionError:
+        # Errors reported by TIM are raised, the cache is used only when
+        # TIM could not be reached or did not answer properly
+        if cached is None:
+            raise
+        response_cache.mark_stale(endpoint, cached.age)
+        return cached.data
+
+
 def validate_token() -> dict:
     """
     Validate the token for the user.
 
     return: JSON response  of token validity
     """
-    res = tim_request(endpoint=INTROSPECT_ENDPOINT, method="POST")
+    # Introspection only reads the token state, so it is safe to retry
+    res = tim_request(endpoint=INTROSPECT_ENDPOINT, method="POST", idempotent=True)
 
     return res
 
@@ -133,8 +411,9 @@ def get_ide_courses() -> list[Course]:
     return: JSON response of course name and course path,
     course id and paths for demo documents
     """
-    res = tim_request(endpoint=IDE_COURSES_ENDPOINT)
-    all_courses = [Course(**course) for course in res]
+    res = cached_tim_request(endpoint=IDE_COURSES_ENDPOINT, ttl=COURSES_CACHE_TTL)
+    with phase("parse"):
+        all_courses = [Course(**course) for course in res]
 
     return all_courses
 
@@ -148,12 +427,14 @@ def get_tasks_by_doc(doc_path: str) -> list[TaskData]:
     """
     doc_id = None  # Tim requires doc_id to be None if not used
 
-    res = tim_request(
+    res = cached_tim_request(
         endpoint=TASKS_BY_DOC_ENDPOINT,
+        ttl=TASKS_CACHE_TTL,
         params={"doc_path": doc_path, "doc_id": doc_id},
     )
 
-    tasks = [TaskData(**task) for task in res]
+    with phase("parse"):
+        tasks = [TaskData(**task) for task in res]
 
     return tasks
 
@@ -171,19 +452,26 @@ def get_task_by_ide_task_id(
     """
     doc_id = None  # Tim requires doc_id to be None if not used
 
-    res = tim_request(
+    res = cached_tim_request(
         endpoint=TASK_BY_IDE_TASK_ID_ENDPOINT,
+        ttl=TASKS_CACHE_TTL,
         params={
             "doc_path": doc_path,
             "doc_id": doc_id,
             "ide_task_id": ide_task_id,
         },
     )
+    if not isinstance(res, dict):
+        raise click.ClickException(
+            f"Could not complete API call {TASK_BY_IDE_TASK_ID_ENDPOINT}\n"
+            "Expected a single task"
+        )
 
-    return TaskData(**res)
+    with phase("parse"):
+        return TaskData(**res)
 
 
-def get_tasks_by_course(doc_id: int, doc_path: str) -> list[TaskData]:
+def get_tasks_by_course(doc_id: int, doc_path: str) -> list[list[TaskData]]:
     """
     Get all tasks from a single course by document id or document path
 
@@ -197,7 +485,10 @@ def get_tasks_by_course(doc_id: int, doc_path: str) -> list[TaskData]:
     )
 
     nested_res = [list(chain.from_iterable(x)) for x in res]
-    task_sets = [[TaskData(**task) for task in task_list] for task_list in nested_res]
+    with phase("parse"):
+        task_sets = [
+            [TaskData(**task) for task in task_list] for task_list in nested_res
+        ]
 
     return task_sets
 
@@ -215,12 +506,14 @@ def submit_task(
         endpoint=SUBMIT_TASK_ENDPOINT,
         method="PUT",
         params=task_files.submit_json(),
+        compress=True,
     )
     feedback = res.get("result")
     if not feedback:
-        raise click.ClickException("No feedback received")
+        raise TimRejectedError("No feedback received")
 
-    return TimFeedback(**feedback)
+    with phase("parse"):
+        return TimFeedback(**feedback)
 
 
 def get_task_points(ide_task_id: str, doc_path: str) -> PointsData:
@@ -229,4 +522,5 @@ def get_task_points(ide_task_id: str, doc_path: str) -> PointsData:
         method="GET",
         params={"ide_task_id": ide_task_id, "doc_path": doc_path},
     )
-    return PointsData(**res)
+    with phase("parse"):
+        return PointsData(**res)
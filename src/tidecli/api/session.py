@@ -0,0 +1,285 @@
+"""
+Process-wide HTTP session for all requests made by the CLI.
+
+Requests share one connection pool so that consecutive calls to TIM reuse
+the same TCP and TLS connection instead of opening a new one every time.
+"""
+
+__authors__ = ["Olli-Pekka Riikola, Olli Rutanen, Joni Sinokki"]
+__license__ = "MIT"
+__date__ = "18.10.2026"
+
+import atexit
+import threading
+import time
+from typing import Any
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import ConnectTimeoutError, MaxRetryError
+
+from tidecli.api import http_metrics
+from tidecli.api.rate_limit import get_governor
+from tidecli.api.retry import IDEMPOTENT_METHODS, RetryPolicy, get_default_policy
+from tidecli.tide_config import HTTP_KEEP_ALIVE, HTTP_POOL_SIZE
+from tidecli.utils.error_logger import get_logger
+from tidecli.utils.profiling import phase
+
+_session: requests.Session | None = None
+_session_lock = threading.Lock()
+
+_stats = {"requests": 0, "connections": 0}
+_stats_lock = threading.Lock()
+
+
+def _count(key: str) -> None:
+    with _stats_lock:
+        _stats[key] += 1
+
+
+class _CountingHTTPConnection(HTTPConnection):
+    def connect(self) -> None:
+        _count("connections")
+        super().connect()
+
+
+class _CountingHTTPSConnection(HTTPSConnection):
+    def connect(self) -> None:
+        _count("connections")
+        super().connect()
+
+
+class _CountingHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _CountingHTTPConnection
+
+
+class _CountingHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _CountingHTTPSConnection
+
+
+class PooledAdapter(HTTPAdapter):
+    """Adapter that counts the connections it opens."""
+
+    def init_poolmanager(self, *args: Any, **kwargs: Any) -> None:
+        """Create the pool manager with counting connection pools."""
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _CountingHTTPConnectionPool,
+            "https": _CountingHTTPSConnectionPool,
+        }
+
+
+def create_session(
+    pool_size: int = HTTP_POOL_SIZE, keep_alive: bool = HTTP_KEEP_ALIVE
+) -> requests.Session:
+    """
+    Create a new session with a connection pool.
+
+    :param pool_size: Number of connections kept open per host
+    :param keep_alive: If False, connections are closed after every request
+    return: Configured session
+    """
+    session = requests.Session()
+    adapter = PooledAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    if not keep_alive:
+        session.headers["Connection"] = "close"
+    return session
+
+
+def get_session() -> requests.Session:
+    """
+    Get the shared session, creating it on first use.
+
+    return: The process-wide session
+    """
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = create_session()
+    return _session
+
+
+def close_session() -> None:
+    """Close the shared session and all of its pooled connections."""
+    global _session
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+            _session = None
+
+
+# The pooled connections are kept open for the commands run by `tide serve`
+# and closed when the process exits
+atexit.register(close_session)
+
+
+def is_connect_error(error: Exception) -> bool:
+    """
+    Check if a request failed before it was sent.
+
+    :param error: Exception raised by requests
+    return: True if the connection to the server could not be opened
+    """
+    if isinstance(error, requests.exceptions.ConnectTimeout):
+        return True
+    if not isinstance(error, requests.exceptions.ConnectionError):
+        return False
+    reason = error.args[0] if error.args else None
+    if isinstance(reason, MaxRetryError):
+        reason = reason.reason
+    # Failing to resolve the host or to connect are ConnectTimeoutErrors
+    return isinstance(reason, ConnectTimeoutError)
+
+
+RETRIED_ERRORS = (
+    requests.exceptions.ConnectionError,
+    requests.exceptions.Timeout,
+    requests.exceptions.ChunkedEncodingError,
+)
+"""Errors after which a request that can be repeated is retried."""
+
+
+def request(
+    method: str,
+    url: str,
+    endpoint: str | None = None,
+    idempotent: bool | None = None,
+    retry: RetryPolicy | None = None,
+    **kwargs: Any,
+) -> requests.Response:
+    """
+    Make a request using the shared session, retrying failures.
+
+    Requests that can be repeated are retried after connection errors,
+    timeouts and the statuses of the retry policy. Other requests are
+    retried only when the connection could not be opened. Every attempt is
+    recorded in the HTTP metrics. Responses with stream=True are recorded
+    by the caller once the body has been read, unless the request fails.
+
+    :param method: HTTP method
+    :param url: Full URL of the request
+    :param endpoint: Label of the endpoint in the metrics, derived from the
+        URL if not given
+    :param idempotent: If the request can be repeated, by default True for
+        GET, HEAD and OPTIONS requests
+    :param retry: Retry and timeout policy, the default policy if not given
+    :param kwargs: Keyword arguments passed to requests
+    return: Response of the request
+    """
+    endpoint = endpoint or http_metrics.endpoint_label(url)
+    policy = retry or get_default_policy()
+    if idempotent is None:
+        idempotent = method.upper() in IDEMPOTENT_METHODS
+    kwargs.setdefault("timeout", policy.timeout)
+
+    attempt = 0
+    while True:
+        try:
+            res = _attempt(method, url, endpoint, idempotent, **kwargs)
+        except RETRIED_ERRORS as e:
+            if attempt >= policy.retries or not (idempotent or is_connect_error(e)):
+                raise
+            delay = policy.delay(attempt)
+            if delay is None:
+                raise
+            get_logger().debug(
+                "%s %s failed: %s, retrying in %.1f s", method, endpoint, e, delay
+            )
+        else:
+            if not idempotent or res.status_code not in policy.statuses:
+                return res
+            if attempt >= policy.retries:
+                return res
+            delay = policy.delay(attempt, res.headers.get("Retry-After"))
+            if delay is None:
+                return res
+            get_logger().debug(
+                "%s %s returned %s, retrying in %.1f s",
+                method,
+                endpoint,
+                res.status_code,
+                delay,
+            )
+            if kwargs.get("stream"):
+                http_metrics.record(
+                    endpoint, method, res.status_code, 0, 0, res.elapsed.total_seconds()
+                )
+            res.close()
+        # Other operations may run while this one waits
+        with get_governor().released():
+            policy.sleep(delay)
+        attempt += 1
+
+
+def _attempt(
+    method: str, url: str, endpoint: str, idempotent: bool, **kwargs: Any
+) -> requests.Response:
+    """
+    Make a single request when the rate limit allows it.
+
+    The request is recorded in the HTTP metrics and its outcome adapts the
+    rate limit. The response time of a request that cannot be repeated,
+    such as a submit, does not count as a sign of overload.
+    """
+    governor = get_governor()
+    with phase("rate limit"):
+        governor.take_token()
+    _count("requests")
+    start = time.perf_counter()
+    with phase("http"):
+        try:
+            res = get_session().request(method, url, **kwargs)
+        except Exception:
+            seconds = time.perf_counter() - start
+            governor.feedback(None, seconds)
+            http_metrics.record(endpoint, method, None, 0, 0, seconds)
+            raise
+    # The body of a stream is not read yet, so only the response time counts
+    governor.feedback(res.status_code, time.perf_counter() - start, idempotent)
+    if not kwargs.get("stream"):
+        http_metrics.record(
+            endpoint,
+            method,
+            res.status_code,
+            body_size(res.request),
+            len(res.content),
+            time.perf_counter() - start,
+        )
+    return res
+
+
+def body_size(prepared: requests.PreparedRequest | None) -> int:
+    """
+    Get the size of the body of a sent request.
+
+    :param prepared: The sent request
+    return: Size of the body in bytes, 0 if there is no body
+    """
+    body = getattr(prepared, "body", None)
+    if body is None:
+        return 0
+    if isinstance(body, str):
+        return len(body.encode("utf-8"))
+    try:
+        return len(body)
+    except TypeError:
+        # Bodies read from files or generators have no known length
+        return 0
+
+
+def connection_stats() -> dict[str, int]:
+    """
+    Count requests made and connections opened by this process.
+
+    The difference between the two tells how many requests reused an
+    already open connection.
+
+    return: Dictionary with the number of requests and connections
+    """
+    with _stats_lock:
+        return dict(_stats)
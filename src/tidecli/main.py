@@ -5,48 +5,167 @@ This module contains the main command group for the Tide CLI.
 The whole CLI app may be located in different module.
 """
 
+from __future__ import annotations
+
 __authors__ = ["Olli-Pekka Riikola, Olli Rutanen, Joni Sinokki, Vesa Lappalainen"]
 __license__ = "MIT"
 __date__ = "10.12.2024"
 
 import json
-from os import name
+import sys
+import time
 from pathlib import Path
-from os.path import relpath
-from typing import List
-from tidecli.models.tim_feedback import PointsData
-from tidecli.utils import login_handler
-from tidecli.utils.error_logger import Logger
+from typing import TYPE_CHECKING, List
+from tidecli.utils.error_logger import get_logger
 import click
 
-from tidecli.api.routes import (
-    get_ide_courses,
-    get_task_points,
-    get_tasks_by_doc,
-    get_tasks_by_course,
-    get_task_by_ide_task_id,
-    submit_task,
-)
-from tidecli.models.submit_data import SubmitData
-from tidecli.models.task_data import TaskData
-from tidecli.utils.file_handler import (
-    answer_with_original_noneditable_sections,
-    create_task,
-    get_task_data,
-    get_task_file_data,
-    get_metadata,
-    create_tasks,
+from tidecli.tide_config import (
+    COURSE_CREATE_WORKERS,
+    HTTP_METRICS_FILE,
+    OFFLINE,
+    PROFILE,
+    SUBMIT_QUEUE_ENABLED,
+    SUBMIT_WORKERS,
 )
-from tidecli.utils.handle_token import delete_token
-from tidecli.utils.login_handler import is_logged_in
+from tidecli.utils import profiling
+
+if TYPE_CHECKING:
+    from tidecli.models.task_data import TaskData, TaskFile
+    from tidecli.models.tim_feedback import PointsData
+    from tidecli.utils.file_handler import CreatedTask
+    from tidecli.utils.submit_handler import SubmitResult
 
-logger = Logger()
+# Commands import their dependencies when they are run, so that requests,
+# pydantic and keyring are not loaded for commands that do not need them.
+
+logger = get_logger()
 
 
 @click.group()
-def tim_ide() -> None:
+@click.option(
+    "--profile",
+    is_flag=True,
+    default=PROFILE not in ("", "0"),
+    help="Print the time spent in each phase of the command.",
+)
+@click.option(
+    "--profile-format",
+    type=click.Choice(profiling.PROFILE_FORMATS),
+    default="json" if PROFILE == "json" else "table",
+    help="Format of the --profile summary.",
+)
+@click.option(
+    "--retries",
+    type=click.IntRange(min=0),
+    help="Times a failed request to TIM is retried.",
+)
+@click.option(
+    "--timeout",
+    type=click.FloatRange(min=0, min_open=True),
+    help="Seconds to wait for TIM to respond before a request fails.",
+)
+@click.option(
+    "--offline",
+    is_flag=True,
+    default=OFFLINE,
+    help="List courses and tasks from the cache without contacting TIM.",
+)
+@click.pass_context
+def tim_ide(
+    ctx: click.Context,
+    profile: bool,
+    profile_format: str,
+    retries: int | None,
+    timeout: float | None,
+    offline: bool,
+) -> None:
     """CLI tool for downloading and submitting TIM tasks."""
-    pass
+    # The settings are restored when the command finishes, so that commands
+    # run one after another by `tide serve` do not affect each other
+    if offline:
+        from tidecli.api import response_cache
+
+        was_offline = response_cache.is_offline()
+        response_cache.set_offline(True)
+        ctx.call_on_close(lambda: response_cache.set_offline(was_offline))
+    if retries is not None or timeout is not None:
+        from tidecli.api import retry
+
+        previous_policy = retry.get_default_policy()
+        retry.configure(retries=retries, read_timeout=timeout)
+        ctx.call_on_close(lambda: retry.set_default_policy(previous_policy))
+    if profile:
+        profiling.enable()
+        ctx.call_on_close(lambda: print_profile(profile_format))
+    if HTTP_METRICS_FILE:
+        ctx.call_on_close(lambda: export_http_metrics(ctx.invoked_subcommand))
+    ctx.call_on_close(log_connection_stats)
+    # Callbacks run in reverse order, so responses refreshed in the
+    # background are cached before the requests are counted
+    ctx.call_on_close(finish_cached_responses)
+
+
+def print_profile(output_format: str) -> None:
+    """Print the time spent in each phase of the command to stderr."""
+    profiling.disable()
+    click.echo(profiling.format_summary(profiling.summary(), output_format), err=True)
+
+
+def export_http_metrics(command: str | None) -> None:
+    """Append the HTTP metrics of the command to TIDECLI_HTTP_METRICS_FILE."""
+    # No requests were made if the metrics module was never imported
+    http_metrics = sys.modules.get("tidecli.api.http_metrics")
+    if http_metrics is None or HTTP_METRICS_FILE is None:
+        return
+    try:
+        http_metrics.export_json_lines(HTTP_METRICS_FILE, command)
+    except OSError as e:
+        logger.debug("Could not write HTTP metrics to %s: %s", HTTP_METRICS_FILE, e)
+    # The next command run by `tide serve` exports only its own requests
+    http_metrics.reset()
+
+
+def finish_cached_responses() -> None:
+    """Tell the user which cached responses may be out of date."""
+    # No responses were cached if the module was never imported
+    response_cache = sys.modules.get("tidecli.api.response_cache")
+    if response_cache is None:
+        return
+    response_cache.wait_for_revalidation()
+    ages: dict[str, float] = {}
+    for stale in response_cache.stale_responses():
+        ages[stale.endpoint] = max(stale.age, ages.get(stale.endpoint, 0.0))
+    reason = "offline mode" if response_cache.is_offline() else "TIM not reachable"
+    for endpoint, age in ages.items():
+        click.echo(
+            f"Stale: {endpoint} was cached {format_age(age)} ago ({reason}).",
+            err=True,
+        )
+
+
+def format_age(seconds: float) -> str:
+    """Format a duration as a rounded number of minutes, hours or days."""
+    if seconds < 3600:
+        return f"{max(1, round(seconds / 60))} min"
+    if seconds < 48 * 3600:
+        return f"{round(seconds / 3600)} h"
+    return f"{round(seconds / 86400)} days"
+
+
+def log_connection_stats() -> None:
+    """Log how many requests of the process reused an open connection."""
+    # No requests were made if the session module was never imported
+    session = sys.modules.get("tidecli.api.session")
+    if session is None:
+        return
+    stats = session.connection_stats()
+    if stats["requests"] == 0:
+        return
+    logger.debug(
+        "HTTP: %d request(s) over %d connection(s)",
+        stats["requests"],
+        stats["connections"],
+    )
 
 
 @tim_ide.command()
@@ -57,6 +176,9 @@ def check_login(jsondata: bool) -> None:
 
     If the --json flag is used, the output is printed in JSON format.
     """
+    from tidecli.utils import login_handler
+    from tidecli.utils.login_handler import is_logged_in
+
     user = login_handler.get_signed_in_user()
     if not is_logged_in(print_errors=False, print_token_info=False) or not user:
         if jsondata:
@@ -85,6 +207,9 @@ def login(jsondata: bool) -> None:
 
     Functionality: Opens a browser window for the user to log in.
     """
+    from tidecli.utils import login_handler
+    from tidecli.utils.login_handler import is_logged_in
+
     if is_logged_in(print_errors=False, print_token_info=True):
         return
     if jsondata:
@@ -93,14 +218,19 @@ def login(jsondata: bool) -> None:
         )
     else:
         details = login_handler.login()
-        logger.info(str(details).split("\n"))
+        logger.info("%s", str(details).split("\n"))
         click.echo(details)
 
 
 @tim_ide.command()
 def logout() -> None:
     """Log out the user and deletes the token from the keyring."""
+    from tidecli.api.response_cache import clear_response_cache
+    from tidecli.utils.handle_token import delete_token
+
     click.echo(delete_token())
+    # Course and task listings of the user are not kept after logging out
+    clear_response_cache()
 
 
 @tim_ide.command()
@@ -113,6 +243,9 @@ def courses(jsondata: bool) -> None:
 
     If --json flag is used, the output is printed in JSON format.
     """
+    from tidecli.api.routes import get_ide_courses
+    from tidecli.utils.login_handler import is_logged_in
+
     if not is_logged_in():
         return
 
@@ -150,6 +283,9 @@ def list_tasks(demo_path: str, jsondata: bool) -> None:
     :param jsondata: If True, prints the output in JSON format.
 
     """
+    from tidecli.api.routes import get_tasks_by_doc
+    from tidecli.utils.login_handler import is_logged_in
+
     if not is_logged_in():
         return
 
@@ -171,6 +307,8 @@ def list_tasks(demo_path: str, jsondata: bool) -> None:
 @click.argument("doc_path", type=str, required=True)
 @click.argument("ide_task_id", type=str, required=True)
 def points(doc_path: str, ide_task_id: str, print_json: bool):
+    from tidecli.api.routes import get_task_points
+
     points: PointsData = get_task_points(ide_task_id, doc_path)
     if print_json:
         click.echo(points.model_dump_json())
@@ -222,7 +360,18 @@ def course() -> None:
     required=False,
     help="ID for the course document",
 )
-def create_course(course_path: str, course_id: int, force: bool, user_dir: str) -> None:
+@click.option(
+    "--workers",
+    "-w",
+    "workers",
+    type=click.IntRange(min=1),
+    default=COURSE_CREATE_WORKERS,
+    show_default=True,
+    help="Number of tasks created at the same time",
+)
+def create_course(
+    course_path: str, course_id: int, force: bool, user_dir: str, workers: int
+) -> None:
     """
     Create all ide tasks from a course.
 
@@ -230,21 +379,36 @@ def create_course(course_path: str, course_id: int, force: bool, user_dir: str)
     Course path and ID refer to the document where the paths to ide tasks are defined.
 
     Providing either COURSE_PATH or COURSE_ID is required.
+
+    With --workers greater than 1, tasks are created in parallel and the
+    throughput is reported at the end.
     \f
     :param course_path: Path to the course document
     :param course_id: ID for the course document
     :force: If True, overwrites existing task files
     :user_dir: Path to user defined task folder
+    :workers: Number of tasks created at the same time
     """
+    from tidecli.api.routes import get_tasks_by_course
+    from tidecli.utils.file_handler import create_course_tasks
+    from tidecli.utils.login_handler import is_logged_in
 
     if not is_logged_in():
         raise click.UsageError("Could not create tasks: User is not logged in")
     elif course_path or course_id:
-        tasks: List[TaskData] = get_tasks_by_course(
+        tasks: List[List[TaskData]] = get_tasks_by_course(
             doc_id=course_id, doc_path=course_path
         )
-        for taskSet in tasks:
-            create_tasks(tasks=taskSet, overwrite=force, user_path=user_dir)
+        start = time.perf_counter()
+        feedback = create_course_tasks(
+            task_sets=tasks, overwrite=force, user_path=user_dir, workers=workers
+        )
+        elapsed = time.perf_counter() - start
+        print_task_create_feedback(
+            [f.files for f in feedback if f.created], json_output=False
+        )
+        if workers > 1:
+            print_create_throughput(feedback, elapsed)
     else:
         raise click.UsageError(
             "Please provide either course path or course document ID."
@@ -260,6 +424,8 @@ def init_dotnet_solution(course_path: str) -> None:
     This command initializes a .NET solution for the given course path.
     The course path should point to a valid course document.
     """
+    from tidecli.utils.file_handler import get_metadata
+
     from tidecli.utils import csharp
 
     course_data = get_metadata(Path(course_path))
@@ -287,6 +453,10 @@ def create(
     json_output: bool,
 ) -> None:
     """Create tasks based on options."""
+    from tidecli.api.routes import get_task_by_ide_task_id, get_tasks_by_doc
+    from tidecli.utils.file_handler import create_tasks
+    from tidecli.utils.login_handler import is_logged_in
+
     if not is_logged_in():
         return
 
@@ -300,10 +470,8 @@ def create(
         task_data: TaskData = get_task_by_ide_task_id(
             ide_task_id=ide_task_id, doc_path=demo_path
         )
-        # create_task returns a list of task file statuses for a single task.
-        # However, print_task_create_feedback expects a list of task sets (i.e., a list of task file lists).
-        # Therefore, we wrap the result in an outer list: [ ... ]
-        feedback = [create_task(task=task_data, overwrite=force, user_path=user_dir)]
+        # A task that was not created has no file statuses to print
+        feedback = create_tasks(tasks=[task_data], overwrite=force, user_path=user_dir)
 
     else:
         click.echo(
@@ -330,6 +498,13 @@ def reset(file_path_string: str, non_editable_only: bool) -> None:
     :param file_path_string: Path to the task file in the local file system.
     :param non_editable_only: If set, resets only the non-editable parts of the task file, preserving user code.
     """
+    from tidecli.utils.file_handler import (
+        answer_with_original_noneditable_sections,
+        get_metadata,
+        get_task_file_data,
+    )
+    from tidecli.utils.login_handler import is_logged_in
+
     if not is_logged_in():
         return
 
@@ -375,6 +550,8 @@ def info(task_path_string: str, json_output: bool) -> None:
 
     :param file_path_string: Path to the task directory in the local file system.
     """
+    from tidecli.utils.file_handler import get_metadata, get_task_data
+
     task_path = Path(task_path_string).absolute()
     if task_path.is_file():
         task_path = task_path.parent
@@ -408,30 +585,157 @@ def info(task_path_string: str, json_output: bool) -> None:
             click.echo(f" - {f.file_name} ({f.task_type})")
 
 
+@task.command()
+@click.option(
+    "--poll",
+    is_flag=True,
+    default=False,
+    help="Detect changes by polling, e.g. on network drives.",
+)
+@click.argument("path", type=str, required=True)
+def watch(path: str, poll: bool) -> None:
+    """
+    Submit task files automatically when they are saved.
+
+    Watches the task files of the given task folder or the given file and
+    submits a file when its content has changed. Stop watching with Ctrl+C.
+
+    param path: Path to a task folder or a file.
+    param poll: Detect changes by polling instead of file system events.
+    """
+    from tidecli.utils.file_handler import get_metadata
+    from tidecli.utils.file_watcher import create_watcher, file_digest, watch_changes
+    from tidecli.utils.login_handler import is_logged_in
+    from tidecli.utils.metadata_index import get_metadata_index
+
+    if not is_logged_in():
+        return
+
+    task_path = Path(path)
+    if not task_path.exists():
+        raise click.ClickException(
+            "Invalid path. Give a path to the task folder "
+            "in the local file system or existing filename."
+        )
+
+    if task_path.is_dir():
+        metadata, metadata_dir = get_metadata(task_path)
+        entries = get_metadata_index(metadata, metadata_dir).find_files_under(task_path)
+    else:
+        metadata, metadata_dir = get_metadata(task_path.parent)
+        entries = get_metadata_index(metadata, metadata_dir).find_file(task_path)
+    digests = {entry.path: file_digest(entry.path) for entry in entries}
+    if not digests:
+        raise click.ClickException("No task files found in the given path.")
+
+    click.echo(f"Watching {len(digests)} file(s) for changes, press Ctrl+C to stop.")
+    watcher = create_watcher(digests, poll)
+    try:
+        for changed in watch_changes(watcher):
+            for file_path in sorted(changed):
+                digest = file_digest(file_path)
+                # Files saved without changes are not submitted
+                if digest is None or digest == digests[file_path]:
+                    continue
+                digests[file_path] = digest
+                submit_watched_file(file_path)
+    except KeyboardInterrupt:
+        click.echo("Stopped watching.")
+    finally:
+        watcher.close()
+
+
+def submit_watched_file(file_path: Path) -> None:
+    """
+    Submit a changed task file, printing errors instead of raising them.
+
+    :param file_path: Path of the changed file
+    """
+    from tidecli.utils.file_handler import get_metadata, get_task_file_data
+    from tidecli.utils.submit_handler import (
+        is_unchanged,
+        load_submitted_hashes,
+        save_submitted_hashes,
+    )
+
+    try:
+        # Metadata is loaded again in case the task has been created again
+        metadata, metadata_dir = get_metadata(file_path.parent)
+        answer_files = get_task_file_data(
+            file_path, file_path.parent, metadata_dir, metadata
+        )
+        hashes = load_submitted_hashes(metadata_dir)
+        previous_hashes = dict(hashes)
+        # Changes outside the gaps do not change the submitted answer
+        for f in answer_files:
+            if is_unchanged(f, hashes):
+                click.echo(
+                    f"Skipping: {f.file_name}, not changed since the last submit."
+                )
+        answer_files = [f for f in answer_files if not is_unchanged(f, hashes)]
+        if not answer_files:
+            return
+        try:
+            submit_answer_files(answer_files, 1, hashes, metadata_dir)
+        finally:
+            if hashes != previous_hashes:
+                save_submitted_hashes(metadata_dir, hashes)
+    except click.ClickException as e:
+        click.echo(f"Error: {e.format_message()}")
+
+
 @tim_ide.command()
+@click.option(
+    "--workers",
+    "-w",
+    "workers",
+    type=click.IntRange(min=1),
+    default=SUBMIT_WORKERS,
+    show_default=True,
+    help="Number of files submitted at the same time",
+)
+@click.option(
+    "--force",
+    "-f",
+    "force",
+    is_flag=True,
+    default=False,
+    help="Submit files even if they have not changed since the last submit",
+)
 @click.argument("path", type=str, required=True)
-def submit(path: str) -> None:
+def submit(path: str, workers: int, force: bool) -> None:
     """
     Enter the path of a task folder or a file to submit the task/tasks to TIM.
     If the path is a folder, all task files in the folder will be submitted.
     If the path is a file, only that task file will be submitted.
 
     param path: Path to a task folder or a file.
+    param workers: Number of files submitted concurrently.
+    param force: Submit files that have not changed since the last submit.
     """
+    from tidecli.utils.file_handler import get_metadata, get_task_file_data
+    from tidecli.utils.login_handler import is_logged_in
+    from tidecli.utils.submit_handler import (
+        is_unchanged,
+        load_submitted_hashes,
+        save_submitted_hashes,
+    )
+
     if not is_logged_in():
         return
 
-    path: Path = Path(path)
-    if not path.exists():
+    task_path = Path(path)
+    if not task_path.exists():
         raise click.ClickException(
             "Invalid path. Give a path to the task folder "
             "in the local file system or existing filename."
         )
-    if not path.is_dir():
-        file_dir = path.parent
-        file_path = path
+    file_path: Path | None
+    if not task_path.is_dir():
+        file_dir = task_path.parent
+        file_path = task_path
     else:
-        file_dir = path
+        file_dir = task_path
         file_path = None
 
     # Get metadata from the task folder
@@ -443,16 +747,312 @@ def submit(path: str) -> None:
     if not answer_files:
         raise click.ClickException("Invalid task file")
 
-    for f in answer_files:
-        click.echo(f"Submitting: {f.file_name}, wait...")
-        t = SubmitData(code_files=[f], code_language=f.task_type)
-        feedback = submit_task(t)
-        click.echo(feedback.console_output())
+    hashes = load_submitted_hashes(metadata_dir)
+    previous_hashes = dict(hashes)
+    if not force:
+        for f in answer_files:
+            if is_unchanged(f, hashes):
+                click.echo(
+                    f"Skipping: {f.file_name}, not changed since the last submit. "
+                    "Use --force to submit it again."
+                )
+        answer_files = [f for f in answer_files if not is_unchanged(f, hashes)]
+        if not answer_files:
+            return
+
+    try:
+        submit_answer_files(answer_files, workers, hashes, metadata_dir)
+    finally:
+        if hashes != previous_hashes:
+            save_submitted_hashes(metadata_dir, hashes)
+
+
+def submit_answer_files(
+    answer_files: list[TaskFile],
+    workers: int,
+    hashes: dict[str, str],
+    metadata_dir: Path | None = None,
+) -> None:
+    """
+    Submit answer files and print the feedback from TIM.
+
+    Files that could not be submitted because TIM could not be reached are
+    queued to be submitted later with `tide queue flush`. Files that were
+    sent but timed out or failed with a server error are not queued, as
+    TIM may already have saved them.
+
+    :param answer_files: Answer files to submit
+    :param workers: Number of files submitted concurrently
+    :param hashes: Hashes of the last accepted answers, updated in place
+    :param metadata_dir: Directory of the .timdata file of the files
+    """
+    from tidecli.api.routes import TimConnectionError
+    from tidecli.utils.handle_token import get_signed_in_user
+    from tidecli.utils.submit_handler import record_submit, submit_file, submit_files
+    from tidecli.utils.submit_queue import discard, enqueue
+
+    user = get_signed_in_user()
+    queue_enabled = SUBMIT_QUEUE_ENABLED and user is not None
+    queued = 0
+    failed = 0
+
+    def queue(task_file: TaskFile) -> None:
+        nonlocal queued
+        if user is None:
+            raise click.ClickException("User not logged in")
+        enqueue(task_file, user.username, metadata_dir)
+        queued += 1
+        click.echo(f"Queued: {task_file.file_name}")
+
+    def not_answered(task_file: TaskFile, error: TimConnectionError) -> None:
+        nonlocal failed
+        click.echo(f"Error: {error.format_message()}")
+        if error.request_sent:
+            # Sending the answer again could save it twice
+            failed += 1
+            click.echo(
+                f"The answer {task_file.file_name} may already have been saved "
+                "in TIM, check it before submitting again."
+            )
+        else:
+            queue(task_file)
+
+    def accepted(task_file: TaskFile, feedback: SubmitResult) -> None:
+        record_submit(task_file, feedback, hashes)
+        # A queued older answer must not replace the one just submitted
+        if user is not None:
+            discard(task_file, user.username)
+
+    if workers == 1 or len(answer_files) == 1:
+        for f in answer_files:
+            if queued:
+                # TIM could not be reached, the rest are queued without trying
+                queue(f)
+                continue
+            click.echo(f"Submitting: {f.file_name}, wait...")
+            try:
+                feedback = submit_file(f)
+            except TimConnectionError as e:
+                if not queue_enabled:
+                    raise
+                not_answered(f, e)
+                continue
+            accepted(f, feedback)
+            click.echo(feedback.console_output())
+    else:
+        click.echo(f"Submitting {len(answer_files)} files, wait...")
+        completed = 0
+
+        def report_progress(
+            index: int, task_file: TaskFile, result: SubmitResult
+        ) -> None:
+            nonlocal completed
+            completed += 1
+            status = "failed" if isinstance(result, Exception) else "done"
+            click.echo(
+                f"[{completed}/{len(answer_files)}] {task_file.file_name}: {status}",
+                err=True,
+            )
+
+        results = submit_files(
+            answer_files, workers=workers, on_complete=report_progress
+        )
+
+        # Feedback is printed in file order regardless of completion order
+        for f, result in zip(answer_files, results):
+            if queue_enabled and isinstance(result, TimConnectionError):
+                not_answered(f, result)
+                continue
+            if isinstance(result, Exception):
+                failed += 1
+                click.echo(f"Failed: {f.file_name}")
+                click.echo(f"Error: {result}")
+            else:
+                click.echo(f"Submitted: {f.file_name}")
+                accepted(f, result)
+                click.echo(result.console_output())
+
+    if queued:
+        raise click.ClickException(
+            f"{queued} file(s) could not be submitted and were queued. "
+            "Run `tide queue flush` to submit them."
+            + (f"\n{failed} file(s) could not be submitted." if failed else "")
+        )
+    if failed:
+        raise click.ClickException(f"{failed} file(s) could not be submitted.")
 
 
 tim_ide.add_command(task)
 
 
+@tim_ide.command()
+def serve() -> None:
+    """
+    Serve commands as JSON-RPC methods over standard input and output.
+
+    Used by IDE integrations to run several commands in one process.
+    Requests and responses are JSON-RPC 2.0 objects, one per line.
+    """
+    from tidecli.utils.rpc_server import command_lock, options_to_args
+    from tidecli.utils.rpc_server import serve as serve_rpc
+    from tidecli.utils.submit_queue import start_background_flush
+
+    # Options given before serve, e.g. tide --offline serve, apply to every
+    # command run by the server
+    parent = click.get_current_context().find_root()
+    options = options_to_args(tim_ide, parent.params)
+
+    # Queued submits are sent while the server is running, but not while
+    # a command is run with its output captured
+    stop_flush = start_background_flush(lock=command_lock)
+    try:
+        serve_rpc(tim_ide, options=options)
+    finally:
+        stop_flush.set()
+
+
+@click.group()
+def cache() -> None:
+    """
+    Cache related commands.
+
+    Downloaded task files are cached and revalidated with TIM before reuse.
+    Course and task listings are cached for offline use.
+    """
+    pass
+
+
+@cache.command(name="stats")
+@click.option("--json", "-j", "json_output", is_flag=True, default=False)
+def cache_stats(json_output: bool) -> None:
+    """Show the size and location of the file cache."""
+    from tidecli.api.file_cache import get_file_cache
+
+    stats = get_file_cache().stats()
+    if json_output:
+        click.echo(json.dumps(stats, ensure_ascii=False, indent=4))
+        return
+
+    click.echo(f"Cache location: {stats['directory']}")
+    click.echo(f"Cached files: {stats['entries']}")
+    click.echo(
+        f"Cache size: {stats['size'] / 1024 / 1024:.1f} MiB "
+        f"of {stats['max_size'] / 1024 / 1024:.1f} MiB"
+    )
+
+
+@cache.command(name="clear")
+def cache_clear() -> None:
+    """Remove all cached files."""
+    from tidecli.api.file_cache import get_file_cache
+    from tidecli.api.response_cache import clear_response_cache
+    from tidecli.utils.metadata_cache import clear_metadata_cache
+
+    removed = get_file_cache().clear()
+    click.echo(f"Removed {removed} cached file(s).")
+    removed_metadata = clear_metadata_cache()
+    if removed_metadata:
+        click.echo(f"Removed {removed_metadata} cached metadata file(s).")
+    removed_responses = clear_response_cache()
+    if removed_responses:
+        click.echo(f"Removed {removed_responses} cached TIM response(s).")
+
+
+tim_ide.add_command(cache)
+
+
+@click.group()
+def queue() -> None:
+    """
+    Submit queue related commands.
+
+    Submits that fail because TIM cannot be reached are queued and sent
+    later. Only the latest answer of each file is kept.
+    """
+    pass
+
+
+@queue.command(name="list")
+@click.option("--json", "-j", "json_output", is_flag=True, default=False)
+def queue_list(json_output: bool) -> None:
+    """List the queued submits of the logged in user, oldest first."""
+    from tidecli.utils.handle_token import get_signed_in_user
+    from tidecli.utils.submit_queue import queued_submits
+
+    user = get_signed_in_user()
+    if not user:
+        raise click.ClickException("User not logged in")
+
+    entries = queued_submits(user.username)
+    if json_output:
+        click.echo(
+            json.dumps(
+                [
+                    {
+                        "task_id_ext": e.task_file.task_id_ext,
+                        "file_name": e.task_file.file_name,
+                        "queued_at": e.queued_at,
+                    }
+                    for e in entries
+                ],
+                ensure_ascii=False,
+                indent=4,
+            )
+        )
+        return
+
+    if not entries:
+        click.echo("No queued submits.")
+    for e in entries:
+        queued_at = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(e.queued_at))
+        click.echo(f"{queued_at} {e.task_file.task_id_ext} {e.task_file.file_name}")
+
+
+@queue.command(name="flush")
+def queue_flush() -> None:
+    """Submit the queued answers in the order they were queued."""
+    from tidecli.utils.handle_token import get_signed_in_user
+    from tidecli.utils.login_handler import is_logged_in
+    from tidecli.utils.submit_queue import QueuedSubmit, flush_queue
+
+    if not is_logged_in():
+        return
+    user = get_signed_in_user()
+    if not user:
+        raise click.ClickException("User not logged in")
+
+    submitted = 0
+    failed = 0
+
+    def print_result(entry: QueuedSubmit, result: SubmitResult) -> None:
+        nonlocal submitted, failed
+        submitted += 1
+        click.echo(f"Submitted: {entry.task_file.file_name}")
+        if isinstance(result, Exception):
+            failed += 1
+            click.echo(f"Error: {result}")
+        else:
+            click.echo(result.console_output())
+
+    try:
+        remaining = flush_queue(user.username, on_result=print_result)
+    except click.ClickException as e:
+        raise click.ClickException(
+            f"{e.format_message()}\nThe remaining submits are still queued."
+        ) from e
+    if not submitted and not remaining:
+        click.echo("No queued submits.")
+    if remaining:
+        raise click.ClickException(
+            f"TIM could not be reached, {len(remaining)} submit(s) are still queued."
+        )
+    if failed:
+        raise click.ClickException(f"{failed} queued file(s) were rejected.")
+
+
+tim_ide.add_command(queue)
+
+
 def print_task_create_feedback(feedback: list[list[dict]], json_output: bool) -> None:
     """
     Print feedback from the task creation process.
@@ -474,6 +1074,10 @@ def print_task_create_feedback(feedback: list[list[dict]], json_output: bool) ->
                     click.echo(
                         f"Wrote file {task['relative_path']}: {task['file_name']}"
                     )
+                elif task["status"] == "error":
+                    click.echo(
+                        f"Could not write file {task['path']}\n{task['error']}\n"
+                    )
                 else:
                     click.echo(
                         f"File {task['path']} already exists\n"
@@ -481,5 +1085,23 @@ def print_task_create_feedback(feedback: list[list[dict]], json_output: bool) ->
                     )
 
 
+def print_create_throughput(feedback: list[CreatedTask], elapsed: float) -> None:
+    """
+    Print the number of files and bytes written per second to stderr.
+
+    :param feedback: Result of each created task
+    :param elapsed: Duration of the task creation in seconds
+    """
+    from tidecli.utils.file_handler import created_files_summary
+
+    files, size = created_files_summary(feedback)
+    elapsed = max(elapsed, 1e-6)
+    click.echo(
+        f"Created {files} files ({size / 1024 / 1024:.1f} MiB) in {elapsed:.2f} s: "
+        f"{files / elapsed:.1f} files/s, {size / 1024 / 1024 / elapsed:.2f} MiB/s",
+        err=True,
+    )
+
+
 if __name__ == "__main__":
     tim_ide()
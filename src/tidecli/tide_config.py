@@ -1,4 +1,17 @@
 import os
+from pathlib import Path
+
+import click
+
+
+def _env_int(name: str, default: int) -> int:
+    """Read an integer setting from the environment, falling back to default."""
+    try:
+        return int(os.getenv(name, default))
+    except ValueError:
+        print(f"{name} environment variable set incorrectly, using {default}.")
+        return default
+
 
 # Configuration for the TIM /oauth
 CLIENT_ID = "oauth2_tide"
@@ -25,3 +38,121 @@ TASK_BY_IDE_TASK_ID_ENDPOINT = "/ide/taskByIdeTaskId"
 TASK_POINTS_ENDPOINT = "/ide/taskPoints"
 SUBMIT_TASK_ENDPOINT = "/ide/submitTask"
 TASKS_BY_COURSE_ENDPOINT = "/ide/tasksByCourse"
+
+# Configuration for the HTTP connection pool shared by all requests
+# Number of connections kept open per host
+HTTP_POOL_SIZE = _env_int("TIDECLI_HTTP_POOL_SIZE", 10)
+# Set TIDECLI_HTTP_KEEP_ALIVE=0 to close connections after every request
+HTTP_KEEP_ALIVE = os.getenv("TIDECLI_HTTP_KEEP_ALIVE", "1") != "0"
+
+# Failed requests to TIM are retried this many times. Requests that cannot
+# be safely repeated, such as submits, are retried only when the connection
+# could not be opened.
+HTTP_RETRIES = _env_int("TIDECLI_HTTP_RETRIES", 3)
+# Delay before the first retry in milliseconds, doubled for every retry
+HTTP_RETRY_BACKOFF_MS = _env_int("TIDECLI_HTTP_RETRY_BACKOFF_MS", 500)
+# Longest delay between retries in seconds, also the longest Retry-After
+# that is waited for
+HTTP_RETRY_MAX_DELAY = _env_int("TIDECLI_HTTP_RETRY_MAX_DELAY", 30)
+# Seconds to wait for a connection to TIM to open
+HTTP_CONNECT_TIMEOUT = _env_int("TIDECLI_HTTP_CONNECT_TIMEOUT", 10)
+# Seconds to wait for TIM to send data before the request fails
+HTTP_READ_TIMEOUT = _env_int("TIDECLI_HTTP_READ_TIMEOUT", 60)
+
+# Requests sent to TIM per second after the first TIDECLI_HTTP_RATE_BURST
+# requests, 0 for no limit. The rate is lowered automatically while TIM
+# answers 429 or 503 or responds slower than TIDECLI_HTTP_SLOW_REQUEST_MS.
+HTTP_RATE_LIMIT = _env_int("TIDECLI_HTTP_RATE_LIMIT", 100)
+HTTP_RATE_BURST = _env_int("TIDECLI_HTTP_RATE_BURST", 100)
+HTTP_SLOW_REQUEST_MS = _env_int("TIDECLI_HTTP_SLOW_REQUEST_MS", 5000)
+# API calls and downloads in flight at once, 0 for no limit
+HTTP_MAX_IN_FLIGHT = _env_int("TIDECLI_HTTP_MAX_IN_FLIGHT", 8)
+
+# Set TIDECLI_HTTP_GZIP_REQUESTS=1 to gzip submit bodies of at least
+# TIDECLI_HTTP_GZIP_MIN_BYTES bytes. If TIM answers 415 Unsupported Media
+# Type, the body is sent again uncompressed and later bodies are not
+# compressed. Responses are always requested and decoded compressed.
+HTTP_GZIP_REQUESTS = os.getenv("TIDECLI_HTTP_GZIP_REQUESTS", "0") != "0"
+HTTP_GZIP_MIN_BYTES = _env_int("TIDECLI_HTTP_GZIP_MIN_BYTES", 4096)
+
+# Number of files downloaded concurrently when creating tasks
+DOWNLOAD_WORKERS = _env_int("TIDECLI_DOWNLOAD_WORKERS", 8)
+# Number of tasks created concurrently by the course create command
+COURSE_CREATE_WORKERS = _env_int("TIDECLI_COURSE_CREATE_WORKERS", 1)
+# Size of the chunks in which downloaded files are written to disk
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+# Download progress is shown when the files being downloaded total at least
+# this many bytes
+DOWNLOAD_PROGRESS_MIN_BYTES = _env_int(
+    "TIDECLI_DOWNLOAD_PROGRESS_MIN_BYTES", 5 * 1024 * 1024
+)
+
+# Folder for files cached between runs
+CACHE_DIR = Path(
+    os.getenv("TIDECLI_CACHE_DIR", Path(click.get_app_dir("tide-cli")) / "cache")
+)
+# Maximum total size of the downloaded file cache in bytes
+FILE_CACHE_MAX_BYTES = _env_int("TIDECLI_FILE_CACHE_MAX_BYTES", 200 * 1024 * 1024)
+# Set TIDECLI_FILE_CACHE=0 to always download files in full
+FILE_CACHE_ENABLED = os.getenv("TIDECLI_FILE_CACHE", "1") != "0"
+# Set TIDECLI_METADATA_CACHE=0 to always parse .timdata from JSON
+METADATA_CACHE_ENABLED = os.getenv("TIDECLI_METADATA_CACHE", "1") != "0"
+
+# Seconds a cached course list and cached task listings are used without
+# asking TIM. 0 always asks TIM, the responses are still cached for --offline.
+COURSES_CACHE_TTL = _env_int("TIDECLI_COURSES_CACHE_TTL", 3600)
+TASKS_CACHE_TTL = _env_int("TIDECLI_TASKS_CACHE_TTL", 300)
+# Seconds after the TTL during which a cached response is used at once and
+# refreshed in the background. Older responses are used only when TIM
+# cannot be reached.
+RESPONSE_CACHE_STALE_SECONDS = _env_int("TIDECLI_RESPONSE_CACHE_STALE_SECONDS", 3600)
+# Set TIDECLI_RESPONSE_CACHE=0 to always ask TIM for courses and tasks
+RESPONSE_CACHE_ENABLED = os.getenv("TIDECLI_RESPONSE_CACHE", "1") != "0"
+# Set TIDECLI_OFFLINE=1 to list courses and tasks only from the cache, like
+# the --offline option
+OFFLINE = os.getenv("TIDECLI_OFFLINE", "0") != "0"
+
+# Seconds before token expiry after which a cached token validation is no
+# longer trusted and the token is validated again with TIM
+TOKEN_EXPIRY_MARGIN = _env_int("TIDECLI_TOKEN_EXPIRY_MARGIN", 300)
+
+# Lowest level of the messages logged to tide-cli.log and stderr, 10 for
+# debug messages. By default only critical errors are logged.
+LOG_LEVEL = _env_int("TIDECLI_LOG_LEVEL", 50)
+# Log file, created in the current folder when something is logged
+LOG_FILE = "tide-cli.log"
+
+# Set TIDECLI_PROFILE=1 to print the time spent in each phase of a command
+# when it exits, or TIDECLI_PROFILE=json to print the times as JSON
+PROFILE = os.getenv("TIDECLI_PROFILE", "0")
+
+# File to which the HTTP metrics of every command are appended as JSON lines,
+# one line per endpoint, when TIDECLI_HTTP_METRICS_FILE is set
+HTTP_METRICS_FILE = (
+    Path(os.environ["TIDECLI_HTTP_METRICS_FILE"])
+    if os.getenv("TIDECLI_HTTP_METRICS_FILE")
+    else None
+)
+
+# Number of files submitted concurrently by the submit command
+SUBMIT_WORKERS = _env_int("TIDECLI_SUBMIT_WORKERS", 1)
+
+# Milliseconds without further changes after which files changed while
+# running `tide task watch` are submitted
+WATCH_DEBOUNCE_MS = _env_int("TIDECLI_WATCH_DEBOUNCE_MS", 300)
+# Milliseconds between checks when file changes are detected by polling
+WATCH_POLL_MS = _env_int("TIDECLI_WATCH_POLL_MS", 500)
+
+# Set TIDECLI_SUBMIT_QUEUE=0 to fail submits when TIM cannot be reached,
+# instead of queueing them to be sent later with `tide queue flush`
+SUBMIT_QUEUE_ENABLED = os.getenv("TIDECLI_SUBMIT_QUEUE", "1") != "0"
+# Folder of the queued submits, kept apart from the cache so that clearing
+# the cache does not lose answers
+SUBMIT_QUEUE_DIR = Path(
+    os.getenv(
+        "TIDECLI_SUBMIT_QUEUE_DIR", Path(click.get_app_dir("tide-cli")) / "submit-queue"
+    )
+)
+# Seconds between attempts to send queued submits while `tide serve` is
+# running, 0 to send them only with `tide queue flush`
+SUBMIT_QUEUE_FLUSH_INTERVAL = _env_int("TIDECLI_SUBMIT_QUEUE_FLUSH_INTERVAL", 60)
@@ -0,0 +1,57 @@
+"""Helpers for replacing files so that readers never see a partial write."""
+
+__authors__ = ["Olli-Pekka Riikola, Olli Rutanen, Joni Sinokki"]
+__license__ = "MIT"
+__date__ = "18.10.2026"
+
+import os
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+from typing import BinaryIO, Iterator
+
+# Read the umask once, os.umask cannot be queried without setting it
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+
+@contextmanager
+def open_atomic(path: Path, shared: bool = False) -> Iterator[BinaryIO]:
+    """
+    Open a temporary file for writing and move it in place when closed.
+
+    The temporary file is created in the same folder as the target so that
+    the final rename is atomic. If the block raises, the target is left
+    untouched and the temporary file is removed.
+
+    :param path: Path of the file to write
+    :param shared: If True, the file gets the usual permissions of new
+        files, otherwise it is readable only by the current user
+    return: Binary file object to write to
+    """
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as file:
+            yield file
+        if shared:
+            os.chmod(tmp_name, 0o666 & ~_UMASK)
+        os.replace(tmp_name, path)
+    except BaseException:
+        Path(tmp_name).unlink(missing_ok=True)
+        raise
+
+
+def write_atomic(path: Path, content: str | bytes, shared: bool = False) -> None:
+    """
+    Write content to a temporary file and move it in place.
+
+    :param path: Path of the file to write
+    :param content: Content to write, text is encoded as UTF-8
+    :param shared: If True, the file gets the usual permissions of new
+        files, otherwise it is readable only by the current user
+    """
+    if isinstance(content, str):
+        content = content.encode("utf-8")
+
+    with open_atomic(path, shared=shared) as file:
+        file.write(content)
@@ -0,0 +1,88 @@
+"""Progress reporting for file downloads."""
+
+__authors__ = ["Olli-Pekka Riikola, Olli Rutanen, Joni Sinokki"]
+__license__ = "MIT"
+__date__ = "18.10.2026"
+
+import sys
+import threading
+import time
+from typing import Callable, Hashable, TextIO
+
+import click
+
+from tidecli.tide_config import DOWNLOAD_PROGRESS_MIN_BYTES
+
+MIB = 1024 * 1024
+
+# Minimum number of seconds between redraws of the progress line
+RENDER_INTERVAL = 0.1
+
+
+class DownloadProgress:
+    """
+    Combined progress of concurrent downloads, shown on a single line.
+
+    Progress is written to stderr so that JSON output on stdout is not
+    affected. Nothing is shown unless stderr is a terminal and the
+    downloads total at least min_bytes.
+    """
+
+    def __init__(
+        self,
+        min_bytes: int = DOWNLOAD_PROGRESS_MIN_BYTES,
+        stream: TextIO | None = None,
+    ) -> None:
+        self.min_bytes = min_bytes
+        self.stream = stream or sys.stderr
+        self.enabled = self.stream.isatty()
+        self._files: dict[Hashable, tuple[int, int | None]] = {}
+        self._lock = threading.Lock()
+        self._last_render = 0.0
+        self._shown = False
+
+    def callback(self, key: Hashable) -> Callable[[int, int | None], None]:
+        """
+        Create a progress callback for a single download.
+
+        :param key: Identifier of the download, e.g. the file path
+        return: Function called with the downloaded and total bytes
+        """
+
+        def update(done: int, total: int | None) -> None:
+            with self._lock:
+                self._files[key] = (done, total)
+                self._render()
+
+        return update
+
+    def _totals(self) -> tuple[int, int]:
+        done = sum(d for d, _ in self._files.values())
+        # Downloads of unknown size count as large as they are so far
+        total = sum(max(d, t or 0) for d, t in self._files.values())
+        return done, total
+
+    def _render(self, force: bool = False) -> None:
+        if not self.enabled:
+            return
+        done, total = self._totals()
+        if total < self.min_bytes:
+            return
+        now = time.monotonic()
+        if not force and now - self._last_render < RENDER_INTERVAL:
+            return
+        self._last_render = now
+        self._shown = True
+        click.echo(
+            f"\rDownloading {len(self._files)} files: "
+            f"{done / MIB:.1f}/{total / MIB:.1f} MiB",
+            file=self.stream,
+            nl=False,
+        )
+
+    def close(self) -> None:
+        """Show the final state and end the progress line."""
+        with self._lock:
+            if self._shown:
+                self._render(force=True)
+                click.echo(file=self.stream)
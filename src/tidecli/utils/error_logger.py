@@ -1,49 +1,139 @@
-"""Basic error handling and logging for the CLI application."""
+"""
+Basic error handling and logging for the CLI application.
+
+A single logger is shared by the whole process. Records are put on a queue
+and written to the log file and stderr by a background thread, so logging
+does not block on file I/O. The handlers are set up when the first record
+is logged, and the log file is created only when something is written to
+it.
+
+Messages take %-style arguments that are formatted only if the record is
+logged, e.g. logger.debug("Validating %s", name). Use LazyJoin for lines
+that should only be joined when they are logged.
+"""
 
 __authors__ = ["Olli-Pekka Riikola, Olli Rutanen, Joni Sinokki"]
 __license__ = "MIT"
 __date__ = "11.5.2024"
 
+import atexit
 import logging
+import logging.handlers
+import queue
+import threading
+from typing import Iterable
+
 import click
-import os
+
+from tidecli.tide_config import LOG_FILE, LOG_LEVEL
+
+
+class LazyJoin:
+    """Lines that are joined only when the message is formatted."""
+
+    __slots__ = ("lines", "separator")
+
+    def __init__(self, lines: Iterable[str], separator: str = "\n") -> None:
+        """
+        Wrap the lines.
+
+        :param lines: Lines to join
+        :param separator: String between the lines
+        """
+        self.lines = lines
+        self.separator = separator
+
+    def __str__(self) -> str:
+        return self.separator.join(self.lines)
 
 
 class Logger:
     """Log different levels."""
 
-    def __init__(self):
+    def __init__(self) -> None:
         """Class constructor."""
         # 10 is the lowest logging level, 50 highest, 0 means not set.
-        TIDECLI_LOG_LEVEL = os.getenv("TIDECLI_LOG_LEVEL", 50)
-        try:
-            TIDECLI_LOG_LEVEL = int(TIDECLI_LOG_LEVEL)
-        except Exception as e:
-            TIDECLI_LOG_LEVEL = 50
-            print(e)
-            print("TIDECLI_LOG_LEVEL environment variable set incorrectly.")
-
-        self.level = TIDECLI_LOG_LEVEL
-        self.internal_logger = logging.getLogger(__name__)
-        self.logfile = "tide-cli.log"
-        logging.basicConfig(
-            handlers=[
-                logging.FileHandler(self.logfile, "a", "utf-8"),
+        self.level = LOG_LEVEL
+        self.logfile = LOG_FILE
+        self.internal_logger = logging.getLogger("tidecli")
+        self.internal_logger.setLevel(self.level)
+        self._listener: logging.handlers.QueueListener | None = None
+        self._queue_handler: logging.Handler | None = None
+        self._lock = threading.Lock()
+        # Write the remaining records before the process exits
+        atexit.register(self.close)
+        if self.level < logging.CRITICAL:
+            # Logging was asked for, so records of the libraries are logged
+            # from the start as well
+            self._configure()
+
+    def _configure(self) -> None:
+        """Start writing records to the log file and stderr in a thread."""
+        with self._lock:
+            if self._listener is not None:
+                return
+            records: queue.SimpleQueue = queue.SimpleQueue()
+            formatter = logging.Formatter("%(asctime)s - %(levelname)s - %(message)s")
+            handlers: list[logging.Handler] = [
+                logging.FileHandler(self.logfile, "a", "utf-8", delay=True),
                 logging.StreamHandler(),
-            ],
-            level=self.level,
-            format="%(asctime)s - %(levelname)s - %(message)s",
-        )
+            ]
+            for handler in handlers:
+                handler.setFormatter(formatter)
+            self._listener = logging.handlers.QueueListener(records, *handlers)
+            self._listener.start()
+            self._queue_handler = logging.handlers.QueueHandler(records)
+
+            root = logging.getLogger()
+            root.setLevel(self.level)
+            root.addHandler(self._queue_handler)
 
-    def log(self, LEVEL, msg):
+    def close(self) -> None:
+        """Write the queued records and stop the logging thread."""
+        with self._lock:
+            listener, self._listener = self._listener, None
+            if self._queue_handler is not None:
+                logging.getLogger().removeHandler(self._queue_handler)
+                self._queue_handler = None
+        if listener is not None:
+            listener.stop()
+            for handler in listener.handlers:
+                handler.close()
+
+    def log(self, LEVEL: int, msg: object, *args: object) -> None:
         """Log events with specified level."""
-        self.internal_logger.log(LEVEL, msg)
+        if not self.internal_logger.isEnabledFor(LEVEL):
+            return
+        self._configure()
+        self.internal_logger.log(LEVEL, msg, *args)
         click.echo("Event was logged into {0}.".format(self.logfile))
 
-    def debug(self, msg):
+    def debug(self, msg: object, *args: object) -> None:
         """Log events with level DEBUG."""
-        self.internal_logger.debug(msg)
+        if self.internal_logger.isEnabledFor(logging.DEBUG):
+            self._configure()
+            self.internal_logger.debug(msg, *args)
 
-    def info(self, msg):
+    def info(self, msg: object, *args: object) -> None:
         """Log events with level INFO."""
-        self.internal_logger.info(msg)
+        if self.internal_logger.isEnabledFor(logging.INFO):
+            self._configure()
+            self.internal_logger.info(msg, *args)
+
+
+_logger: Logger | None = None
+_logger_lock = threading.Lock()
+
+
+def get_logger() -> Logger:
+    """
+    Get the logger shared by the whole process.
+
+    return: The process-wide logger
+    """
+    global _logger
+    if _logger is None:
+        with _logger_lock:
+            if _logger is None:
+                _logger = Logger()
+    return _logger
@@ -6,8 +6,11 @@ __date__ = "11.5.2024"
 
 import re
 import json
+import shutil
 from collections import defaultdict
-from typing import Any
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from typing import Callable, Iterable, Iterator
 import click.exceptions
 from pathlib import Path
 import itertools
@@ -20,15 +23,23 @@ from tidecli.models.task_data import (
     TideCourseData,
     TideCoursePartData,
 )
-from tidecli.utils.error_logger import Logger
-from tidecli.api import routes
+from tidecli.tide_config import DOWNLOAD_WORKERS
+from tidecli.utils.atomic import open_atomic, write_atomic
+from tidecli.utils.download_progress import DownloadProgress
+from tidecli.utils.metadata_cache import load_cached_metadata, save_cached_metadata
+from tidecli.utils.metadata_index import get_metadata_index
+from tidecli.utils.profiling import phase, profiled
+from tidecli.utils.error_logger import LazyJoin, get_logger
 
 METADATA_NAME = ".timdata"
 """File to store metadata in task folder."""
 
+_metadata_cache: dict[Path, tuple[int, int, TideCourseData]] = {}
+"""Parsed metadata files keyed by path, with their mtime and size."""
+
 # Search strings for finding the beginning and end of the task content
-BEGIN_MSG_SEARCH_STRING = r"Write your code below this line"
-END_MSG_SEARCH_STRING = r"Write your code above this line"
+BEGIN_MSG_SEARCH_STRING = "Write your code below this line"
+END_MSG_SEARCH_STRING = "Write your code above this line"
 
 
 def write_file(file_path: Path, content: str | bytes) -> None:
@@ -48,6 +59,17 @@ def write_file(file_path: Path, content: str | bytes) -> None:
             file.close()
 
 
+@dataclass
+class CreatedTask:
+    """Result of creating a single task."""
+
+    files: list[dict]
+    """Saved file statuses, empty if the task was not created."""
+
+    created: bool
+    """If any files of the task were saved."""
+
+
 def create_tasks(
     tasks: list[TaskData],
     overwrite: bool,
@@ -60,14 +82,102 @@ def create_tasks(
     :param overwrite: Flag if overwrite
     :param user_path: Path to user given folder
 
-    return: True if tasks are created, False if not
+    return: Saved file statuses for each task
     """
-    combined_tasks = combine_tasks(tasks)
-    results = []
+    results = create_course_tasks([tasks], overwrite=overwrite, user_path=user_path)
+    return [result.files for result in results]
 
-    for task in combined_tasks:
-        results.append(create_task(task=task, overwrite=overwrite, user_path=user_path))
-    return results
+
+def create_course_tasks(
+    task_sets: list[list[TaskData]],
+    overwrite: bool,
+    user_path: str | None = None,
+    workers: int = 1,
+) -> list[CreatedTask]:
+    """
+    Create the tasks of one or more task sets.
+
+    With one worker, files of all tasks are downloaded in one stage before
+    the tasks are created one by one. With more workers, that many tasks
+    are created at the same time, each downloading its own files, so at
+    most workers files are written or downloaded at once. In both cases
+    the metadata of all created tasks is written to .timdata once at the
+    end, in the order of the tasks.
+
+    :param task_sets: Lists of TaskData objects, e.g. one per document
+    :param overwrite: Flag if overwrite
+    :param user_path: Path to user given folder
+    :param workers: Number of tasks created at the same time
+
+    return: Result of each task, in the order of the tasks
+    """
+    combined_tasks = [t for tasks in task_sets for t in combine_tasks(tasks)]
+    save_path = get_save_path(user_path)
+
+    if workers > 1:
+        # Each task downloads its own files inside its worker
+        downloaded: dict[Path, int | Exception] = {}
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = list(
+                executor.map(
+                    lambda task: create_task(
+                        task=task,
+                        overwrite=overwrite,
+                        user_path=user_path,
+                        downloaded=downloaded,
+                        update_metadata=False,
+                    ),
+                    combined_tasks,
+                )
+            )
+    else:
+        downloaded = download_files(
+            itertools.chain.from_iterable(
+                pending_downloads(task, save_path, overwrite) for task in combined_tasks
+            )
+        )
+        results = [
+            create_task(
+                task=task,
+                overwrite=overwrite,
+                user_path=user_path,
+                downloaded=downloaded,
+                update_metadata=False,
+            )
+            for task in combined_tasks
+        ]
+
+    created = [
+        CreatedTask(saved if isinstance(saved, list) else [], bool(saved))
+        for saved in results
+    ]
+    created_tasks = [
+        task for task, result in zip(combined_tasks, created) if result.created
+    ]
+    if created_tasks:
+        write_metadata(folder_path=save_path, metadata=created_tasks)
+    return created
+
+
+def created_files_summary(feedback: list[CreatedTask]) -> tuple[int, int]:
+    """
+    Count the written files and their total size.
+
+    :param feedback: Result of each created task
+    return: Number of written files and their size in bytes
+    """
+    files = 0
+    size = 0
+    for task in feedback:
+        for file_data in task.files:
+            if file_data["status"] != "written":
+                continue
+            files += 1
+            try:
+                size += Path(file_data["path"]).stat().st_size
+            except OSError:
+                pass
+    return files, size
 
 
 def combine_tasks(tasks: list[TaskData]) -> list[TaskData]:
@@ -110,25 +220,104 @@ def combine_tasks(tasks: list[TaskData]) -> list[TaskData]:
     return combined_tasks
 
 
-def get_file_content_from_source(source: str) -> bytes | Any:
+def download_from_source(
+    source: str,
+    file_path: Path,
+    on_progress: Callable[[int, int | None], None] | None = None,
+) -> int:
     """
-    Get content of a file from its source address.
+    Download a file from its source address directly to the given path.
     If address does not start with http URL, it is assumed to be a TIM path.
 
     :param source: file source address
-    return: Content of the source
+    :param file_path: Path where the file is saved
+    :param on_progress: Called with the downloaded and total bytes
+    return: Size of the file in bytes
+    """
+    from tidecli.api import routes
+
+    if re.match(r"^https?://", source):
+        # Source is a http URL
+        return routes.download_file(source, file_path, on_progress=on_progress)
+    else:
+        # Source is assumed to be a TIM path
+        return routes.download_file(
+            source, file_path, is_tim_file=True, on_progress=on_progress
+        )
+
+
+def download_files(
+    downloads: Iterable[tuple[str, Path]], max_workers: int = DOWNLOAD_WORKERS
+) -> dict[Path, int | Exception]:
+    """
+    Download multiple files concurrently directly to their paths.
+
+    Every source is downloaded once; files sharing a source are copied from
+    the first download. A failed download does not stop the others; the
+    exception is stored in place of the size instead.
+
+    :param downloads: Pairs of source address and path to save the file to
+    :param max_workers: Maximum number of concurrent downloads
+    return: Dictionary of file sizes or errors keyed by path
     """
-    if source is not None:
-        if re.match(r"^https?://", source):
-            # Source is a http URL
-            return routes.get_file_content(source)
-        else:
-            # Source is assumed to be a TIM path
-            return routes.get_file_content(source, is_tim_file=True)
+    paths_by_source: dict[str, list[Path]] = defaultdict(list)
+    for source, file_path in downloads:
+        if source is not None and file_path not in paths_by_source[source]:
+            paths_by_source[source].append(file_path)
+
+    results: dict[Path, int | Exception] = {}
+    if not paths_by_source:
+        return results
+
+    def download(source: str, paths: list[Path], progress: DownloadProgress) -> int:
+        first, *copies = paths
+        first.parent.mkdir(parents=True, exist_ok=True)
+        size = download_from_source(source, first, progress.callback(first))
+        for copy_path in copies:
+            copy_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(first, "rb") as src, open_atomic(copy_path, shared=True) as dst:
+                shutil.copyfileobj(src, dst)
+        return size
+
+    progress = DownloadProgress()
+    workers = max(1, min(max_workers, len(paths_by_source)))
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {
+                executor.submit(download, source, paths, progress): paths
+                for source, paths in paths_by_source.items()
+            }
+            for future in as_completed(futures):
+                paths = futures[future]
+                try:
+                    result: int | Exception = future.result()
+                except Exception as e:
+                    result = e
+                for file_path in paths:
+                    results[file_path] = result
+    finally:
+        progress.close()
+    return results
+
+
+def get_save_path(user_path: str | None = None) -> Path:
+    """
+    Get the folder where tasks are saved.
+
+    :param user_path: Path to user given folder
+    return: Current path or user given path
+    """
+    if user_path:
+        return Path.cwd() / user_path
+    return Path.cwd()
 
 
 def create_task(
-    task: TaskData, overwrite: bool, user_path: str | None = None
+    task: TaskData,
+    overwrite: bool,
+    user_path: str | None = None,
+    downloaded: dict[Path, int | Exception] | None = None,
+    update_metadata: bool = True,
 ) -> list[dict] | bool:
     """
     Create a single task.
@@ -136,27 +325,31 @@ def create_task(
     :param task: TaskData object
     :param overwrite: Flag if overwrite
     :param user_path: Path to user given folder
+    :param downloaded: Sizes or errors of files downloaded in advance
+    :param update_metadata: If False, the caller writes the task metadata
 
     return: True if task is created, False if not
     """
-    # Sets path to current path or user given path
-    if user_path:
-        save_path = Path.cwd() / user_path
-    else:
-        save_path = Path.cwd()
+    save_path = get_save_path(user_path)
 
-    saved = save_task_files(task, save_path=save_path, overwrite=overwrite)
+    saved = save_task_files(
+        task, save_path=save_path, overwrite=overwrite, downloaded=downloaded
+    )
 
     if not saved:
         return False
 
-    write_metadata(folder_path=save_path, metadata=task)
+    if update_metadata:
+        write_metadata(folder_path=save_path, metadata=task)
 
     return saved
 
 
 def save_task_file(
-    task_file: TaskFile | SupplementaryFile, save_path: Path, overwrite: bool = False
+    task_file: TaskFile | SupplementaryFile,
+    save_path: Path,
+    overwrite: bool = False,
+    downloaded: dict[Path, int | Exception] | None = None,
 ) -> dict:
     """
     Save task file and return info dict for JSON reporting.
@@ -164,11 +357,16 @@ def save_task_file(
     :param task_file: TaskFile object
     :param save_path: Path to save the file
     :param overwrite: Flag if overwrite
+    :param downloaded: Sizes or errors of files downloaded in advance
     :return: Dictionary with file status information
     """
 
     file_path = save_path / task_file.file_name
 
+    # Files downloaded in advance are already in place
+    if downloaded is not None and file_path in downloaded:
+        return _saved_file_data(task_file, save_path, downloaded[file_path])
+
     if file_path.exists() and not overwrite:
         file_data = {
             "file_name": task_file.file_name,
@@ -182,87 +380,157 @@ def save_task_file(
         return file_data
 
     file_path.parent.mkdir(parents=True, exist_ok=True)
+    result: int | Exception = 0
     if task_file.content is not None:
-        with open(file_path, "w", encoding="utf-8") as file:
+        with phase("disk write"), open(file_path, "w", encoding="utf-8") as file:
             file.write(task_file.content)
             file.close()
     elif task_file.source is not None:
-        # TODO: Handle potential errors from API call (allow errors so that consequent files are saved)
-        # Currently, only files that in the list before an error are saved
-        content = get_file_content_from_source(task_file.source)
-        with open(file_path, "wb") as file:
-            file.write(content)
-            file.close()
+        try:
+            result = download_from_source(task_file.source, file_path)
+        except Exception as e:
+            result = e
+
+    return _saved_file_data(task_file, save_path, result)
 
+
+def _saved_file_data(
+    task_file: TaskFile | SupplementaryFile,
+    save_path: Path,
+    result: int | Exception,
+) -> dict:
+    """
+    Create the info dict of a written file or a failed download.
+
+    :param task_file: TaskFile object
+    :param save_path: Path the file was saved to
+    :param result: Size of the file, or the error of a failed download
+    :return: Dictionary with file status information
+    """
     file_data = {
         "file_name": task_file.file_name,
-        "path": str(file_path),
+        "path": str(save_path / task_file.file_name),
         "relative_path": relpath(save_path, Path.cwd()),
         "status": "written",
     }
+    # A failed download is reported and the rest of the files are saved
+    if isinstance(result, Exception):
+        file_data["status"] = "error"
+        file_data["error"] = str(result)
     # Add task_id_ext if it exists. Supplementary files do not have it
     if hasattr(task_file, "task_id_ext"):
         file_data["task_id_ext"] = task_file.task_id_ext
     return file_data
 
 
-def save_task_files(
-    task: TaskData, save_path: Path, overwrite: bool = False
-) -> list[dict]:
+def iter_task_file_dirs(
+    task: TaskData, save_path: Path
+) -> Iterator[tuple[TaskFile | SupplementaryFile, Path]]:
     """
-    Save task files in the given path.
+    Iterate over task and supplementary files with their save directories.
 
     :param task: TaskData object
     :param save_path: Path to save the files
-    :param overwrite: Flag if overwrite
-    :return: list of saved files
+    :return: Iterator of file and directory pairs
     """
-    results = []
     task_files = task.task_files + task.supplementary_files
     save_dir = save_path / task.get_task_directory()
 
     for task_file in task_files:
         if task_file.task_directory is not None:
             save_dir = save_path / task_file.task_directory
-        result = save_task_file(task_file, save_dir, overwrite)
+        yield task_file, save_dir
+
+
+def pending_downloads(
+    task: TaskData, save_path: Path, overwrite: bool
+) -> list[tuple[str, Path]]:
+    """
+    List the task files that have to be downloaded.
+
+    :param task: TaskData object
+    :param save_path: Path to save the files
+    :param overwrite: Flag if overwrite
+    :return: Pairs of source address and path of files that will be written
+    """
+    downloads = []
+    for task_file, save_dir in iter_task_file_dirs(task, save_path):
+        if task_file.content is not None or task_file.source is None:
+            continue
+        file_path = save_dir / task_file.file_name
+        if overwrite or not file_path.exists():
+            downloads.append((task_file.source, file_path))
+    return downloads
+
+
+def save_task_files(
+    task: TaskData,
+    save_path: Path,
+    overwrite: bool = False,
+    downloaded: dict[Path, int | Exception] | None = None,
+) -> list[dict]:
+    """
+    Save task files in the given path.
+
+    Files with a source address are downloaded concurrently before
+    anything is written, unless they are given in downloaded.
+
+    :param task: TaskData object
+    :param save_path: Path to save the files
+    :param overwrite: Flag if overwrite
+    :param downloaded: Sizes or errors of files downloaded in advance
+    :return: list of saved files
+    """
+    if downloaded is None:
+        downloaded = download_files(pending_downloads(task, save_path, overwrite))
+
+    results = []
+    for task_file, save_dir in iter_task_file_dirs(task, save_path):
+        result = save_task_file(task_file, save_dir, overwrite, downloaded)
         if result:
             results.append(result)
 
     return results
 
 
-def write_metadata(folder_path: Path, metadata: TaskData) -> None:
+def write_metadata(folder_path: Path, metadata: TaskData | list[TaskData]) -> None:
     """
-    Write metadata.json to the given folder path.
+    Write metadata of one or more tasks to .timdata in the given folder path.
 
-    :param metadata: TaskData object
+    The existing file is read once and replaced atomically after all tasks
+    have been updated.
+
+    :param metadata: TaskData object or list of TaskData objects
     :param folder_path: Path to folder to create metadata.json
     """
     metadata_path = Path(folder_path) / METADATA_NAME
-    write_mode = "w"
+    _metadata_cache.pop(metadata_path.absolute(), None)
+    tasks = metadata if isinstance(metadata, list) else [metadata]
     course_metadata: TideCourseData = TideCourseData()
-    course_part_name = metadata.path
-    taskname = metadata.ide_task_id
     if metadata_path.exists():
         try:
-            with open(metadata_path, "r", encoding="utf-8") as file:
+            with phase("parse"), open(metadata_path, "r", encoding="utf-8") as file:
                 old_metadata = json.load(file)
                 course_metadata = TideCourseData(**old_metadata)
         except Exception as e:
             # raise click.ClickException(f"Error reading metadata: {e}")
             click.echo(f"Error reading metadata: {e}")  # Try to recover
-    with open(metadata_path, write_mode, encoding="utf-8") as file:
+
+    for task in tasks:
         course_part = course_metadata.course_parts.setdefault(
-            course_part_name, TideCoursePartData()
+            task.path, TideCoursePartData()
         )
 
-        if course_part.tasks.get(taskname, metadata) != metadata:
+        if course_part.tasks.get(task.ide_task_id, task) != task:
             click.echo("Task metadata updated")
-        course_part.tasks[taskname] = metadata
+        course_part.tasks[task.ide_task_id] = task
 
-        content = course_metadata.model_dump_json(indent=4)
-        file.write(content)
-        file.close()
+    with phase("disk write"):
+        write_atomic(
+            metadata_path, course_metadata.model_dump_json(indent=4), shared=True
+        )
+        # The next command can use the metadata without parsing the file again
+        save_cached_metadata(metadata_path, metadata_path.stat(), course_metadata)
 
 
 def create_file(item: dict, folder_path: Path, overwrite=False):
@@ -287,8 +555,8 @@ def create_file(item: dict, folder_path: Path, overwrite=False):
 
 
 def include_user_answer_to_task_file(f1: TaskFile, f2: Path) -> bool:
-    logger = Logger()
-    logger.debug(f"Validating {f2.name} against metadata content of task.")
+    logger = get_logger()
+    logger.debug("Validating %s against metadata content of task.", f2.name)
     with open(f2, "r", encoding="utf-8") as answer_file:
         answer_content = answer_file.read()
         answer_bycode, answer_gapcode = split_file_contents(answer_content)
@@ -330,18 +598,10 @@ def get_task_data(
     if task_path is None:
         raise click.ClickException("Task path not given.")
 
-    task_path = task_path.absolute()
-    for course_part in metadata.course_parts.values():
-        for task in course_part.tasks.values():
-            timdata_task_directory = task.get_task_directory()
-            timdata_task_path = (
-                Path.cwd() / metadata_dir / timdata_task_directory
-            ).absolute()
-
-            if task_path == timdata_task_path or timdata_task_path in task_path.parents:
-                return task
-
-    raise click.ClickException(f"Task not found in path {task_path}")
+    task = get_metadata_index(metadata, metadata_dir).find_task(task_path)
+    if task is None:
+        raise click.ClickException(f"Task not found in path {task_path.absolute()}")
+    return task
 
 
 def get_task_file_data(
@@ -364,44 +624,26 @@ def get_task_file_data(
 
     result = []
     tasks = set()
-    file_path = file_path.absolute() if file_path is not None else None
-    file_dir = file_dir.absolute()
-
-    for course_part in metadata.course_parts.values():
-        for task in course_part.tasks.values():
-            for task_file in task.task_files:
-                timdata_task_directory = (
-                    task_file.task_directory
-                    if task_file.task_directory is not None
-                    else task.get_task_directory()
-                )
-                timdata_file_path = (
-                    metadata_dir / timdata_task_directory / task_file.file_name
-                ).absolute()
-                timdata_file_dir = (metadata_dir / timdata_file_path.parent).absolute()
-
-                if file_path is not None:
-                    path_match = timdata_file_path == file_path
-                else:
-                    path_match = (
-                        file_dir == timdata_file_dir
-                        or file_dir in timdata_file_dir.parents
-                    )
-
-                if path_match:
-                    if not with_starter_content:
-                        if not include_user_answer_to_task_file(
-                            task_file, timdata_file_path
-                        ):
-                            continue
-                    result.append(task_file)
-                    tasks.add(task.ide_task_id)
-
-                    if len(tasks) > 1:
-                        # Prompt user for which tasks to submit?
-                        raise click.ClickException(
-                            "Multiple tasks found in the same directory. Give exact file name."
-                        )
+    index = get_metadata_index(metadata, metadata_dir)
+    if file_path is not None:
+        entries = index.find_file(file_path)
+    else:
+        entries = index.find_files_under(file_dir)
+
+    for entry in entries:
+        # Copy so that the parsed metadata keeps the starter content
+        task_file = entry.task_file.model_copy()
+        if not with_starter_content:
+            if not include_user_answer_to_task_file(task_file, entry.path):
+                continue
+        result.append(task_file)
+        tasks.add(entry.task.ide_task_id)
+
+        if len(tasks) > 1:
+            # Prompt user for which tasks to submit?
+            raise click.ClickException(
+                "Multiple tasks found in the same directory. Give exact file name."
+            )
     return result
 
 
@@ -426,8 +668,20 @@ def get_metadata(metadata_dir: Path) -> tuple[TideCourseData, Path]:
             raise click.ClickException(f"Metadata not found in {metadata_path}")
         metadata_dir = metadata_dir.parent
 
+    # Reuse the parsed metadata if the file has not changed since
+    stat = metadata_path.stat()
+    cached = _metadata_cache.get(metadata_path)
+    if cached is not None and cached[:2] == (stat.st_mtime_ns, stat.st_size):
+        return cached[2], metadata_dir
+
+    with phase("parse"):
+        course_data = load_cached_metadata(metadata_path, stat)
+    if course_data is not None:
+        _metadata_cache[metadata_path] = (stat.st_mtime_ns, stat.st_size, course_data)
+        return course_data, metadata_dir
+
     try:
-        with open(metadata_path, "r", encoding="utf-8") as file:
+        with phase("parse"), open(metadata_path, "r", encoding="utf-8") as file:
             metadata = json.load(file)
             if "course_parts" not in metadata:
                 task_data = TaskData(**metadata)
@@ -435,44 +689,49 @@ def get_metadata(metadata_dir: Path) -> tuple[TideCourseData, Path]:
                     if task_file_data.task_type is None:
                         task_file_data.task_type = task_data.type
 
-                return (
-                    TideCourseData(
-                        course_parts={
-                            task_data.path: TideCoursePartData(
-                                tasks={task_data.ide_task_id: task_data}
-                            )
-                        }
-                    ),
-                    metadata_dir,
+                course_data = TideCourseData(
+                    course_parts={
+                        task_data.path: TideCoursePartData(
+                            tasks={task_data.ide_task_id: task_data}
+                        )
+                    }
                 )
-            return TideCourseData(**metadata), metadata_dir
+            else:
+                course_data = TideCourseData(**metadata)
     except Exception as e:
         raise click.ClickException(f"Error reading metadata: {e}")
 
+    _metadata_cache[metadata_path] = (stat.st_mtime_ns, stat.st_size, course_data)
+    with phase("disk write"):
+        save_cached_metadata(metadata_path, stat, course_data)
+    return course_data, metadata_dir
 
+
+@profiled("gaps")
 def split_file_contents(content: str) -> tuple[list[str], list[str]]:
     """
     Split file contents to find gaps in tasks.
 
+    Lines outside the gaps, including the gap markers, are returned as the
+    by code and the lines inside all gaps, in order, as the gap content.
+
     :param content: Content of the file
     """
-    lines = re.split(r"\r?\n", content)
-    gap = find_gaps_in_tasks(lines)
-    if gap is None:
+    lines = split_lines(content)
+    gaps = find_gaps_in_tasks(lines)
+    if not gaps:
         return [], []
 
-    start, end = gap
-
-    # Create list of strings for validation
-    bycodebegin = lines[: start + 1]
-    bycodeend = lines[end:]
-    gap_content = lines[start + 1 : end]
-
-    bycode = bycodebegin + bycodeend
+    bycode: list[str] = []
+    gap_content: list[str] = []
+    previous_end = 0
+    for start, end in gaps:
+        bycode.extend(lines[previous_end : start + 1])
+        gap_content.extend(lines[start + 1 : end])
+        previous_end = end
+    bycode.extend(lines[previous_end:])
 
-    logger = Logger()
-    log_text = "\n".join(gap_content)
-    logger.debug(f"Text in the gap: \n{0}".format(log_text))
+    get_logger().debug("Text in the gap: \n%s", LazyJoin(gap_content))
 
     return bycode, gap_content
 
@@ -489,7 +748,7 @@ def validate_answer_file(answer_by: list[str], metadata_by: list[str]) -> bool:
     :param metadata_by: list of metedatas
     :return: True if the file is valid, False if not
     """
-    logger = Logger()
+    logger = get_logger()
 
     if len(answer_by) == 0 and len(metadata_by) == 0:
         logger.debug("Both files are empty.")
@@ -508,7 +767,7 @@ def validate_answer_file(answer_by: list[str], metadata_by: list[str]) -> bool:
     # Difference helps, when length of the contents are the same.
     bycodediff = clear_answer.difference(clear_metadata_content)
     logger.debug("Diff between cleared answer and .timdata content: \n")
-    logger.debug(bycodediff)
+    logger.debug("%s", bycodediff)
 
     if len(bycodediff) > 0:
         logger.info("Note: file has been modified outside of desired area.")
@@ -523,63 +782,89 @@ def clear_contents(lines_by: list[str]) -> set[str] | None:
     :param lines_by: List of lines in the file
     :return: Set of lines in the file
     """
-    logger = Logger()
-
     # Remove empty lines for comparison
     for i, line in enumerate(lines_by):
         clean = line.strip()
         if clean == "" or clean == "\n":
             lines_by.pop(i)
 
-    logger.debug("\n".join(lines_by))
+    get_logger().debug("%s", LazyJoin(lines_by))
 
     return set(lines_by)
 
 
-def find_gaps_in_tasks(lines: list[str]) -> tuple[int, int] | None:
+def split_lines(content: str) -> list[str]:
+    """
+    Split content to lines at LF and CRLF line breaks.
+
+    Gives the same result as re.split(r"\\r?\\n", content) without the
+    cost of the regular expression on large files.
+
+    :param content: Text to split
+    :return: List of lines without line breaks
+    """
+    lines = content.split("\n")
+    if "\r" in content:
+        last = lines.pop()
+        lines = [line[:-1] if line.endswith("\r") else line for line in lines]
+        lines.append(last)
+    return lines
+
+
+def find_gaps_in_tasks(lines: list[str]) -> list[tuple[int, int]]:
     """
     Find gaps in tasks.
 
+    The lines are scanned once. Each begin marker is paired with the next
+    end marker; if a second begin marker comes before the end marker, the
+    gap starts from the later one. Unpaired markers are ignored.
+
     :param lines: List of lines in the file
+    :return: Indices of the begin and end marker lines of each gap, in order
     """
-    # TODO: Find multiple gaps, store tuples into a list
+    gaps = []
     start: int | None = None
-    end: int | None = None
 
     for i, line in enumerate(lines):
-        if re.search(BEGIN_MSG_SEARCH_STRING, line):
+        if BEGIN_MSG_SEARCH_STRING in line:
             start = i
-        if re.search(END_MSG_SEARCH_STRING, line):
-            end = i
+        elif start is not None and END_MSG_SEARCH_STRING in line:
+            gaps.append((start, i))
+            start = None
 
-    gap = (start, end)
-    if start is None or end is None:
-        return None
-
-    return gap
+    return gaps
 
 
 # TODO: a function for adding removed gap markers
+@profiled("gaps")
 def answer_with_original_noneditable_sections(answer: str, original: str) -> str:
     """
     Combine answer with original file, keeping non-editable sections from original.
 
+    The content of each gap in the answer replaces the content of the
+    corresponding gap in the original. If the files do not have the same
+    number of gaps, the answer is returned as is.
+
     :param answer: Answer file content
     :param original: Original file content
     """
-    answer_lines = re.split(r"\r?\n", answer)
-    original_lines = re.split(r"\r?\n", original)
+    answer_lines = split_lines(answer)
+    original_lines = split_lines(original)
 
     answer_gaps = find_gaps_in_tasks(answer_lines)
     original_gaps = find_gaps_in_tasks(original_lines)
 
-    if answer_gaps is None or original_gaps is None:
+    if not answer_gaps or len(answer_gaps) != len(original_gaps):
         return answer
 
-    combined_lines = itertools.chain(
-        original_lines[: original_gaps[0] + 1],
-        answer_lines[answer_gaps[0] + 1 : answer_gaps[1]],
-        original_lines[original_gaps[1] :],
-    )
+    combined_lines: list[str] = []
+    previous_end = 0
+    for (original_start, original_end), (answer_start, answer_end) in zip(
+        original_gaps, answer_gaps
+    ):
+        combined_lines.extend(original_lines[previous_end : original_start + 1])
+        combined_lines.extend(answer_lines[answer_start + 1 : answer_end])
+        previous_end = original_end
+    combined_lines.extend(original_lines[previous_end:])
 
     return "\n".join(combined_lines)
@@ -0,0 +1,230 @@
+"""
+Change detection for the files of watched tasks.
+
+On Linux, changes are reported by inotify, which is used through ctypes so
+that no extra dependency is needed. Elsewhere, and on file systems where
+inotify does not see changes (e.g. network drives or Windows drives under
+WSL), the files are polled by comparing their modification time and size.
+
+Editors often write a file several times when saving it, so changes are
+coalesced: a batch of changed files is reported only after no more changes
+have been seen for the debounce time.
+"""
+
+__authors__ = ["Olli-Pekka Riikola, Olli Rutanen, Joni Sinokki"]
+__license__ = "MIT"
+__date__ = "18.10.2026"
+
+import ctypes
+import ctypes.util
+import hashlib
+import os
+import select
+import struct
+import sys
+import time
+from pathlib import Path
+from typing import Iterable, Iterator, Protocol
+
+from tidecli.tide_config import WATCH_DEBOUNCE_MS, WATCH_POLL_MS
+
+# Flags from <sys/inotify.h>
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_Q_OVERFLOW = 0x00004000
+WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+
+_EVENT_HEADER = struct.Struct("iIII")
+"""wd, mask, cookie and name length of an inotify event."""
+
+
+class Watcher(Protocol):
+    """Reports changes of a fixed set of files."""
+
+    def wait(self, timeout: float | None) -> set[Path]:
+        """
+        Wait until some of the files change.
+
+        :param timeout: Seconds to wait, None to wait until a change
+        return: Changed files, empty if the timeout passed without changes
+        """
+        ...
+
+    def close(self) -> None:
+        """Release the resources of the watcher."""
+        ...
+
+
+def _stat(path: Path) -> tuple[int, int] | None:
+    try:
+        stat = path.stat()
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+class PollingWatcher:
+    """Detects changes by comparing modification times and sizes."""
+
+    def __init__(self, paths: Iterable[Path], interval: float = WATCH_POLL_MS / 1000):
+        """
+        Start watching the files.
+
+        :param paths: Files to watch
+        :param interval: Seconds between checks
+        """
+        self.interval = interval
+        self._stats = {path: _stat(path) for path in paths}
+
+    def _changes(self) -> set[Path]:
+        changed = set()
+        for path, previous in self._stats.items():
+            current = _stat(path)
+            if current != previous:
+                self._stats[path] = current
+                changed.add(path)
+        return changed
+
+    def wait(self, timeout: float | None) -> set[Path]:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            changed = self._changes()
+            if changed:
+                return changed
+            if deadline is None:
+                time.sleep(self.interval)
+                continue
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return set()
+            time.sleep(min(self.interval, remaining))
+
+    def close(self) -> None:
+        pass
+
+
+class InotifyWatcher:
+    """Detects changes with Linux inotify events on the folders of the files."""
+
+    def __init__(self, paths: Iterable[Path]):
+        """
+        Start watching the files.
+
+        :param paths: Files to watch
+        :raises OSError: If inotify is not available
+        """
+        self._paths = set(paths)
+        self._names: dict[int, dict[bytes, Path]] = {}
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self._fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno))
+
+        # Folders are watched instead of the files, so that files replaced
+        # by a rename when saved are still seen
+        folders: dict[Path, dict[bytes, Path]] = {}
+        for path in self._paths:
+            folders.setdefault(path.parent, {})[os.fsencode(path.name)] = path
+        for folder, names in folders.items():
+            wd = libc.inotify_add_watch(self._fd, os.fsencode(folder), WATCH_MASK)
+            if wd < 0:
+                errno = ctypes.get_errno()
+                self.close()
+                raise OSError(errno, os.strerror(errno), str(folder))
+            self._names[wd] = names
+
+    def _read_events(self) -> set[Path]:
+        changed: set[Path] = set()
+        try:
+            data = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return changed
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(data):
+            wd, mask, _, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = data[offset : offset + length].rstrip(b"\0")
+            offset += length
+            if mask & IN_Q_OVERFLOW:
+                # Events were lost, any file may have changed
+                return set(self._paths)
+            path = self._names.get(wd, {}).get(name)
+            if path is not None:
+                changed.add(path)
+        return changed
+
+    def wait(self, timeout: float | None) -> set[Path]:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            remaining = (
+                None if deadline is None else max(0.0, deadline - time.monotonic())
+            )
+            readable, _, _ = select.select([self._fd], [], [], remaining)
+            if not readable:
+                return set()
+            changed = self._read_events()
+            if changed:
+                return changed
+
+    def close(self) -> None:
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+
+def create_watcher(paths: Iterable[Path], poll: bool = False) -> Watcher:
+    """
+    Create the most efficient watcher available for the files.
+
+    :param paths: Files to watch
+    :param poll: Use polling even if inotify is available
+    return: Watcher of the files
+    """
+    paths = list(paths)
+    if not poll and sys.platform.startswith("linux"):
+        try:
+            return InotifyWatcher(paths)
+        except (OSError, AttributeError):
+            # AttributeError: the C library has no inotify functions
+            pass
+    return PollingWatcher(paths)
+
+
+def watch_changes(
+    watcher: Watcher, debounce: float = WATCH_DEBOUNCE_MS / 1000
+) -> Iterator[set[Path]]:
+    """
+    Yield batches of changed files.
+
+    Changes are collected until no new change has been seen for the
+    debounce time, so that a file saved several times in a row is reported
+    once.
+
+    :param watcher: Watcher of the files
+    :param debounce: Seconds without changes that end a batch
+    return: Iterator of changed files
+    """
+    while True:
+        changed = watcher.wait(None)
+        while True:
+            more = watcher.wait(debounce)
+            if not more:
+                break
+            changed |= more
+        yield changed
+
+
+def file_digest(path: Path) -> str | None:
+    """
+    Hash the content of the file.
+
+    :param path: File to hash
+    return: Hex digest, or None if the file cannot be read
+    """
+    try:
+        return hashlib.sha256(path.read_bytes()).hexdigest()
+    except OSError:
+        return None
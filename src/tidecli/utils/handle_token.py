@@ -4,9 +4,24 @@ __authors__ = ["Olli-Pekka Riikola, Olli Rutanen, Joni Sinokki"]
 __license__ = "MIT"
 __date__ = "11.5.2024"
 
+import hashlib
+import json
+import threading
+import time
+
 import click
 import keyring as kr
 from tidecli.models.user import User
+from tidecli.tide_config import CACHE_DIR, TOKEN_EXPIRY_MARGIN
+from tidecli.utils.atomic import write_atomic
+from tidecli.utils.profiling import phase, profiled
+
+INTROSPECTION_CACHE = CACHE_DIR / "introspection.json"
+"""File to store the result of the last token validation."""
+
+_signed_in_user: User | None = None
+"""Signed in user read from the keyring, reused for the rest of the process."""
+_signed_in_user_lock = threading.Lock()
 
 
 def save_token(token: str, username: str) -> str | None:
@@ -23,19 +38,24 @@ def save_token(token: str, username: str) -> str | None:
     :param username: The username to save the token for
     """
     try:
-        credentials = kr.get_password("TIDE", "username")
+        with phase("keyring"):
+            credentials = kr.get_password("TIDE", "username")
         if credentials:
             # Remove the old token if it exists to avoid duplicates
             delete_token()
 
-        kr.set_password("TIDE", "username", username)
-        kr.set_password("TIDE", username, token)
+        with phase("keyring"):
+            kr.set_password("TIDE", "username", username)
+            kr.set_password("TIDE", username, token)
+        clear_credential_cache()
+        clear_introspection()
         return None
 
     except Exception as e:
         raise click.ClickException(f"Error saving token: {e}")
 
 
+@profiled("keyring")
 def get_token(username) -> str | None:
     """
     Get the token from the keyring for the user.
@@ -54,6 +74,31 @@ def get_signed_in_user() -> User | None:
     """
     Get the signed in user from the keyring.
 
+    The keyring is read once per process, which can take tens of
+    milliseconds on Linux, and the user is reused until the user logs in or
+    out or TIM rejects the token.
+
+    return: The signed in user username and token
+    """
+    global _signed_in_user
+    with _signed_in_user_lock:
+        if _signed_in_user is None:
+            _signed_in_user = _read_signed_in_user()
+        return _signed_in_user
+
+
+def clear_credential_cache() -> None:
+    """Forget the signed in user, so that it is read from the keyring again."""
+    global _signed_in_user
+    with _signed_in_user_lock:
+        _signed_in_user = None
+
+
+@profiled("keyring")
+def _read_signed_in_user() -> User | None:
+    """
+    Read the signed in user from the keyring.
+
     return: The signed in user username and token
     """
     try:
@@ -82,10 +127,79 @@ def delete_token() -> str | None:
     try:
         user = get_signed_in_user()
         if user:
-            kr.delete_password("TIDE", user.username)
-            kr.delete_password("TIDE", "username")
+            with phase("keyring"):
+                kr.delete_password("TIDE", user.username)
+                kr.delete_password("TIDE", "username")
+            clear_credential_cache()
+            clear_introspection()
             return f"Token for {user.username} deleted successfully."
         else:
             return "User not logged in."
     except Exception as e:
         raise click.ClickException(f"Error deleting token: {e}")
+
+
+def _hash_token(token: str) -> str:
+    """Hash the token so that the token itself is never written to disk."""
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+def save_introspection(token: str, introspection: dict) -> float | None:
+    """
+    Save the token validation result until the token expires.
+
+    :param token: The validated token
+    :param introspection: Response of the token introspection
+    return: Time the token expires as a timestamp, None if not known
+    """
+    exp = introspection.get("exp")
+    if not exp:
+        return None
+    iat = introspection.get("iat")
+    # exp is a timestamp, unless it is smaller than the issue time in which
+    # case it is the remaining lifetime of the token in seconds
+    expires_at = exp if iat is None or exp > iat else time.time() + exp
+
+    cache = {
+        "token": _hash_token(token),
+        "expires_at": expires_at,
+        "introspection": introspection,
+    }
+    try:
+        INTROSPECTION_CACHE.parent.mkdir(parents=True, exist_ok=True)
+        write_atomic(INTROSPECTION_CACHE, json.dumps(cache))
+    except OSError:
+        pass
+    return expires_at
+
+
+def get_cached_introspection(token: str) -> tuple[dict, float] | None:
+    """
+    Get the saved validation result of the token.
+
+    The result is trusted until TOKEN_EXPIRY_MARGIN seconds before the
+    token expires.
+
+    :param token: The token to get the validation for
+    return: Response of the token introspection and the time the token
+        expires as a timestamp, or None if not valid
+    """
+    try:
+        cache = json.loads(INTROSPECTION_CACHE.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+
+    if cache.get("token") != _hash_token(token):
+        return None
+    expires_at = cache.get("expires_at", 0)
+    if time.time() >= expires_at - TOKEN_EXPIRY_MARGIN:
+        return None
+    introspection = cache.get("introspection")
+    if not isinstance(introspection, dict):
+        return None
+    return introspection, expires_at
+
+
+def clear_introspection() -> None:
+    """Forget the saved token validation, forcing validation on next use."""
+    INTROSPECTION_CACHE.unlink(missing_ok=True)
@@ -5,13 +5,25 @@ __license__ = "MIT"
 __date__ = "11.5.2024"
 
 import datetime
+import time
 
 import click
 
-from tidecli.api.oauth_login import authenticate
-from tidecli.api.routes import validate_token
+from tidecli.api.response_cache import is_offline
+from tidecli.api.routes import (
+    TimConnectionError,
+    TimRejectedError,
+    TokenRejectedError,
+    validate_token,
+)
 from tidecli.models.user import User
-from tidecli.utils.handle_token import delete_token, get_signed_in_user
+from tidecli.utils.handle_token import (
+    delete_token,
+    get_cached_introspection,
+    get_signed_in_user,
+    save_introspection,
+)
+from tidecli.utils.profiling import phase
 
 
 def is_logged_in(
@@ -19,6 +31,9 @@ def is_logged_in(
 ) -> bool:
     """
     Check if the user is logged in by checking if the user is in the credential manager.
+
+    The token is validated with TIM only when there is no saved validation
+    result that is still valid.
     """
     # TODO: add json formated prints for vscode
 
@@ -29,23 +44,59 @@ def is_logged_in(
 
         # Validate the token, in case of error in validation,
         # return the error message and ask the user to login again
-        try:
-            token_validity_time = validate_token()
-        except click.ClickException as e:
-            delete_token()
-            if print_errors:
-                click.echo(f"Error: {e}\nPlease, login.")
-            return False
+        with phase("token introspection"):
+            cached = get_cached_introspection(user_login.password)
+            if cached is None and is_offline():
+                # The token cannot be validated offline, cached responses
+                # are only available to the user who fetched them
+                if print_token_info:
+                    click.echo(
+                        "Logged in as "
+                        + user_login.username
+                        + "\nToken cannot be validated in offline mode"
+                    )
+                return True
+            if cached is None:
+                try:
+                    token_validity_time = validate_token()
+                except TimConnectionError:
+                    # The token may still be valid, it is deleted only when
+                    # TIM rejects it
+                    if print_token_info:
+                        click.echo(
+                            "Logged in as "
+                            + user_login.username
+                            + "\nToken cannot be validated, TIM not reachable"
+                        )
+                    return True
+                except (TokenRejectedError, TimRejectedError) as e:
+                    delete_token()
+                    if print_errors:
+                        click.echo(f"Error: {e}\nPlease, login.")
+                    return False
+                except click.ClickException as e:
+                    # The answer was not from TIM, e.g. a proxy login page,
+                    # so the token is kept
+                    if print_errors:
+                        click.echo(f"Error: {e}")
+                    return False
+                expires_at = save_introspection(
+                    user_login.password, token_validity_time
+                )
+            else:
+                token_validity_time, expires_at = cached
 
         # If the token is not expired then return the token validity time
-        expiration_time = token_validity_time.get("exp")
-        if expiration_time:
+        if expires_at and token_validity_time.get("active", True):
             if print_token_info:
+                # The saved validation tells the time left now, not when
+                # the token was validated
+                remaining = round(expires_at - time.time())
                 click.echo(
                     "Logged in as "
                     + user_login.username
                     + "\nToken is still valid for "
-                    + str(datetime.timedelta(seconds=expiration_time))
+                    + str(datetime.timedelta(seconds=remaining))
                 )
             return True
         else:
@@ -62,6 +113,8 @@ def is_logged_in(
 
 
 def login(jsondata: bool = False):
+    from tidecli.api.oauth_login import authenticate
+
     if not jsondata:
         click.echo(f"Logging in...\nPlease, finish authenticating in the browser.")
     if authenticate():
@@ -0,0 +1,105 @@
+"""
+On-disk cache of parsed .timdata files.
+
+Parsing .timdata means decoding the JSON and validating every task with
+pydantic. The validated models are pickled to the cache folder so that
+later commands can load them directly while the .timdata file keeps the
+same size and modification time.
+"""
+
+__authors__ = ["Olli-Pekka Riikola, Olli Rutanen, Joni Sinokki"]
+__license__ = "MIT"
+__date__ = "18.10.2026"
+
+import hashlib
+import os
+import pickle
+from pathlib import Path
+
+import pydantic
+
+from tidecli.models.task_data import TideCourseData
+from tidecli.tide_config import CACHE_DIR, METADATA_CACHE_ENABLED
+from tidecli.utils.atomic import open_atomic
+
+METADATA_CACHE_DIR = CACHE_DIR / "metadata"
+
+# Increase when the models change so that old cache files are not used
+FORMAT_VERSION = 1
+
+
+def _cache_path(metadata_path: Path) -> Path:
+    key = hashlib.sha256(str(metadata_path.absolute()).encode("utf-8")).hexdigest()
+    return METADATA_CACHE_DIR / f"{key}.pickle"
+
+
+def _header(metadata_path: Path, stat: os.stat_result) -> tuple:
+    return (
+        FORMAT_VERSION,
+        pydantic.VERSION,
+        str(metadata_path.absolute()),
+        stat.st_mtime_ns,
+        stat.st_size,
+    )
+
+
+def load_cached_metadata(
+    metadata_path: Path, stat: os.stat_result
+) -> TideCourseData | None:
+    """
+    Load the parsed metadata if it was cached for the same file contents.
+
+    :param metadata_path: Path to the .timdata file
+    :param stat: Current stat result of the .timdata file
+    return: Parsed metadata, or None if it is not cached or is out of date
+    """
+    if not METADATA_CACHE_ENABLED:
+        return None
+    try:
+        with open(_cache_path(metadata_path), "rb") as file:
+            if pickle.load(file) != _header(metadata_path, stat):
+                return None
+            metadata = pickle.load(file)
+    except Exception:
+        # Missing, partial or incompatible cache files are parsed again
+        return None
+    return metadata if isinstance(metadata, TideCourseData) else None
+
+
+def save_cached_metadata(
+    metadata_path: Path, stat: os.stat_result, metadata: TideCourseData
+) -> None:
+    """
+    Cache the parsed metadata of the file.
+
+    Failing to write the cache is ignored, it only makes the next load slower.
+
+    :param metadata_path: Path to the .timdata file
+    :param stat: Stat result of the .timdata file the metadata was parsed from
+    :param metadata: Parsed metadata
+    """
+    if not METADATA_CACHE_ENABLED:
+        return
+    cache_path = _cache_path(metadata_path)
+    try:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        with open_atomic(cache_path) as file:
+            pickle.dump(_header(metadata_path, stat), file, pickle.HIGHEST_PROTOCOL)
+            pickle.dump(metadata, file, pickle.HIGHEST_PROTOCOL)
+    except Exception:
+        pass
+
+
+def clear_metadata_cache() -> int:
+    """
+    Remove all cached metadata.
+
+    return: Number of removed files
+    """
+    if not METADATA_CACHE_DIR.exists():
+        return 0
+    removed = 0
+    for cache_file in METADATA_CACHE_DIR.glob("*.pickle"):
+        cache_file.unlink(missing_ok=True)
+        removed += 1
+    return removed
@@ -0,0 +1,179 @@
+"""
+Path index over the tasks and files in .timdata.
+
+The index maps absolute task directories and file paths to their metadata,
+so that finding the task or files of a path takes time proportional to the
+depth of the path instead of the size of the whole course.
+"""
+
+__authors__ = ["Olli-Pekka Riikola, Olli Rutanen, Joni Sinokki"]
+__license__ = "MIT"
+__date__ = "18.10.2026"
+
+from collections import defaultdict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterator
+
+from tidecli.models.task_data import TaskData, TaskFile, TideCourseData
+
+
+@dataclass
+class FileEntry:
+    """A task file and the task it belongs to."""
+
+    order: int
+    """Position of the file in .timdata, used to keep the original order."""
+
+    task: TaskData
+    """Task the file belongs to."""
+
+    task_file: TaskFile
+    """Metadata of the file."""
+
+    path: Path
+    """Absolute path of the file."""
+
+
+@dataclass
+class MetadataIndex:
+    """Lookup tables from absolute paths to tasks and task files."""
+
+    files: dict[Path, list[FileEntry]] = field(default_factory=dict)
+    """Task files by absolute file path."""
+
+    files_by_dir: dict[Path, list[FileEntry]] = field(default_factory=dict)
+    """Task files by the absolute directory directly containing them."""
+
+    tasks_by_dir: dict[Path, list[tuple[int, TaskData]]] = field(default_factory=dict)
+    """Tasks with their position in .timdata by absolute task directory."""
+
+    subdirs: dict[Path, set[Path]] = field(default_factory=dict)
+    """Child directories of every directory containing task files."""
+
+    @classmethod
+    def build(cls, metadata: TideCourseData, metadata_dir: Path) -> "MetadataIndex":
+        """
+        Build the index of the metadata.
+
+        :param metadata: Course metadata
+        :param metadata_dir: Directory of the .timdata file
+        return: Index of the metadata
+        """
+        index = cls()
+        files = defaultdict(list)
+        files_by_dir = defaultdict(list)
+        tasks_by_dir = defaultdict(list)
+        metadata_dir = metadata_dir.absolute()
+        order = 0
+
+        for course_part in metadata.course_parts.values():
+            for task in course_part.tasks.values():
+                task_dir = (metadata_dir / task.get_task_directory()).absolute()
+                tasks_by_dir[task_dir].append((order, task))
+                order += 1
+
+                for task_file in task.task_files:
+                    file_task_dir = (
+                        task_file.task_directory
+                        if task_file.task_directory is not None
+                        else task.get_task_directory()
+                    )
+                    file_path = (
+                        metadata_dir / file_task_dir / task_file.file_name
+                    ).absolute()
+                    entry = FileEntry(order, task, task_file, file_path)
+                    order += 1
+
+                    files[file_path].append(entry)
+                    files_by_dir[file_path.parent].append(entry)
+                    index._add_dir(file_path.parent)
+
+        index.files = dict(files)
+        index.files_by_dir = dict(files_by_dir)
+        index.tasks_by_dir = dict(tasks_by_dir)
+        return index
+
+    def _add_dir(self, directory: Path) -> None:
+        """Link the directory to its parents up to an already known one."""
+        while directory != directory.parent:
+            siblings = self.subdirs.setdefault(directory.parent, set())
+            if directory in siblings:
+                return
+            siblings.add(directory)
+            directory = directory.parent
+
+    def find_task(self, path: Path) -> TaskData | None:
+        """
+        Find the task whose directory is the path or one of its parents.
+
+        If several tasks match, the one first in .timdata is returned.
+
+        :param path: Path inside a task directory
+        return: Task, or None if the path is not inside any task
+        """
+        path = path.absolute()
+        matches = [
+            match
+            for directory in (path, *path.parents)
+            for match in self.tasks_by_dir.get(directory, [])
+        ]
+        if not matches:
+            return None
+        return min(matches, key=lambda match: match[0])[1]
+
+    def find_file(self, file_path: Path) -> list[FileEntry]:
+        """
+        Find the task files saved at the path.
+
+        :param file_path: Path of a task file
+        return: Matching entries in .timdata order
+        """
+        return list(self.files.get(file_path.absolute(), []))
+
+    def find_files_under(self, directory: Path) -> list[FileEntry]:
+        """
+        Find the task files in the directory or any of its subdirectories.
+
+        :param directory: Directory to search
+        return: Matching entries in .timdata order
+        """
+        entries = [
+            entry
+            for subdir in self._walk(directory.absolute())
+            for entry in self.files_by_dir.get(subdir, [])
+        ]
+        return sorted(entries, key=lambda entry: entry.order)
+
+    def _walk(self, directory: Path) -> Iterator[Path]:
+        """Iterate over the directory and its known subdirectories."""
+        stack = [directory]
+        while stack:
+            current = stack.pop()
+            yield current
+            stack.extend(self.subdirs.get(current, ()))
+
+
+_index_cache: dict[Path, tuple[TideCourseData, MetadataIndex]] = {}
+"""Latest index of each metadata directory with the metadata it was built of."""
+
+
+def get_metadata_index(metadata: TideCourseData, metadata_dir: Path) -> MetadataIndex:
+    """
+    Get the index of the metadata, building it if needed.
+
+    The index is reused as long as the same parsed metadata object is used,
+    i.e. until .timdata changes on disk and is loaded again.
+
+    :param metadata: Course metadata
+    :param metadata_dir: Directory of the .timdata file
+    return: Index of the metadata
+    """
+    key = metadata_dir.absolute()
+    cached = _index_cache.get(key)
+    if cached is not None and cached[0] is metadata:
+        return cached[1]
+
+    index = MetadataIndex.build(metadata, metadata_dir)
+    _index_cache[key] = (metadata, index)
+    return index
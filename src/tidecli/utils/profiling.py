@@ -0,0 +1,147 @@
+"""
+Timing of the phases of a command.
+
+Code that may be slow is wrapped in a named phase, for example keyring
+access, HTTP requests or disk writes. When profiling is enabled with the
+--profile option or the TIDECLI_PROFILE environment variable, the time
+spent in every phase is recorded and a summary is printed when the command
+exits. When profiling is disabled, phases only check a flag.
+"""
+
+__authors__ = ["Olli-Pekka Riikola, Olli Rutanen, Joni Sinokki"]
+__license__ = "MIT"
+__date__ = "18.10.2026"
+
+import functools
+import json
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Iterator, TypeVar
+
+F = TypeVar("F", bound=Callable)
+
+PROFILE_FORMATS = ("table", "json")
+"""Formats in which the summary can be printed."""
+
+_enabled = False
+_started = 0.0
+_phases: dict[str, list[float]] = {}
+"""Number of calls and total seconds of every phase."""
+_lock = threading.Lock()
+
+
+def enable() -> None:
+    """Start recording phases, forgetting earlier records."""
+    global _enabled, _started
+    with _lock:
+        _phases.clear()
+        _started = time.perf_counter()
+        _enabled = True
+
+
+def disable() -> None:
+    """Stop recording phases."""
+    global _enabled
+    _enabled = False
+
+
+def is_enabled() -> bool:
+    """Check if phases are recorded."""
+    return _enabled
+
+
+def record(name: str, seconds: float) -> None:
+    """
+    Add a measured duration to a phase.
+
+    :param name: Name of the phase
+    :param seconds: Duration of one call of the phase
+    """
+    with _lock:
+        stats = _phases.setdefault(name, [0, 0.0])
+        stats[0] += 1
+        stats[1] += seconds
+
+
+@contextmanager
+def phase(name: str) -> Iterator[None]:
+    """
+    Time the code in the with block as the named phase.
+
+    :param name: Name of the phase
+    """
+    if not _enabled:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(name, time.perf_counter() - start)
+
+
+def profiled(name: str) -> Callable[[F], F]:
+    """
+    Time every call of the decorated function as the named phase.
+
+    :param name: Name of the phase
+    """
+
+    def decorator(func: F) -> F:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                record(name, time.perf_counter() - start)
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorator
+
+
+def summary() -> dict:
+    """
+    Summarize the recorded phases.
+
+    Phases may be nested and may run in several threads at once, so the
+    total time of the phases can be more than the wall time.
+
+    return: Wall time since profiling was enabled and the number of calls
+        and total time of every phase, slowest phase first
+    """
+    with _lock:
+        phases = sorted(_phases.items(), key=lambda item: item[1][1], reverse=True)
+        wall = time.perf_counter() - _started
+    return {
+        "wall_ms": round(wall * 1000, 3),
+        "phases": {
+            name: {"calls": calls, "total_ms": round(seconds * 1000, 3)}
+            for name, (calls, seconds) in phases
+        },
+    }
+
+
+def format_summary(data: dict, output_format: str = "table") -> str:
+    """
+    Format a summary for printing.
+
+    :param data: Summary returned by summary()
+    :param output_format: "table" or "json"
+    return: Formatted summary
+    """
+    if output_format == "json":
+        return json.dumps(data)
+
+    lines = [f"{'Phase':<20} {'Calls':>6} {'Total ms':>10} {'Mean ms':>9}"]
+    for name, stats in data["phases"].items():
+        mean = stats["total_ms"] / stats["calls"]
+        lines.append(
+            f"{name:<20} {stats['calls']:>6} {stats['total_ms']:>10.1f} {mean:>9.2f}"
+        )
+    lines.append(f"{'Wall time':<20} {'':>6} {data['wall_ms']:>10.1f}")
+    return "\n".join(lines)
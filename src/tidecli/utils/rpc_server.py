@@ -0,0 +1,279 @@
+"""
+JSON-RPC server for IDE integrations.
+
+The server reads JSON-RPC 2.0 requests from standard input, one request
+per line, runs the matching CLI command in the same process and writes
+one response per line to standard output. Keeping the process alive
+keeps the HTTP connection pool, token validation and parsed .timdata
+files warm between calls.
+
+Params can be given either as a list of command line arguments, or as an
+object whose keys are the parameter names of the command, e.g.
+{"demo_path": "kurssit/Demo1", "all_tasks": true}. An object may also
+contain "cwd" to run the command in another directory.
+"""
+
+__authors__ = ["Olli-Pekka Riikola, Olli Rutanen, Joni Sinokki"]
+__license__ = "MIT"
+__date__ = "18.10.2026"
+
+import io
+import json
+import os
+import sys
+import threading
+from contextlib import redirect_stderr, redirect_stdout
+from typing import IO, Any
+
+import click
+
+METHODS = {
+    "check_login": ("check-login",),
+    "courses": ("courses",),
+    "task.list": ("task", "list"),
+    "task.create": ("task", "create"),
+    "task.reset": ("task", "reset"),
+    "task.info": ("task", "info"),
+    "task.points": ("task", "points"),
+    "course.create": ("course", "create"),
+    "submit": ("submit",),
+    "queue.list": ("queue", "list"),
+    "queue.flush": ("queue", "flush"),
+}
+"""JSON-RPC method names and the command paths they run."""
+
+PARSE_ERROR = -32700
+INVALID_REQUEST = -32600
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+COMMAND_FAILED = -32000
+
+command_lock = threading.Lock()
+"""Held while a command runs with the output of the process captured."""
+
+
+class RpcError(Exception):
+    """Error returned to the client as a JSON-RPC error object."""
+
+    def __init__(self, code: int, message: str, data: Any = None):
+        super().__init__(message)
+        self.code = code
+        self.message = message
+        self.data = data
+
+
+def find_command(group: click.Group, method: str) -> click.Command:
+    """
+    Find the command that the method runs.
+
+    :param group: Main command group of the CLI
+    :param method: JSON-RPC method name
+    return: Click command
+    """
+    path = METHODS.get(method)
+    if path is None:
+        raise RpcError(METHOD_NOT_FOUND, f"Method not found: {method}")
+
+    command: click.Command = group
+    for name in path:
+        if not isinstance(command, click.Group) or name not in command.commands:
+            raise RpcError(METHOD_NOT_FOUND, f"Method not found: {method}")
+        command = command.commands[name]
+    return command
+
+
+def options_to_args(command: click.Command, params: dict[str, Any]) -> list[str]:
+    """
+    Convert named params to command line options of the command.
+
+    Params of positional arguments are ignored.
+
+    :param command: Click command
+    :param params: Params keyed by command parameter name
+    return: Command line options
+    """
+    options: list[str] = []
+    for param in command.params:
+        if not isinstance(param, click.Option) or params.get(param.name) is None:
+            continue
+        value = params[param.name]
+        if param.is_flag:
+            if value:
+                options.append(param.opts[0])
+        else:
+            options.extend([param.opts[0], str(value)])
+    return options
+
+
+def params_to_args(command: click.Command, params: dict[str, Any]) -> list[str]:
+    """
+    Convert named params to command line arguments of the command.
+
+    :param command: Click command
+    :param params: Params keyed by command parameter name
+    return: Command line arguments
+    """
+    known = {p.name for p in command.params}
+    unknown = set(params) - known
+    if unknown:
+        raise RpcError(INVALID_PARAMS, f"Unknown params: {', '.join(sorted(unknown))}")
+
+    positional = [
+        str(params[param.name])
+        for param in command.params
+        if isinstance(param, click.Argument) and params.get(param.name) is not None
+    ]
+    return options_to_args(command, params) + ["--"] + positional
+
+
+def run_command(command: click.Command, args: list[str]) -> dict[str, Any]:
+    """
+    Run the command and capture its output.
+
+    Standard output and error output of the whole process are redirected
+    while the command runs, so command_lock is held meanwhile.
+
+    :param command: Click command
+    :param args: Command line arguments
+    return: Exit code, standard output, error output and parsed JSON output
+    """
+    out_buffer, err_buffer = io.BytesIO(), io.BytesIO()
+    out = io.TextIOWrapper(out_buffer, encoding="utf-8")
+    err = io.TextIOWrapper(err_buffer, encoding="utf-8")
+    exit_code = 0
+
+    with command_lock, redirect_stdout(out), redirect_stderr(err):
+        try:
+            command.main(args=args, prog_name=command.name, standalone_mode=False)
+        except click.ClickException as e:
+            e.show()
+            exit_code = e.exit_code
+        except click.exceptions.Exit as e:
+            exit_code = e.exit_code
+        except click.Abort:
+            exit_code = 1
+        except SystemExit as e:
+            exit_code = e.code if isinstance(e.code, int) else 1
+
+    out.flush()
+    err.flush()
+    output = out_buffer.getvalue().decode("utf-8")
+    errors = err_buffer.getvalue().decode("utf-8")
+
+    try:
+        data = json.loads(output) if output.strip() else None
+    except ValueError:
+        data = None
+
+    return {"exit_code": exit_code, "output": output, "errors": errors, "data": data}
+
+
+def handle_request(
+    group: click.Group, request: Any, options: list[str] | None = None
+) -> Any:
+    """
+    Run a single JSON-RPC request.
+
+    The command is run through the main command group, so that its options
+    and the setup and cleanup of every command apply.
+
+    :param group: Main command group of the CLI
+    :param request: Decoded JSON-RPC request
+    :param options: Options of the main command group
+    return: Result of the request
+    """
+    if not isinstance(request, dict) or not isinstance(request.get("method"), str):
+        raise RpcError(INVALID_REQUEST, "Invalid request")
+
+    command = find_command(group, request["method"])
+    params = request.get("params", [])
+    cwd = None
+    if isinstance(params, dict):
+        params = dict(params)
+        cwd = params.pop("cwd", None)
+        args = params_to_args(command, params)
+    elif isinstance(params, list) and all(isinstance(p, str) for p in params):
+        args = params
+    else:
+        raise RpcError(INVALID_PARAMS, "Params must be a list of strings or an object")
+
+    previous_cwd = os.getcwd()
+    try:
+        if cwd is not None:
+            os.chdir(cwd)
+        result = run_command(
+            group, [*(options or []), *METHODS[request["method"]], *args]
+        )
+    except OSError as e:
+        raise RpcError(INVALID_PARAMS, f"Invalid cwd: {e}")
+    finally:
+        os.chdir(previous_cwd)
+
+    if result["exit_code"] != 0:
+        message = result["errors"].strip().splitlines()
+        raise RpcError(
+            COMMAND_FAILED,
+            message[-1] if message else "Command failed",
+            result,
+        )
+    return result
+
+
+def _response(request_id: Any, result: Any = None, error: RpcError | None = None):
+    response: dict[str, Any] = {"jsonrpc": "2.0", "id": request_id}
+    if error is not None:
+        response["error"] = {"code": error.code, "message": error.message}
+        if error.data is not None:
+            response["error"]["data"] = error.data
+    else:
+        response["result"] = result
+    return response
+
+
+def serve(
+    group: click.Group,
+    stdin: IO[str] | None = None,
+    stdout: IO[str] | None = None,
+    options: list[str] | None = None,
+) -> None:
+    """
+    Serve JSON-RPC requests until the input ends or shutdown is called.
+
+    :param group: Main command group of the CLI
+    :param stdin: Stream to read requests from, defaults to standard input
+    :param stdout: Stream to write responses to, defaults to standard output
+    :param options: Options of the main command group given to every command
+    """
+    stdin = stdin or sys.stdin
+    stdout = stdout or sys.stdout
+
+    for line in stdin:
+        if not line.strip():
+            continue
+
+        request_id = None
+        try:
+            request = json.loads(line)
+        except ValueError:
+            response = _response(None, error=RpcError(PARSE_ERROR, "Parse error"))
+        else:
+            request_id = request.get("id") if isinstance(request, dict) else None
+            if isinstance(request, dict) and request.get("method") == "shutdown":
+                stdout.write(json.dumps(_response(request_id)) + "\n")
+                stdout.flush()
+                return
+            try:
+                response = _response(
+                    request_id, handle_request(group, request, options)
+                )
+            except RpcError as e:
+                response = _response(request_id, error=e)
+            except Exception as e:
+                response = _response(request_id, error=RpcError(COMMAND_FAILED, str(e)))
+
+            # Requests without an id are notifications and get no response
+            if isinstance(request, dict) and "id" not in request:
+                continue
+
+        stdout.write(json.dumps(response, ensure_ascii=False) + "\n")
+        stdout.flush()
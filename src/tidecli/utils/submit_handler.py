@@ -0,0 +1,145 @@
+"""Module for submitting answer files to TIM."""
+
+__authors__ = ["Olli-Pekka Riikola, Olli Rutanen, Joni Sinokki"]
+__license__ = "MIT"
+__date__ = "18.10.2026"
+
+import hashlib
+import json
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Callable
+
+import click
+
+from tidecli.api.routes import submit_task
+from tidecli.models.submit_data import SubmitData
+from tidecli.models.task_data import TaskFile
+from tidecli.models.tim_feedback import TimFeedback
+from tidecli.tide_config import SUBMIT_WORKERS
+from tidecli.utils.atomic import write_atomic
+
+SubmitResult = TimFeedback | Exception
+"""Feedback from TIM, or the error that prevented the submit."""
+
+SUBMITTED_HASHES_NAME = ".timdata-submitted"
+"""File next to .timdata storing hashes of the last accepted answers."""
+
+
+def submit_file(task_file: TaskFile) -> TimFeedback:
+    """
+    Submit a single answer file.
+
+    :param task_file: Answer file with the user answer as content
+    return: Feedback from TIM
+    :raises click.ClickException: If the task type of the file is not known
+    """
+    if task_file.task_type is None:
+        # TIM needs the language to run the answer
+        raise click.ClickException(
+            f"Task type of {task_file.file_name} is not known, "
+            "create the task again and copy your answer to it."
+        )
+    submit_data = SubmitData(code_files=[task_file], code_language=task_file.task_type)
+    return submit_task(submit_data)
+
+
+def submit_files(
+    task_files: list[TaskFile],
+    workers: int = SUBMIT_WORKERS,
+    on_complete: Callable[[int, TaskFile, SubmitResult], None] | None = None,
+) -> list[SubmitResult]:
+    """
+    Submit answer files concurrently.
+
+    A failed submit does not stop the others. on_complete is called in the
+    calling thread as soon as each submit finishes, while the returned
+    results are always in the same order as task_files.
+
+    :param task_files: Answer files to submit
+    :param workers: Maximum number of concurrent submits
+    :param on_complete: Callback with the index, file and result of a submit
+    return: Feedback or error for each file
+    """
+    results: list[SubmitResult | None] = [None] * len(task_files)
+    if not task_files:
+        return []
+
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(task_files)))) as pool:
+        futures = {
+            pool.submit(submit_file, task_file): index
+            for index, task_file in enumerate(task_files)
+        }
+        for future in as_completed(futures):
+            index = futures[future]
+            try:
+                result: SubmitResult = future.result()
+            except Exception as e:
+                result = e
+            results[index] = result
+            if on_complete is not None:
+                on_complete(index, task_files[index], result)
+
+    return [r for r in results if r is not None]
+
+
+def answer_key(task_file: TaskFile) -> str:
+    """Return the key identifying the answer file in the hash store."""
+    return f"{task_file.task_id_ext}/{task_file.file_name}"
+
+
+def answer_hash(task_file: TaskFile) -> str:
+    """
+    Hash everything that is sent to TIM when the file is submitted.
+
+    :param task_file: Answer file with the user answer as content
+    return: Hex digest of the submitted data
+    """
+    data = json.dumps(
+        [task_file.to_json(), task_file.task_type], sort_keys=True, ensure_ascii=False
+    )
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+
+def load_submitted_hashes(metadata_dir: Path) -> dict[str, str]:
+    """
+    Load hashes of the last accepted answers.
+
+    :param metadata_dir: Directory containing the .timdata file
+    return: Hashes keyed by answer_key
+    """
+    try:
+        with open(metadata_dir / SUBMITTED_HASHES_NAME, "r", encoding="utf-8") as file:
+            hashes = json.load(file)
+    except (OSError, ValueError):
+        return {}
+    return hashes if isinstance(hashes, dict) else {}
+
+
+def save_submitted_hashes(metadata_dir: Path, hashes: dict[str, str]) -> None:
+    """
+    Save hashes of the last accepted answers.
+
+    :param metadata_dir: Directory containing the .timdata file
+    :param hashes: Hashes keyed by answer_key
+    """
+    write_atomic(metadata_dir / SUBMITTED_HASHES_NAME, json.dumps(hashes, indent=4))
+
+
+def is_unchanged(task_file: TaskFile, hashes: dict[str, str]) -> bool:
+    """Check if the answer is the same as the last accepted one."""
+    return hashes.get(answer_key(task_file)) == answer_hash(task_file)
+
+
+def record_submit(
+    task_file: TaskFile, result: SubmitResult, hashes: dict[str, str]
+) -> None:
+    """
+    Remember the answer if TIM accepted it.
+
+    :param task_file: Submitted answer file
+    :param result: Feedback or error of the submit
+    :param hashes: Hashes keyed by answer_key, updated in place
+    """
+    if isinstance(result, TimFeedback) and result.valid:
+        hashes[answer_key(task_file)] = answer_hash(task_file)
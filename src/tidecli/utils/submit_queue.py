@@ -0,0 +1,290 @@
+"""
+Durable queue of submits that could not be sent to TIM.
+
+When TIM cannot be reached or fails to process a submit, the answer is
+written to the queue folder together with the time it was queued. Only
+the latest answer of each answer file is kept: queueing a file again, or
+submitting it successfully, replaces the earlier answer.
+
+Queued submits are sent in the order they were queued by `tide queue
+flush`, and periodically while `tide serve` is running.
+"""
+
+__authors__ = ["Olli-Pekka Riikola, Olli Rutanen, Joni Sinokki"]
+__license__ = "MIT"
+__date__ = "18.10.2026"
+
+import hashlib
+import json
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable
+
+import click
+
+from tidecli.api import response_cache
+from tidecli.api.retry import RetryPolicy, get_default_policy
+from tidecli.api.routes import TimConnectionError, TimRejectedError
+from tidecli.models.task_data import TaskFile
+from tidecli.models.tim_feedback import TimFeedback
+from tidecli.tide_config import SUBMIT_QUEUE_DIR, SUBMIT_QUEUE_FLUSH_INTERVAL
+from tidecli.utils.atomic import write_atomic
+from tidecli.utils.error_logger import get_logger
+from tidecli.utils.handle_token import get_signed_in_user
+from tidecli.utils.login_handler import is_logged_in
+from tidecli.utils.submit_handler import (
+    SubmitResult,
+    answer_key,
+    load_submitted_hashes,
+    record_submit,
+    save_submitted_hashes,
+    submit_file,
+)
+
+# Increase when the format of the queue files changes
+FORMAT_VERSION = 1
+
+_flush_lock = threading.Lock()
+
+
+class AnswerMaybeSavedError(click.ClickException):
+    """A queued answer was sent, but TIM did not tell if it was saved."""
+
+
+@dataclass
+class QueuedSubmit:
+    """Answer waiting to be submitted."""
+
+    path: Path
+    """File of the queue entry."""
+
+    queued_at: float
+    """Time the answer was queued as a timestamp."""
+
+    username: str
+    """User who submitted the answer."""
+
+    task_file: TaskFile
+    """Answer file with the user answer as content."""
+
+    metadata_dir: Path | None
+    """Directory of the .timdata file of the task, if known."""
+
+
+def _entry_path(username: str, task_file: TaskFile) -> Path:
+    key = f"{username}/{answer_key(task_file)}"
+    return SUBMIT_QUEUE_DIR / f"{hashlib.sha256(key.encode('utf-8')).hexdigest()}.json"
+
+
+def enqueue(
+    task_file: TaskFile, username: str, metadata_dir: Path | None = None
+) -> QueuedSubmit:
+    """
+    Queue an answer to be submitted later.
+
+    An earlier queued answer of the same file is replaced.
+
+    :param task_file: Answer file with the user answer as content
+    :param username: User who submitted the answer
+    :param metadata_dir: Directory of the .timdata file, whose submit hashes
+        are updated when the answer is accepted
+    return: The queued submit
+    """
+    entry = QueuedSubmit(
+        _entry_path(username, task_file),
+        time.time(),
+        username,
+        task_file,
+        metadata_dir,
+    )
+    SUBMIT_QUEUE_DIR.mkdir(parents=True, exist_ok=True)
+    write_atomic(
+        entry.path,
+        json.dumps(
+            {
+                "version": FORMAT_VERSION,
+                "queued_at": entry.queued_at,
+                "username": username,
+                "task_file": task_file.model_dump(),
+                "metadata_dir": str(metadata_dir) if metadata_dir else None,
+            },
+            ensure_ascii=False,
+        ),
+    )
+    return entry
+
+
+def _load(path: Path) -> QueuedSubmit | None:
+    try:
+        entry = json.loads(path.read_text(encoding="utf-8"))
+        if entry["version"] != FORMAT_VERSION:
+            return None
+        return QueuedSubmit(
+            path,
+            float(entry["queued_at"]),
+            entry["username"],
+            TaskFile(**entry["task_file"]),
+            Path(entry["metadata_dir"]) if entry["metadata_dir"] else None,
+        )
+    except Exception:
+        # Partially written or unreadable entries are skipped
+        return None
+
+
+def queued_submits(username: str) -> list[QueuedSubmit]:
+    """
+    Get the queued answers of the user.
+
+    :param username: User whose answers are returned
+    return: Queued answers, oldest first
+    """
+    if not SUBMIT_QUEUE_DIR.exists():
+        return []
+    entries = [_load(path) for path in SUBMIT_QUEUE_DIR.glob("*.json")]
+    return sorted(
+        (e for e in entries if e is not None and e.username == username),
+        key=lambda e: e.queued_at,
+    )
+
+
+def discard(task_file: TaskFile, username: str) -> None:
+    """
+    Remove the queued answer of the file, after a newer answer was submitted.
+
+    :param task_file: Submitted answer file
+    :param username: User who submitted the answer
+    """
+    _entry_path(username, task_file).unlink(missing_ok=True)
+
+
+def _remove(entry: QueuedSubmit) -> None:
+    # The entry is left in place if a newer answer has replaced it
+    current = _load(entry.path)
+    if current is not None and current.queued_at == entry.queued_at:
+        entry.path.unlink(missing_ok=True)
+
+
+def _record_accepted(entry: QueuedSubmit, result: SubmitResult) -> None:
+    if entry.metadata_dir is None or not entry.metadata_dir.is_dir():
+        return
+    hashes = load_submitted_hashes(entry.metadata_dir)
+    previous_hashes = dict(hashes)
+    record_submit(entry.task_file, result, hashes)
+    if hashes != previous_hashes:
+        try:
+            save_submitted_hashes(entry.metadata_dir, hashes)
+        except OSError:
+            pass
+
+
+def flush_queue(
+    username: str,
+    policy: RetryPolicy | None = None,
+    on_result: Callable[[QueuedSubmit, SubmitResult], None] | None = None,
+) -> list[QueuedSubmit]:
+    """
+    Submit the queued answers of the user in the order they were queued.
+
+    An answer that fails because the connection to TIM cannot be opened is
+    retried with backoff. If it still fails, flushing stops so that the
+    answers are sent in order later. An answer is removed from the queue
+    only after TIM has answered it, either with feedback or by rejecting it.
+    Other errors, such as a rejected token, stop flushing and keep the
+    answers in the queue. An answer that was sent but timed out or failed
+    with a server error may already be saved, so it is not sent again.
+
+    :param username: User whose answers are submitted
+    :param policy: Retries and delays, defaults to the default policy
+    :param on_result: Called with each submitted answer and its result
+    return: Answers still in the queue
+    :raises AnswerMaybeSavedError: If TIM may have saved an answer without
+        answering it
+    :raises click.ClickException: If an answer could not be submitted for
+        another reason than TIM not being reachable
+    """
+    policy = policy or get_default_policy()
+    with _flush_lock:
+        entries = queued_submits(username)
+        if response_cache.is_offline():
+            return entries
+        for index, entry in enumerate(entries):
+            attempt = 0
+            while True:
+                try:
+                    result: SubmitResult = submit_file(entry.task_file)
+                except TimConnectionError as e:
+                    if e.request_sent:
+                        raise AnswerMaybeSavedError(
+                            f"{e.format_message()}\n"
+                            f"The answer {entry.task_file.file_name} may "
+                            "already have been saved in TIM, it is kept in the "
+                            "queue."
+                        ) from e
+                    delay = policy.delay(attempt)
+                    if attempt >= policy.retries or delay is None:
+                        return entries[index:]
+                    policy.sleep(delay)
+                    attempt += 1
+                    continue
+                except TimRejectedError as e:
+                    result = e
+                break
+
+            _remove(entry)
+            if isinstance(result, TimFeedback):
+                _record_accepted(entry, result)
+            if on_result is not None:
+                on_result(entry, result)
+        return []
+
+
+def _flush_signed_in_user() -> None:
+    try:
+        user = get_signed_in_user()
+        if not user or not queued_submits(user.username):
+            return
+        # An expired token would make TIM reject every answer
+        if is_logged_in(print_errors=False):
+            flush_queue(user.username)
+    except AnswerMaybeSavedError:
+        raise
+    except Exception as e:
+        # The answers stay in the queue for the next attempt
+        get_logger().debug("Flushing the submit queue failed: %s", e)
+
+
+def start_background_flush(
+    interval: float = SUBMIT_QUEUE_FLUSH_INTERVAL,
+    lock: "threading.Lock | None" = None,
+) -> threading.Event:
+    """
+    Submit queued answers of the signed in user periodically in a thread.
+
+    Nothing is printed, answers that cannot be sent stay in the queue.
+    Flushing stops for good if TIM may have saved an answer without
+    answering, the answer is sent again only by `tide queue flush`.
+
+    :param interval: Seconds between attempts, 0 to not start the thread
+    :param lock: Held while a command runs, an attempt is skipped if it is
+        taken. It is not held while flushing, so commands are not blocked by
+        submits that wait for TIM
+    return: Event that stops the thread when set
+    """
+    stop = threading.Event()
+    if interval <= 0:
+        return stop
+
+    def run() -> None:
+        while not stop.wait(interval):
+            if lock is not None and lock.locked():
+                continue
+            try:
+                _flush_signed_in_user()
+            except AnswerMaybeSavedError as e:
+                get_logger().debug("Stopped flushing the submit queue: %s", e)
+                return
+
+    threading.Thread(target=run, name="tide-queue-flush", daemon=True).start()
+    return stop
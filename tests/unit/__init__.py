@@ -1 +1,6 @@
+import os
+import tempfile
 
+# Keep files cached during the tests out of the user's own cache folder
+os.environ["TIDECLI_CACHE_DIR"] = tempfile.mkdtemp(prefix="tidecli-test-cache-")
+os.environ["TIDECLI_SUBMIT_QUEUE_DIR"] = tempfile.mkdtemp(prefix="tidecli-test-queue-")
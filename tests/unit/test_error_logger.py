@@ -0,0 +1,87 @@
+import logging
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from tidecli.utils.error_logger import LazyJoin, Logger, get_logger
+
+
+class _Counted:
+    """Counts how many times it is formatted."""
+
+    def __init__(self):
+        self.formatted = 0
+
+    def __str__(self):
+        self.formatted += 1
+        return "counted"
+
+
+class TestLogger(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = Path(tempfile.mkdtemp())
+        self.log_file = self.tmp_dir / "tide-cli.log"
+        self.root_level = logging.getLogger().level
+        self.tidecli_level = logging.getLogger("tidecli").level
+
+    def tearDown(self):
+        logging.getLogger().setLevel(self.root_level)
+        logging.getLogger("tidecli").setLevel(self.tidecli_level)
+        shutil.rmtree(self.tmp_dir)
+
+    def _logger(self, level: int) -> Logger:
+        with patch("tidecli.utils.error_logger.LOG_LEVEL", level), patch(
+            "tidecli.utils.error_logger.LOG_FILE", str(self.log_file)
+        ):
+            logger = Logger()
+        self.addCleanup(logger.close)
+        return logger
+
+    def test_shared_logger(self):
+        """
+        The same logger is used by the whole process
+        """
+        self.assertIs(get_logger(), get_logger())
+
+    def test_disabled_messages_not_formatted(self):
+        """
+        Messages below the level are neither formatted nor written
+        """
+        logger = self._logger(logging.CRITICAL)
+        counted = _Counted()
+
+        logger.debug("value: %s", counted)
+        logger.info("%s", LazyJoin(["a", "b"]))
+        logger.close()
+
+        self.assertEqual(counted.formatted, 0)
+        self.assertFalse(self.log_file.exists())
+
+    def test_messages_written(self):
+        """
+        Enabled messages are written to the log file by the logging thread
+        """
+        logger = self._logger(logging.DEBUG)
+
+        logger.debug("Text in the gap: \n%s", LazyJoin(["first", "second"]))
+        logger.close()
+
+        self.assertIn(
+            "DEBUG - Text in the gap: \nfirst\nsecond",
+            self.log_file.read_text("utf-8"),
+        )
+
+    @patch("atexit.register")
+    def test_close_registered_once(self, mock_register):
+        """
+        The logger is closed at exit once, even if it is configured again
+        """
+        logger = self._logger(logging.DEBUG)
+
+        logger.close()
+        logger.debug("configured again")
+        logger.close()
+
+        mock_register.assert_called_once_with(logger.close)
@@ -0,0 +1,184 @@
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch, MagicMock
+
+import click
+
+from tidecli.api import routes
+from tidecli.api.file_cache import FileCache
+from tidecli.models.user import User
+
+
+def _create_mock_response(status_code: int, content: bytes = b"", headers=None):
+    mm = MagicMock()
+    mm.status_code = status_code
+    mm.headers = headers or {}
+    mm.iter_content.return_value = [
+        content[i : i + 2] for i in range(0, len(content), 2)
+    ]
+    return mm
+
+
+class TestFileCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = Path(tempfile.mkdtemp())
+        self.files_dir = Path(tempfile.mkdtemp())
+        self.cache = FileCache(directory=self.tmp_dir, max_bytes=100)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+        shutil.rmtree(self.files_dir)
+
+    def _store(self, url: str, content: bytes, etag: str | None) -> None:
+        # Downloads are written to a file before they are cached
+        file_path = self.files_dir / "download"
+        file_path.write_bytes(content)
+        self.cache.store_file(url, file_path, etag=etag, last_modified=None)
+
+    def _copy(self, url: str) -> bytes:
+        file_path = self.files_dir / "copy"
+        self.cache.copy_to(self.cache.get(url), file_path)
+        return file_path.read_bytes()
+
+    def test_store_and_copy(self):
+        """
+        Stored content is copied with its validators
+        """
+        self._store("http://tim/a.txt", b"hello", etag='"v1"')
+
+        entry = self.cache.get("http://tim/a.txt")
+        self.assertIsNotNone(entry)
+        self.assertEqual(entry.validation_headers(), {"If-None-Match": '"v1"'})
+        self.assertEqual(self._copy("http://tim/a.txt"), b"hello")
+        self.assertIsNone(self.cache.get("http://tim/b.txt"))
+
+    def test_not_stored_without_validators(self):
+        """
+        Content that cannot be revalidated is not cached
+        """
+        self._store("http://tim/a.txt", b"hello", etag=None)
+
+        self.assertIsNone(self.cache.get("http://tim/a.txt"))
+
+    def test_lru_eviction(self):
+        """
+        Least recently used entries are removed when the cache is full
+        """
+        self._store("http://tim/a", b"a" * 40, etag="a")
+        self._store("http://tim/b", b"b" * 40, etag="b")
+        self._copy("http://tim/a")
+        self._store("http://tim/c", b"c" * 40, etag="c")
+
+        self.assertIsNotNone(self.cache.get("http://tim/a"))
+        self.assertIsNone(self.cache.get("http://tim/b"))
+        self.assertIsNotNone(self.cache.get("http://tim/c"))
+        self.assertLessEqual(self.cache.stats()["size"], 100)
+
+    def test_no_scan_below_limit(self):
+        """
+        The cache folder is scanned only once while the cache is not full
+        """
+        with patch.object(FileCache, "entries", wraps=self.cache.entries) as entries:
+            for i in range(5):
+                self._store(f"http://tim/{i}", b"x" * 10, etag="e")
+            self.assertEqual(entries.call_count, 1)
+
+            self._store("http://tim/big", b"y" * 60, etag="e")
+            self.assertEqual(entries.call_count, 2)
+        self.assertLessEqual(self.cache.stats()["size"], 100)
+
+    def test_clear(self):
+        """
+        Clearing removes every entry
+        """
+        self._store("http://tim/a", b"a", etag="a")
+        self._store("http://tim/b", b"b", etag="b")
+
+        self.assertEqual(self.cache.clear(), 2)
+        self.assertEqual(self.cache.stats()["entries"], 0)
+
+
+@patch("tidecli.api.routes.get_signed_in_user", return_value=User("test", "test"))
+@patch("requests.Session.request")
+class TestConditionalGet(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = Path(tempfile.mkdtemp())
+        self.cache = FileCache(directory=self.tmp_dir)
+        patcher = patch("tidecli.api.routes.get_file_cache", return_value=self.cache)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_not_modified_served_from_cache(self, mock_request, mock_user):
+        """
+        A 304 response copies the cached content
+        """
+        file_path = self.tmp_dir / "data.txt"
+        mock_request.return_value = _create_mock_response(
+            200, b"data", {"ETag": '"v1"'}
+        )
+        self.assertEqual(routes.download_file("files/data.txt", file_path), 4)
+        file_path.unlink()
+
+        mock_request.return_value = _create_mock_response(304)
+        self.assertEqual(routes.download_file("files/data.txt", file_path), 4)
+        self.assertEqual(file_path.read_bytes(), b"data")
+
+        headers = mock_request.call_args.kwargs["headers"]
+        self.assertEqual(headers["If-None-Match"], '"v1"')
+
+
+@patch("tidecli.api.routes.get_signed_in_user", return_value=User("test", "test"))
+@patch("requests.Session.request")
+class TestStreamingDownload(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = Path(tempfile.mkdtemp())
+        self.file_path = self.tmp_dir / "data.bin"
+        patcher = patch("tidecli.api.routes.FILE_CACHE_ENABLED", False)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_written_in_chunks(self, mock_request, mock_user):
+        """
+        The response is streamed to the file and progress is reported per chunk
+        """
+        mock_request.return_value = _create_mock_response(
+            200, b"abcdef", {"Content-Length": "6"}
+        )
+        progress = []
+
+        size = routes.download_file(
+            "files/data", self.file_path, on_progress=lambda *p: progress.append(p)
+        )
+
+        self.assertEqual(size, 6)
+        self.assertEqual(self.file_path.read_bytes(), b"abcdef")
+        self.assertEqual(progress, [(2, 6), (4, 6), (6, 6)])
+        self.assertTrue(mock_request.call_args.kwargs["stream"])
+
+    def test_interrupted_download_keeps_old_file(self, mock_request, mock_user):
+        """
+        A download failing midway leaves no partial file behind
+        """
+        self.file_path.write_bytes(b"old")
+        response = _create_mock_response(200)
+        response.iter_content.return_value = _failing_chunks()
+        mock_request.return_value = response
+
+        with self.assertRaises(click.ClickException):
+            routes.download_file("files/data", self.file_path)
+
+        self.assertEqual(self.file_path.read_bytes(), b"old")
+        self.assertEqual(list(self.tmp_dir.iterdir()), [self.file_path])
+
+
+def _failing_chunks():
+    yield b"new"
+    raise ConnectionError("connection lost")
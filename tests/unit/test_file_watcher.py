@@ -0,0 +1,108 @@
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+
+from tidecli.utils.file_watcher import (
+    InotifyWatcher,
+    PollingWatcher,
+    file_digest,
+    watch_changes,
+)
+
+
+class _ScriptedWatcher:
+    """Returns the given batches of changes, then no more changes."""
+
+    def __init__(self, changes: list[set[Path]]):
+        self.changes = changes
+
+    def wait(self, timeout):
+        if self.changes:
+            return self.changes.pop(0)
+        return set()
+
+    def close(self):
+        pass
+
+
+class TestFileWatcher(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = Path(tempfile.mkdtemp())
+        self.file = self.tmp_dir / "answer.py"
+        self.other = self.tmp_dir / "other.py"
+        self.file.write_text("print(1)\n")
+        self.other.write_text("print(2)\n")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_polling_detects_change(self):
+        """
+        Polling sees changes of the modification time or size
+        """
+        watcher = PollingWatcher([self.file, self.other], interval=0.01)
+
+        self.assertEqual(watcher.wait(0.05), set())
+        self.file.write_text("print(10)\n")
+        self.assertEqual(watcher.wait(1), {self.file})
+        self.assertEqual(watcher.wait(0.05), set())
+
+    @unittest.skipUnless(sys.platform.startswith("linux"), "inotify is Linux only")
+    def test_inotify_detects_write_and_rename(self):
+        """
+        inotify sees files written in place and files replaced by a rename
+        """
+        watcher = InotifyWatcher([self.file])
+        self.addCleanup(watcher.close)
+
+        self.other.write_text("not watched\n")
+        self.assertEqual(watcher.wait(0.1), set())
+
+        self.file.write_text("print(10)\n")
+        self.assertEqual(watcher.wait(1), {self.file})
+
+        # Editors often save by writing a temporary file and renaming it
+        tmp_file = self.tmp_dir / ".answer.py.tmp"
+        tmp_file.write_text("print(20)\n")
+        os.replace(tmp_file, self.file)
+        self.assertEqual(watcher.wait(1), {self.file})
+
+    @unittest.skipUnless(sys.platform.startswith("linux"), "inotify is Linux only")
+    def test_inotify_waits_for_change(self):
+        """
+        A change made while waiting ends the wait
+        """
+        watcher = InotifyWatcher([self.file])
+        self.addCleanup(watcher.close)
+        timer = threading.Timer(0.1, self.file.write_text, ["print(10)\n"])
+        timer.start()
+        self.addCleanup(timer.cancel)
+
+        start = time.monotonic()
+        self.assertEqual(watcher.wait(None), {self.file})
+        self.assertLess(time.monotonic() - start, 1)
+
+    def test_changes_coalesced(self):
+        """
+        Changes that follow each other within the debounce time form one batch
+        """
+        watcher = _ScriptedWatcher([{self.file}, {self.file}, {self.other}, set()])
+
+        batches = watch_changes(watcher, debounce=0.01)
+
+        self.assertEqual(next(batches), {self.file, self.other})
+
+    def test_digest(self):
+        """
+        The digest depends only on the content of the file
+        """
+        digest = file_digest(self.file)
+        os.utime(self.file, (0, 0))
+
+        self.assertEqual(file_digest(self.file), digest)
+        self.assertIsNone(file_digest(self.tmp_dir / "missing.py"))
@@ -0,0 +1,52 @@
+import unittest
+from unittest.mock import MagicMock, patch
+
+import click
+
+from tidecli.api.routes import get_profile
+from tidecli.utils import handle_token
+
+
+@patch("keyring.get_password", return_value="test_token")
+class TestCredentialCache(unittest.TestCase):
+    def setUp(self):
+        handle_token.clear_credential_cache()
+
+    def tearDown(self):
+        handle_token.clear_credential_cache()
+
+    def test_keyring_read_once(self, mock_get_password):
+        """
+        The keyring is read only once for all the requests of a process
+        """
+        for _ in range(5):
+            self.assertEqual(handle_token.get_signed_in_user().username, "test_token")
+
+        self.assertEqual(mock_get_password.call_count, 2)
+
+    @patch("keyring.delete_password")
+    def test_logout_clears(self, _, mock_get_password):
+        """
+        The user is forgotten on logout
+        """
+        handle_token.get_signed_in_user()
+
+        handle_token.delete_token()
+        mock_get_password.return_value = None
+
+        self.assertIsNone(handle_token.get_signed_in_user())
+
+    @patch("requests.Session.request")
+    def test_rejected_token_clears(self, mock_request, mock_get_password):
+        """
+        The keyring is read again after TIM rejects the token
+        """
+        response = MagicMock(status_code=401)
+        response.json.return_value = {"error": "invalid_token"}
+        mock_request.return_value = response
+
+        with self.assertRaises(click.ClickException):
+            get_profile()
+        handle_token.get_signed_in_user()
+
+        self.assertEqual(mock_get_password.call_count, 4)
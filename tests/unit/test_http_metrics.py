@@ -0,0 +1,153 @@
+import http.server
+import json
+import shutil
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+import requests
+
+from tidecli.api import http_metrics
+from tidecli.api import session as tide_session
+from tidecli.api.retry import RetryPolicy
+from tidecli.tide_config import TIM_URL
+
+
+class _EchoHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        self.rfile.read(length)
+        body = b'{"ok": true}'
+        self.send_response(201)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class TestHttpMetrics(unittest.TestCase):
+    def setUp(self):
+        http_metrics.reset()
+
+    def tearDown(self):
+        http_metrics.reset()
+
+    def test_endpoint_label(self):
+        """
+        Endpoints are labeled by their path, file downloads are grouped
+        """
+        self.assertEqual(
+            http_metrics.endpoint_label(f"{TIM_URL}/ide/tasksByDoc"), "/ide/tasksByDoc"
+        )
+        self.assertEqual(
+            http_metrics.endpoint_label(f"{TIM_URL}/files/12/a/data.bin"), "/files/*"
+        )
+        self.assertEqual(
+            http_metrics.endpoint_label("https://example.com/data.csv"),
+            "example.com/data.csv",
+        )
+
+    def test_histogram(self):
+        """
+        Requests are counted by status and latency bucket per endpoint
+        """
+        http_metrics.record("/ide/submitTask", "put", 200, 100, 10, 0.005)
+        http_metrics.record("/ide/submitTask", "PUT", 500, 100, 20, 0.3)
+        http_metrics.record("/ide/submitTask", "PUT", None, 0, 0, 20.0)
+        http_metrics.record("/ide/taskPoints", "GET", 200, 0, 5, 0.01)
+
+        first, second = http_metrics.snapshot()
+        self.assertEqual(first["endpoint"], "/ide/submitTask")
+        self.assertEqual(first["method"], "PUT")
+        self.assertEqual(first["requests"], 3)
+        self.assertEqual(first["statuses"], {"200": 1, "500": 1, "error": 1})
+        self.assertEqual(first["bytes_sent"], 200)
+        self.assertEqual(first["bytes_received"], 30)
+        self.assertEqual(first["latency_ms_max"], 20000.0)
+        histogram = first["latency_ms_histogram"]
+        self.assertEqual(histogram["10"], 1)
+        self.assertEqual(histogram["500"], 1)
+        self.assertEqual(histogram["inf"], 1)
+        self.assertEqual(sum(histogram.values()), 3)
+        # Bounds are inclusive
+        self.assertEqual(second["latency_ms_histogram"]["10"], 1)
+
+    def test_export_json_lines(self):
+        """
+        Every endpoint is appended to the file as one JSON line
+        """
+        tmp_dir = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, tmp_dir)
+        path = tmp_dir / "metrics" / "http.jsonl"
+
+        self.assertEqual(http_metrics.export_json_lines(path), 0)
+        self.assertFalse(path.exists())
+
+        http_metrics.record("/ide/ideCourses", "GET", 200, 0, 10, 0.01)
+        http_metrics.record("/oauth/introspect", "POST", 200, 0, 10, 0.01)
+        http_metrics.export_json_lines(path, "courses")
+        http_metrics.export_json_lines(path, "courses")
+
+        lines = [json.loads(line) for line in path.read_text().splitlines()]
+        self.assertEqual(len(lines), 4)
+        self.assertEqual(lines[0]["command"], "courses")
+        self.assertIn("timestamp", lines[0])
+
+
+class TestSessionMetrics(unittest.TestCase):
+    def setUp(self):
+        http_metrics.reset()
+        self.server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), _EchoHandler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.session = tide_session.create_session()
+
+    def tearDown(self):
+        self.session.close()
+        self.server.shutdown()
+        self.server.server_close()
+        http_metrics.reset()
+
+    def test_request_recorded(self):
+        """
+        Requests made through the shared session are recorded with their sizes
+        """
+        with patch.object(tide_session, "get_session", return_value=self.session):
+            tide_session.request(
+                "POST", f"{self.url}/ide/submitTask", json={"a": "b"}
+            ).raise_for_status()
+
+        (metrics,) = http_metrics.snapshot()
+        self.assertEqual(
+            metrics["endpoint"],
+            f"127.0.0.1:{self.server.server_address[1]}/ide/submitTask",
+        )
+        self.assertEqual(metrics["statuses"], {"201": 1})
+        self.assertEqual(metrics["bytes_sent"], len(b'{"a": "b"}'))
+        self.assertEqual(metrics["bytes_received"], len(b'{"ok": true}'))
+
+    def test_failed_request_recorded(self):
+        """
+        Requests without a response are recorded as errors, every attempt once
+        """
+        self.server.shutdown()
+        self.server.server_close()
+        with patch.object(tide_session, "get_session", return_value=self.session):
+            with self.assertRaises(requests.ConnectionError):
+                tide_session.request(
+                    "GET",
+                    f"{self.url}/ide/ideCourses",
+                    endpoint="x",
+                    retry=RetryPolicy(retries=1, backoff=0),
+                )
+
+        (metrics,) = http_metrics.snapshot()
+        self.assertEqual(metrics["endpoint"], "x")
+        self.assertEqual(metrics["statuses"], {"error": 2})
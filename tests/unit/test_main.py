@@ -1,10 +1,15 @@
+import copy
 import os
+import subprocess
+import sys
+import time
 import unittest
 from pathlib import Path
 
 from pyfakefs.fake_filesystem_unittest import TestCase
 from unittest.mock import patch
 
+import requests
 from click.testing import CliRunner
 
 from unit.test_data import (
@@ -13,19 +18,25 @@ from unit.test_data import (
     get_tasks_by_doc_test_response,
     get_task_by_ide_task_id_test_response,
     get_tasks_by_course_test_response,
+    submit_task_by_id_tim_test_response,
 )
 from unit.test_routes import _create_mock_request
-from tidecli.main import login, logout, courses, task, course
+from tidecli.api.response_cache import clear_response_cache
+from tidecli.main import login, logout, courses, task, course, submit
 from tidecli.models.course import Course
 from tidecli.models.user import User
+from tidecli.utils import handle_token
 
 
 class TestMain(unittest.TestCase):
 
     def setUp(self):
         self.runner = CliRunner()
+        handle_token.clear_credential_cache()
+        handle_token.clear_introspection()
+        clear_response_cache()
 
-    @patch("tidecli.utils.login_handler.authenticate")
+    @patch("tidecli.api.oauth_login.authenticate")
     @patch("keyring.get_password")
     def test_successful_new_login(self, mock_get_password, mock_authenticate):
         """
@@ -41,7 +52,7 @@ class TestMain(unittest.TestCase):
             "\nLogin successful!\n",
         )
 
-    @patch("tidecli.api.routes.requests.request")
+    @patch("requests.Session.request")
     @patch("keyring.get_password")
     def test_successful_existing_login(self, mock_get_password, mock_request):
         """
@@ -56,10 +67,34 @@ class TestMain(unittest.TestCase):
             "Logged in as test_token\nToken is still valid for 10 days, 0:00:00\n",
         )
 
+    @patch("requests.Session.request")
+    @patch("keyring.get_password")
+    def test_token_validation_is_cached(self, mock_get_password, mock_request):
+        """
+        Test that a validated token is not validated again before it expires
+        """
+        mock_get_password.return_value = "test_token"
+        mock_request.return_value = _create_mock_request(validate_token_response)
+
+        now = time.time()
+        with patch("time.time", return_value=now):
+            first = self.runner.invoke(login)
+        with patch("time.time", return_value=now + 3600):
+            second = self.runner.invoke(login)
+
+        self.assertEqual(mock_request.call_count, 1)
+        self.assertIn("valid for 10 days, 0:00:00", first.output)
+        # The time left is counted from the saved expiry time
+        self.assertIn("valid for 9 days, 23:00:00", second.output)
+
+        handle_token.clear_introspection()
+        self.runner.invoke(login)
+        self.assertEqual(mock_request.call_count, 2)
+
     @patch("tidecli.utils.login_handler.delete_token")
-    @patch("tidecli.api.routes.requests.request")
+    @patch("requests.Session.request")
     @patch("keyring.get_password")
-    @patch("tidecli.utils.login_handler.authenticate")
+    @patch("tidecli.api.oauth_login.authenticate")
     def test_login_invalid_token(
         self, mock_authenticate, mock_get_password, mock_request, mock_delete
     ):
@@ -79,16 +114,76 @@ class TestMain(unittest.TestCase):
             "\nLogin successful!\n",
         )
 
-    @patch("tidecli.main.delete_token")
+    @patch("tidecli.utils.login_handler.delete_token")
+    @patch("requests.Session.request")
+    @patch("keyring.get_password")
+    @patch("tidecli.api.oauth_login.authenticate")
+    def test_login_token_rejected(
+        self, mock_authenticate, mock_get_password, mock_request, mock_delete
+    ):
+        """
+        Test that the token is deleted when TIM does not accept it
+        """
+        mock_get_password.return_value = "test_token"
+        mock_request.return_value = _create_mock_request({"error": "invalid_token"})
+        mock_request.return_value.status_code = 401
+
+        mock_authenticate.return_value = True
+
+        self.runner.invoke(login)
+
+        mock_delete.assert_called_once()
+
+    @patch("tidecli.utils.login_handler.delete_token")
+    @patch("requests.Session.request")
+    @patch("keyring.get_password")
+    @patch("tidecli.api.oauth_login.authenticate")
+    def test_login_answer_not_from_tim(
+        self, mock_authenticate, mock_get_password, mock_request, mock_delete
+    ):
+        """
+        Test that the token is kept when the answer is not JSON, e.g. a proxy page
+        """
+        mock_get_password.return_value = "test_token"
+        mock_request.return_value = _create_mock_request({})
+        mock_request.return_value.json.side_effect = ValueError("Expecting value")
+        mock_authenticate.return_value = True
+
+        self.runner.invoke(login)
+
+        mock_delete.assert_not_called()
+
+    @patch("tidecli.api.retry.RetryPolicy.sleep")
+    @patch("tidecli.utils.login_handler.delete_token")
+    @patch("requests.Session.request")
+    @patch("keyring.get_password")
+    def test_login_tim_not_reachable(
+        self, mock_get_password, mock_request, mock_delete, _
+    ):
+        """
+        Test that the token is kept when TIM cannot be reached to validate it
+        """
+        mock_get_password.return_value = "test_token"
+        mock_request.side_effect = requests.ConnectionError("Connection refused")
+
+        result = self.runner.invoke(login)
+
+        mock_delete.assert_not_called()
+        self.assertEqual(
+            result.output,
+            "Logged in as test_token\nToken cannot be validated, TIM not reachable\n",
+        )
+
+    @patch("tidecli.utils.handle_token.delete_token")
     def test_logout(self, mock_delete_token):
         return_value = "Token for test deleted successfully!"
         mock_delete_token.return_value = return_value
         result = self.runner.invoke(logout)
         self.assertEqual(result.output, "Token for test deleted successfully!\n")
 
-    @patch("tidecli.api.routes.requests.request")
+    @patch("requests.Session.request")
     @patch("tidecli.api.routes.get_signed_in_user")
-    @patch("tidecli.main.is_logged_in")
+    @patch("tidecli.utils.login_handler.is_logged_in")
     def test_courses(self, mock_is_logged_in, mock_get_signed_in_user, mock_request):
         """
         Test listing courses
@@ -102,9 +197,9 @@ class TestMain(unittest.TestCase):
         result = self.runner.invoke(courses)
         self.assertEqual(result.output, f"{console_print}\n")
 
-    @patch("tidecli.api.routes.requests.request")
+    @patch("requests.Session.request")
     @patch("tidecli.api.routes.get_signed_in_user")
-    @patch("tidecli.main.is_logged_in")
+    @patch("tidecli.utils.login_handler.is_logged_in")
     def test_task_list(self, mock_is_logged_in, mock_get_signed_in_user, mock_request):
         """
         Test listing tasks by document
@@ -132,10 +227,11 @@ class TestMainFileAccess(TestCase):
     def setUp(self):
         self.runner = CliRunner()
         self.working_dir = str(Path.cwd())
+        handle_token.clear_credential_cache()
 
-    @patch("tidecli.api.routes.requests.request")
+    @patch("requests.Session.request")
     @patch("tidecli.api.routes.get_signed_in_user")
-    @patch("tidecli.main.is_logged_in")
+    @patch("tidecli.utils.login_handler.is_logged_in")
     def test_task_create_all(
         self, mock_is_logged_in, mock_get_signed_in_user, mock_request
     ):
@@ -195,9 +291,9 @@ class TestMainFileAccess(TestCase):
             f"{Path(test_file2)} already exists\nTo overwrite add -f to previous command\n\n",
         )
 
-    @patch("tidecli.api.routes.requests.request")
+    @patch("requests.Session.request")
     @patch("tidecli.api.routes.get_signed_in_user")
-    @patch("tidecli.main.is_logged_in")
+    @patch("tidecli.utils.login_handler.is_logged_in")
     def test_task_create_one(
         self, mock_is_logged_in, mock_get_signed_in_user, mock_request
     ):
@@ -229,9 +325,31 @@ class TestMainFileAccess(TestCase):
         self.assertTrue(os.path.exists(test_metadata1))
         self.assertTrue(os.path.exists(test_file1))
 
-    @patch("tidecli.api.routes.requests.request")
+    @patch("requests.Session.request")
     @patch("tidecli.api.routes.get_signed_in_user")
-    @patch("tidecli.main.is_logged_in")
+    @patch("tidecli.utils.login_handler.is_logged_in")
+    def test_task_create_one_without_files(
+        self, mock_is_logged_in, mock_get_signed_in_user, mock_request
+    ):
+        """
+        Test creating a single task that has no files to save
+        """
+        mock_is_logged_in.return_value = True
+        mock_get_signed_in_user.return_value = User("test", "test")
+        response = copy.deepcopy(get_task_by_ide_task_id_test_response)
+        response["task_files"] = []
+        response["ide_task_id"] = "t9"
+        mock_request.return_value = _create_mock_request(response)
+
+        result = self.runner.invoke(task, ["create", "kurssit/Demo1", "t9"])
+
+        self.assertIsNone(result.exception)
+        self.assertEqual(result.output, "")
+        self.assertFalse(os.path.exists(f"{self.working_dir}Demo1/t9"))
+
+    @patch("requests.Session.request")
+    @patch("tidecli.api.routes.get_signed_in_user")
+    @patch("tidecli.utils.login_handler.is_logged_in")
     def test_create_course_by_path(
         self, mock_is_logged_in, mock_get_signed_in_user, mock_request
     ):
@@ -335,3 +453,104 @@ class TestMainFileAccess(TestCase):
         self.assertTrue(os.path.exists(test_file12))
         self.assertTrue(os.path.exists(test_file13))
         self.assertTrue(os.path.exists(test_metadata))
+
+    @patch("requests.Session.request")
+    @patch("tidecli.api.routes.get_signed_in_user")
+    @patch("tidecli.utils.login_handler.is_logged_in")
+    def test_submit_skips_unchanged(
+        self, mock_is_logged_in, mock_get_signed_in_user, mock_request
+    ):
+        """
+        Test that an answer is not submitted again unless it has changed
+        """
+        mock_is_logged_in.return_value = True
+        mock_get_signed_in_user.return_value = User("test", "test")
+        task_response = copy.deepcopy(get_task_by_ide_task_id_test_response)
+        task_response["task_files"][0]["task_type"] = "cc"
+        mock_request.return_value = _create_mock_request(task_response)
+        self.runner.invoke(task, ["create", "kurssit/Demo1", "t3", "--dir", "submit"])
+        answer_path = str(Path(self.working_dir, "submit", "Demo1", "t3", "test.c"))
+
+        mock_request.return_value = _create_mock_request(
+            submit_task_by_id_tim_test_response
+        )
+        first = self.runner.invoke(submit, [answer_path])
+        self.assertIn("Submitting: test.c", first.output)
+        self.assertEqual(mock_request.call_count, 2)
+
+        second = self.runner.invoke(submit, [answer_path])
+        self.assertIn("Skipping: test.c", second.output)
+        self.assertEqual(mock_request.call_count, 2)
+
+        forced = self.runner.invoke(submit, [answer_path, "--force"])
+        self.assertIn("Submitting: test.c", forced.output)
+        self.assertEqual(mock_request.call_count, 3)
+
+        with open(answer_path, "a", encoding="utf-8") as answer:
+            answer.write("// changed")
+        changed = self.runner.invoke(submit, [answer_path])
+        self.assertIn("Submitting: test.c", changed.output)
+        self.assertEqual(mock_request.call_count, 4)
+
+    @patch("tidecli.utils.file_watcher.create_watcher")
+    @patch("tidecli.utils.file_watcher.watch_changes")
+    @patch("requests.Session.request")
+    @patch("tidecli.api.routes.get_signed_in_user")
+    @patch("tidecli.utils.login_handler.is_logged_in")
+    def test_watch_submits_changed_files(
+        self,
+        mock_is_logged_in,
+        mock_get_signed_in_user,
+        mock_request,
+        mock_watch_changes,
+        _,
+    ):
+        """
+        Test that watched files are submitted only when their content changes
+        """
+        mock_is_logged_in.return_value = True
+        mock_get_signed_in_user.return_value = User("test", "test")
+        task_response = copy.deepcopy(get_task_by_ide_task_id_test_response)
+        task_response["task_files"][0]["task_type"] = "cc"
+        mock_request.return_value = _create_mock_request(task_response)
+        self.runner.invoke(task, ["create", "kurssit/Demo1", "t3", "--dir", "watch"])
+        answer_path = Path(self.working_dir, "watch", "Demo1", "t3", "test.c")
+        mock_request.reset_mock()
+        mock_request.return_value = _create_mock_request(
+            submit_task_by_id_tim_test_response
+        )
+
+        def batches(watcher):
+            # Saved without changes
+            yield {answer_path.absolute()}
+            with open(answer_path, "a", encoding="utf-8") as answer:
+                answer.write("// changed")
+            yield {answer_path.absolute()}
+            yield {answer_path.absolute()}
+
+        mock_watch_changes.side_effect = batches
+
+        result = self.runner.invoke(task, ["watch", str(answer_path.parent)])
+
+        self.assertEqual(result.exit_code, 0)
+        self.assertEqual(result.output.count("Submitting: test.c"), 1)
+        self.assertEqual(mock_request.call_count, 1)
+
+
+class TestStartup(unittest.TestCase):
+    def test_main_does_not_import_heavy_dependencies(self):
+        """
+        Test that loading the CLI does not import dependencies of the commands
+        """
+        code = (
+            "import sys, tidecli.main; "
+            "print(sorted(m for m in ('requests', 'pydantic', 'keyring') "
+            "if m in sys.modules))"
+        )
+        result = subprocess.run(
+            [sys.executable, "-c", code],
+            capture_output=True,
+            text=True,
+            env={**os.environ, "PYTHONPATH": os.pathsep.join(sys.path)},
+        )
+        self.assertEqual(result.stdout.strip(), "[]", result.stderr)
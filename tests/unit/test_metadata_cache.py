@@ -0,0 +1,80 @@
+import os
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from tidecli.models.task_data import TaskData, TideCourseData, TideCoursePartData
+from tidecli.utils import file_handler, metadata_cache
+
+
+def _course(task_count: int) -> TideCourseData:
+    tasks = {
+        f"t{i}": TaskData(
+            path="kurssit/demo1",
+            type="py",
+            doc_id=1,
+            ide_task_id=f"t{i}",
+            task_files=[{"task_id_ext": f"1.t{i}", "content": "", "file_name": "a.py"}],
+        )
+        for i in range(task_count)
+    }
+    return TideCourseData(
+        course_parts={"kurssit/demo1": TideCoursePartData(tasks=tasks)}
+    )
+
+
+class TestMetadataCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = Path(tempfile.mkdtemp())
+        self.metadata_path = self.tmp_dir / file_handler.METADATA_NAME
+        self.metadata_path.write_text(_course(2).model_dump_json())
+        file_handler._metadata_cache.clear()
+        metadata_cache.clear_metadata_cache()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+        file_handler._metadata_cache.clear()
+
+    def test_unchanged_file_not_parsed(self):
+        """
+        Metadata is loaded from the cache without decoding the JSON
+        """
+        parsed, _ = file_handler.get_metadata(self.tmp_dir)
+        file_handler._metadata_cache.clear()
+
+        with patch("tidecli.utils.file_handler.json.load") as mock_load:
+            cached, metadata_dir = file_handler.get_metadata(self.tmp_dir)
+
+        mock_load.assert_not_called()
+        self.assertEqual(cached, parsed)
+        self.assertEqual(metadata_dir, self.tmp_dir.absolute())
+
+    def test_changed_file_parsed_again(self):
+        """
+        A cache written for other file contents is not used
+        """
+        file_handler.get_metadata(self.tmp_dir)
+        file_handler._metadata_cache.clear()
+        self.metadata_path.write_text(_course(3).model_dump_json())
+        # Make sure the change is visible even with a coarse mtime
+        stat = self.metadata_path.stat()
+        os.utime(self.metadata_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+        metadata, _ = file_handler.get_metadata(self.tmp_dir)
+
+        self.assertEqual(len(metadata.course_parts["kurssit/demo1"].tasks), 3)
+
+    def test_corrupted_cache_ignored(self):
+        """
+        A broken cache file falls back to parsing
+        """
+        file_handler.get_metadata(self.tmp_dir)
+        file_handler._metadata_cache.clear()
+        for cache_file in metadata_cache.METADATA_CACHE_DIR.glob("*.pickle"):
+            cache_file.write_bytes(b"not a pickle")
+
+        metadata, _ = file_handler.get_metadata(self.tmp_dir)
+
+        self.assertEqual(len(metadata.course_parts["kurssit/demo1"].tasks), 2)
@@ -0,0 +1,91 @@
+import unittest
+from pathlib import Path
+
+from tidecli.models.task_data import (
+    TaskData,
+    TideCourseData,
+    TideCoursePartData,
+)
+from tidecli.utils.metadata_index import MetadataIndex, get_metadata_index
+
+
+def _task(path: str, ide_task_id: str, files: list[dict]) -> TaskData:
+    return TaskData(
+        path=path,
+        type="py",
+        doc_id=1,
+        ide_task_id=ide_task_id,
+        task_files=[
+            {"task_id_ext": f"1.{ide_task_id}", "content": "", **f} for f in files
+        ],
+    )
+
+
+class TestMetadataIndex(unittest.TestCase):
+    def setUp(self):
+        self.root = Path("/course")
+        self.t1 = _task(
+            "kurssit/demo1",
+            "t1",
+            [{"file_name": "main.py"}, {"file_name": "src/util.py"}],
+        )
+        self.t2 = _task("kurssit/demo1", "t2", [{"file_name": "main.py"}])
+        self.t3 = _task(
+            "kurssit/demo2",
+            "t3",
+            [{"file_name": "Main.cs", "task_directory": "shared/t3"}],
+        )
+        self.metadata = TideCourseData(
+            course_parts={
+                "kurssit/demo1": TideCoursePartData(
+                    tasks={"t1": self.t1, "t2": self.t2}
+                ),
+                "kurssit/demo2": TideCoursePartData(tasks={"t3": self.t3}),
+            }
+        )
+        self.index = MetadataIndex.build(self.metadata, self.root)
+
+    def test_find_task(self):
+        """
+        Tasks are found by their directory or any path inside it
+        """
+        t1_dir = self.root / self.t1.get_task_directory()
+        self.assertIs(self.index.find_task(t1_dir), self.t1)
+        self.assertIs(self.index.find_task(t1_dir / "src" / "util.py"), self.t1)
+        self.assertIsNone(self.index.find_task(self.root / "other"))
+
+    def test_find_file(self):
+        """
+        Files are found by their exact path
+        """
+        t2_file = self.root / self.t2.get_task_directory() / "main.py"
+        entries = self.index.find_file(t2_file)
+
+        self.assertEqual([e.task for e in entries], [self.t2])
+        self.assertEqual(
+            self.index.find_file(self.root / "shared/t3/Main.cs")[0].task, self.t3
+        )
+        self.assertEqual(self.index.find_file(self.root / "missing.py"), [])
+
+    def test_find_files_under(self):
+        """
+        Files in a directory and its subdirectories are found in .timdata order
+        """
+        t1_dir = self.root / self.t1.get_task_directory()
+        names = [e.task_file.file_name for e in self.index.find_files_under(t1_dir)]
+        self.assertEqual(names, ["main.py", "src/util.py"])
+
+        everything = self.index.find_files_under(self.root)
+        self.assertEqual(
+            [e.task.ide_task_id for e in everything], ["t1", "t1", "t2", "t3"]
+        )
+
+    def test_index_reused_for_same_metadata(self):
+        """
+        The index is built once per loaded metadata
+        """
+        first = get_metadata_index(self.metadata, self.root)
+        self.assertIs(get_metadata_index(self.metadata, self.root), first)
+
+        reloaded = self.metadata.model_copy(deep=True)
+        self.assertIsNot(get_metadata_index(reloaded, self.root), first)
@@ -0,0 +1,93 @@
+import json
+import unittest
+from unittest.mock import patch
+
+from click.testing import CliRunner
+
+from unit.test_data import get_ide_courses_test_response
+from unit.test_routes import _create_mock_request
+from tidecli.main import tim_ide
+from tidecli.models.user import User
+from tidecli.utils import profiling
+
+
+class TestProfiling(unittest.TestCase):
+    def tearDown(self):
+        profiling.disable()
+
+    def test_nothing_recorded_when_disabled(self):
+        """
+        Phases are not recorded unless profiling is enabled
+        """
+        profiling.enable()
+        profiling.disable()
+        with profiling.phase("http"):
+            pass
+
+        self.assertEqual(profiling.summary()["phases"], {})
+
+    def test_phases_recorded(self):
+        """
+        Calls and time of every phase are summed, slowest phase first
+        """
+
+        @profiling.profiled("gaps")
+        def find():
+            return 1
+
+        profiling.enable()
+        with profiling.phase("http"):
+            pass
+        self.assertEqual(find(), 1)
+        self.assertEqual(find(), 1)
+        profiling.record("disk write", 10.0)
+
+        phases = profiling.summary()["phases"]
+        self.assertEqual(list(phases)[0], "disk write")
+        self.assertEqual(phases["gaps"]["calls"], 2)
+        self.assertEqual(phases["http"]["calls"], 1)
+        self.assertEqual(phases["disk write"]["total_ms"], 10000.0)
+
+    def test_enable_resets(self):
+        """
+        Enabling profiling forgets earlier records
+        """
+        profiling.enable()
+        profiling.record("http", 1.0)
+        profiling.enable()
+
+        self.assertEqual(profiling.summary()["phases"], {})
+
+    def test_format_table(self):
+        """
+        Summary is formatted as a table with the wall time last
+        """
+        data = {"wall_ms": 20.0, "phases": {"http": {"calls": 2, "total_ms": 10.0}}}
+
+        lines = profiling.format_summary(data).splitlines()
+
+        self.assertEqual(lines[1].split(), ["http", "2", "10.0", "5.00"])
+        self.assertEqual(lines[-1].split(), ["Wall", "time", "20.0"])
+        self.assertEqual(json.loads(profiling.format_summary(data, "json")), data)
+
+    @patch("requests.Session.request")
+    @patch("tidecli.api.routes.get_signed_in_user")
+    @patch("tidecli.utils.login_handler.is_logged_in")
+    def test_profile_option(self, mock_is_logged_in, mock_get_user, mock_request):
+        """
+        The --profile option prints the phases to stderr when the command exits
+        """
+        mock_is_logged_in.return_value = True
+        mock_get_user.return_value = User("test", "test")
+        mock_request.return_value = _create_mock_request(get_ide_courses_test_response)
+
+        result = CliRunner().invoke(
+            tim_ide, ["--profile", "--profile-format", "json", "courses"]
+        )
+
+        self.assertEqual(result.exit_code, 0)
+        data = json.loads(result.stderr)
+        self.assertIn("http", data["phases"])
+        self.assertIn("parse", data["phases"])
+        self.assertNotIn("Wall", result.stdout)
+        self.assertFalse(profiling.is_enabled())
@@ -0,0 +1,135 @@
+import threading
+import time
+import unittest
+from unittest.mock import MagicMock, patch
+
+from tidecli.api import session as tide_session
+from tidecli.api.rate_limit import RequestGovernor
+from tidecli.api.retry import RetryPolicy
+
+
+class TestRequestGovernor(unittest.TestCase):
+    def test_burst_then_rate(self):
+        """
+        Requests are sent at once up to the burst and then at the rate
+        """
+        governor = RequestGovernor(rate=20, burst=2, max_in_flight=0)
+
+        start = time.monotonic()
+        for _ in range(2):
+            governor.take_token()
+        burst = time.monotonic() - start
+        for _ in range(2):
+            governor.take_token()
+        limited = time.monotonic() - start
+
+        self.assertLess(burst, 0.02)
+        self.assertGreaterEqual(limited, 0.09)
+
+    def test_no_rate_limit(self):
+        """
+        A rate of 0 disables the token bucket
+        """
+        governor = RequestGovernor(rate=0, burst=1, max_in_flight=0)
+
+        for _ in range(100):
+            self.assertEqual(governor.take_token(), 0.0)
+
+    def test_in_flight_limit(self):
+        """
+        No more operations than the limit hold a slot at once
+        """
+        governor = RequestGovernor(rate=0, max_in_flight=2)
+        lock = threading.Lock()
+        current = 0
+        highest = 0
+
+        def operation():
+            nonlocal current, highest
+            with governor.slot():
+                with lock:
+                    current += 1
+                    highest = max(highest, current)
+                time.sleep(0.02)
+                with lock:
+                    current -= 1
+
+        threads = [threading.Thread(target=operation) for _ in range(6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(highest, 2)
+
+    def test_backs_off_when_overloaded(self):
+        """
+        Overload halves the limits once per burst of failures
+        """
+        governor = RequestGovernor(rate=40, max_in_flight=8, slow_seconds=5)
+
+        governor.feedback(503, 0.1)
+        self.assertEqual((governor.rate, governor.in_flight_limit), (20, 4))
+
+        # Failures caused by the same overload do not back off again
+        governor.feedback(429, 0.1)
+        governor.feedback(None, 0.1)
+        self.assertEqual((governor.rate, governor.in_flight_limit), (20, 4))
+
+    def test_slow_response_backs_off(self):
+        """
+        A response slower than the threshold counts as overload
+        """
+        governor = RequestGovernor(rate=40, max_in_flight=8, slow_seconds=1)
+
+        governor.feedback(200, 0.5)
+        self.assertEqual(governor.rate, 40)
+        governor.feedback(200, 2)
+        self.assertEqual(governor.rate, 20)
+
+    def test_recovers_gradually(self):
+        """
+        The limits grow back while requests succeed
+        """
+        governor = RequestGovernor(rate=40, max_in_flight=8, slow_seconds=5)
+        governor.feedback(503, 0.1)
+
+        for _ in range(4):
+            governor.feedback(200, 0.1)
+        self.assertEqual((governor.rate, governor.in_flight_limit), (24, 5))
+
+        for _ in range(200):
+            governor.feedback(200, 0.1)
+        self.assertEqual((governor.rate, governor.in_flight_limit), (40, 8))
+
+    @patch("requests.Session.request")
+    def test_session_reports_outcome(self, mock_request):
+        """
+        Every request made through the session adapts the shared limits
+        """
+        governor = RequestGovernor(rate=40, max_in_flight=8)
+        mock_request.return_value = MagicMock(status_code=429, headers={})
+
+        with patch.object(tide_session, "get_governor", return_value=governor):
+            tide_session.request(
+                "GET", "http://tim/ide/ideCourses", retry=RetryPolicy(retries=0)
+            )
+
+        self.assertEqual(governor.rate, 20)
+
+    @patch("requests.Session.request")
+    def test_slow_submits_do_not_back_off(self, mock_request):
+        """
+        Submits run the answer code, so a slow answer does not halve the limits
+        """
+        # Every response counts as slow
+        governor = RequestGovernor(rate=40, max_in_flight=8, slow_seconds=0)
+        mock_request.return_value = MagicMock(status_code=200, headers={})
+
+        with patch.object(tide_session, "get_governor", return_value=governor):
+            for _ in range(3):
+                tide_session.request("PUT", "http://tim/ide/submitTask", json={})
+            self.assertEqual((governor.rate, governor.in_flight_limit), (40, 8))
+
+            tide_session.request("GET", "http://tim/ide/ideCourses")
+        self.assertEqual((governor.rate, governor.in_flight_limit), (20, 4))
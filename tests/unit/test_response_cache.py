@@ -0,0 +1,133 @@
+import json
+import unittest
+from unittest.mock import patch
+
+import click
+import requests
+from click.testing import CliRunner
+
+from unit.test_data import get_ide_courses_test_response
+from unit.test_routes import _create_mock_request
+from tidecli.api import response_cache
+from tidecli.api.routes import get_ide_courses
+from tidecli.main import tim_ide
+from tidecli.models.course import Course
+from tidecli.tide_config import COURSES_CACHE_TTL, RESPONSE_CACHE_STALE_SECONDS
+from tidecli.utils import handle_token
+
+
+def _age_cache(seconds: float) -> None:
+    """Make every cached response older by the given number of seconds."""
+    for cache_file in response_cache.RESPONSE_CACHE_DIR.glob("*.json"):
+        entry = json.loads(cache_file.read_text("utf-8"))
+        entry["stored_at"] -= seconds
+        cache_file.write_text(json.dumps(entry), "utf-8")
+
+
+COURSES = [Course(**course) for course in get_ide_courses_test_response]
+
+
+@patch("requests.Session.request")
+@patch("keyring.get_password", return_value="test_token")
+class TestResponseCache(unittest.TestCase):
+    def setUp(self):
+        response_cache.clear_response_cache()
+        handle_token.clear_credential_cache()
+        handle_token.clear_introspection()
+
+    def tearDown(self):
+        response_cache.set_offline(False)
+        response_cache.wait_for_revalidation()
+        response_cache.stale_responses()
+
+    def test_fresh_response_cached(self, kr_mock, mock_request):
+        """
+        A response younger than the TTL is used without asking TIM
+        """
+        mock_request.return_value = _create_mock_request(get_ide_courses_test_response)
+
+        self.assertEqual(get_ide_courses(), COURSES)
+        self.assertEqual(get_ide_courses(), COURSES)
+
+        self.assertEqual(mock_request.call_count, 1)
+        self.assertEqual(response_cache.stale_responses(), [])
+
+    def test_stale_response_revalidated(self, kr_mock, mock_request):
+        """
+        A stale response is used at once and refreshed in the background
+        """
+        mock_request.return_value = _create_mock_request(get_ide_courses_test_response)
+        get_ide_courses()
+        _age_cache(COURSES_CACHE_TTL + 1)
+        mock_request.return_value = _create_mock_request(
+            get_ide_courses_test_response[:1]
+        )
+
+        self.assertEqual(get_ide_courses(), COURSES)
+        response_cache.wait_for_revalidation()
+
+        self.assertEqual(mock_request.call_count, 2)
+        self.assertEqual(get_ide_courses(), COURSES[:1])
+        self.assertEqual(mock_request.call_count, 2)
+
+    def test_expired_response_used_when_unreachable(self, kr_mock, mock_request):
+        """
+        An expired response is used and marked stale when TIM cannot be reached
+        """
+        mock_request.return_value = _create_mock_request(get_ide_courses_test_response)
+        get_ide_courses()
+        _age_cache(COURSES_CACHE_TTL + RESPONSE_CACHE_STALE_SECONDS + 1)
+        mock_request.side_effect = requests.ConnectionError("unreachable")
+
+        with patch("tidecli.api.retry.RetryPolicy.sleep"):
+            self.assertEqual(get_ide_courses(), COURSES)
+
+        stale = response_cache.stale_responses()
+        self.assertEqual([s.endpoint for s in stale], ["/ide/ideCourses"])
+
+    def test_tim_error_not_hidden(self, kr_mock, mock_request):
+        """
+        Errors reported by TIM are raised even if a response is cached
+        """
+        mock_request.return_value = _create_mock_request(get_ide_courses_test_response)
+        get_ide_courses()
+        _age_cache(COURSES_CACHE_TTL + RESPONSE_CACHE_STALE_SECONDS + 1)
+        mock_request.return_value = _create_mock_request({"error": "invalid_token"})
+
+        with self.assertRaises(click.ClickException):
+            get_ide_courses()
+
+    def test_offline(self, kr_mock, mock_request):
+        """
+        In offline mode responses come only from the cache
+        """
+        response_cache.set_offline(True)
+
+        with self.assertRaises(click.ClickException):
+            get_ide_courses()
+
+        response_cache.set_offline(False)
+        mock_request.return_value = _create_mock_request(get_ide_courses_test_response)
+        get_ide_courses()
+        _age_cache(COURSES_CACHE_TTL + RESPONSE_CACHE_STALE_SECONDS + 1)
+        response_cache.set_offline(True)
+
+        self.assertEqual(get_ide_courses(), COURSES)
+        self.assertEqual(mock_request.call_count, 1)
+        self.assertEqual(len(response_cache.stale_responses()), 1)
+
+    def test_offline_command_marked_stale(self, kr_mock, mock_request):
+        """
+        Commands run with --offline tell that the output may be out of date
+        """
+        mock_request.return_value = _create_mock_request(get_ide_courses_test_response)
+        get_ide_courses()
+        _age_cache(2 * 3600)
+        mock_request.reset_mock()
+
+        result = CliRunner().invoke(tim_ide, ["--offline", "courses", "--json"])
+
+        self.assertEqual(result.exit_code, 0)
+        self.assertEqual(json.loads(result.stdout), get_ide_courses_test_response)
+        self.assertIn("Stale: /ide/ideCourses was cached 2 h ago", result.stderr)
+        mock_request.assert_not_called()
@@ -0,0 +1,300 @@
+import http.server
+import shutil
+import socket
+import tempfile
+import threading
+import time
+import unittest
+from email.utils import formatdate
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+import requests
+from click.testing import CliRunner
+from urllib3.exceptions import MaxRetryError, NewConnectionError
+
+from tidecli.api import retry, routes
+from tidecli.api import session as tide_session
+from tidecli.api.rate_limit import RequestGovernor
+from tidecli.api.retry import RetryPolicy
+from tidecli.main import tim_ide
+from tidecli.models.user import User
+
+NO_DELAY = RetryPolicy(retries=2, backoff=0, read_timeout=5)
+
+
+class _FlakyHandler(http.server.BaseHTTPRequestHandler):
+    """Answers 503 until the server has failed the given number of times."""
+
+    protocol_version = "HTTP/1.1"
+
+    def _handle(self):
+        self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        self.server.attempts += 1
+        if self.server.delay:
+            time.sleep(self.server.delay)
+        if self.server.failures > 0:
+            self.server.failures -= 1
+            status, body = 503, b"{}"
+        else:
+            status, body = 200, b'{"ok": true}'
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        if status == 503 and self.server.retry_after is not None:
+            self.send_header("Retry-After", self.server.retry_after)
+        self.end_headers()
+        self.wfile.write(body)
+
+    do_GET = _handle
+    do_POST = _handle
+    do_PUT = _handle
+
+    def log_message(self, format, *args):
+        pass
+
+
+class TestRetryPolicy(unittest.TestCase):
+    def test_backoff_with_jitter(self):
+        """
+        Delays are random up to the exponential backoff and the maximum delay
+        """
+        policy = RetryPolicy(backoff=1, max_delay=3)
+
+        for _ in range(20):
+            self.assertLessEqual(policy.delay(0), 1)
+            self.assertLessEqual(policy.delay(1), 2)
+            self.assertLessEqual(policy.delay(5), 3)
+
+    def test_retry_after(self):
+        """
+        Retry-After is used as the delay unless it is longer than the maximum
+        """
+        policy = RetryPolicy(max_delay=30)
+
+        self.assertEqual(policy.delay(0, "7"), 7)
+        self.assertIsNone(policy.delay(0, "120"))
+        # HTTP dates have a resolution of one second
+        self.assertGreater(policy.delay(0, formatdate(time.time() + 10)), 8)
+        self.assertEqual(policy.delay(0, formatdate(time.time() - 10)), 0)
+        self.assertLessEqual(RetryPolicy(backoff=1).delay(0, "soon"), 1)
+
+    def test_connect_error(self):
+        """
+        Only errors raised before the request was sent are connect errors
+        """
+        refused = requests.ConnectionError(
+            MaxRetryError(None, "/", NewConnectionError(None, "refused"))
+        )
+        lost = requests.ConnectionError("Connection aborted.")
+
+        self.assertTrue(tide_session.is_connect_error(refused))
+        self.assertTrue(tide_session.is_connect_error(requests.ConnectTimeout()))
+        self.assertFalse(tide_session.is_connect_error(lost))
+        self.assertFalse(tide_session.is_connect_error(requests.ReadTimeout()))
+
+    def test_configure(self):
+        """
+        The default policy can be changed for a command
+        """
+        self.addCleanup(setattr, retry, "_default_policy", RetryPolicy())
+        policies = []
+
+        with patch(
+            "tidecli.api.file_cache.get_file_cache",
+            side_effect=lambda: policies.append(retry.get_default_policy()),
+        ):
+            CliRunner().invoke(
+                tim_ide, ["--retries", "0", "--timeout", "2.5", "cache", "stats"]
+            )
+
+        self.assertEqual(policies[0].retries, 0)
+        self.assertEqual(policies[0].read_timeout, 2.5)
+        # The policy is restored for the next command run by tide serve
+        self.assertEqual(retry.get_default_policy(), RetryPolicy())
+
+
+class TestRetriedRequests(unittest.TestCase):
+    def setUp(self):
+        self.server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), _FlakyHandler)
+        self.server.daemon_threads = True
+        self.server.attempts = 0
+        self.server.failures = 0
+        self.server.delay = 0
+        self.server.retry_after = None
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/ide/test"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.session = tide_session.create_session()
+        patcher = patch.object(tide_session, "get_session", return_value=self.session)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        self.session.close()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_get_retried(self):
+        """
+        GET requests are retried until they succeed
+        """
+        self.server.failures = 2
+
+        res = tide_session.request("GET", self.url, retry=NO_DELAY)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(self.server.attempts, 3)
+
+    def test_retries_exhausted(self):
+        """
+        The last response is returned when every attempt failed
+        """
+        self.server.failures = 5
+
+        res = tide_session.request("GET", self.url, retry=NO_DELAY)
+
+        self.assertEqual(res.status_code, 503)
+        self.assertEqual(self.server.attempts, 3)
+
+    def test_retry_after_respected(self):
+        """
+        The delay asked by the server is waited before retrying
+        """
+        self.server.failures = 1
+        self.server.retry_after = "3"
+
+        with patch.object(RetryPolicy, "sleep") as mock_sleep:
+            tide_session.request("GET", self.url, retry=NO_DELAY)
+
+        mock_sleep.assert_called_once_with(3.0)
+
+    def test_submit_not_retried_after_response(self):
+        """
+        Requests that cannot be repeated are not retried after a response
+        """
+        self.server.failures = 1
+
+        res = tide_session.request("PUT", self.url, retry=NO_DELAY, json={})
+
+        self.assertEqual(res.status_code, 503)
+        self.assertEqual(self.server.attempts, 1)
+
+    def test_submit_not_retried_after_timeout(self):
+        """
+        A request that timed out may have been processed and is not retried
+        """
+        self.server.delay = 0.5
+        policy = RetryPolicy(retries=2, backoff=0, read_timeout=0.1)
+
+        with self.assertRaises(requests.ReadTimeout):
+            tide_session.request("PUT", self.url, retry=policy, json={})
+        self.assertEqual(self.server.attempts, 1)
+
+    def test_idempotent_post_retried(self):
+        """
+        POST requests marked idempotent are retried
+        """
+        self.server.failures = 1
+
+        res = tide_session.request("POST", self.url, idempotent=True, retry=NO_DELAY)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(self.server.attempts, 2)
+
+    def test_submit_retried_when_not_sent(self):
+        """
+        Requests that cannot be repeated are retried if the connection failed
+        """
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            closed_url = f"http://127.0.0.1:{sock.getsockname()[1]}/ide/submitTask"
+
+        with patch.object(RetryPolicy, "sleep") as mock_sleep:
+            with self.assertRaises(requests.ConnectionError):
+                tide_session.request("PUT", closed_url, retry=NO_DELAY, json={})
+        self.assertEqual(mock_sleep.call_count, 2)
+
+    def test_slot_released_while_waiting(self):
+        """
+        Other operations may run while a request waits before a retry
+        """
+        self.server.failures = 1
+        governor = RequestGovernor(max_in_flight=1)
+        in_flight = []
+
+        with patch.object(
+            tide_session, "get_governor", return_value=governor
+        ), patch.object(
+            RetryPolicy,
+            "sleep",
+            side_effect=lambda _: in_flight.append(governor._in_flight),
+        ):
+            with governor.slot():
+                res = tide_session.request("GET", self.url, retry=NO_DELAY)
+                self.assertEqual(governor._in_flight, 1)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(in_flight, [0])
+        self.assertEqual(governor._in_flight, 0)
+
+
+class TestRetriedDownload(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = Path(tempfile.mkdtemp())
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    @patch("tidecli.api.routes.get_default_policy", return_value=NO_DELAY)
+    @patch("tidecli.api.routes.FILE_CACHE_ENABLED", False)
+    @patch("tidecli.api.routes.get_signed_in_user")
+    @patch("requests.Session.request")
+    def test_interrupted_download_restarted(self, mock_request, mock_user, _):
+        """
+        A download interrupted while reading the file is started over
+        """
+        mock_user.return_value = User("test", "test")
+
+        def interrupted(chunk_size):
+            yield b"part"
+            raise requests.exceptions.ChunkedEncodingError("connection lost")
+
+        broken = MagicMock(status_code=200, headers={})
+        broken.iter_content.side_effect = interrupted
+        complete = MagicMock(status_code=200, headers={})
+        complete.iter_content.return_value = [b"whole ", b"file"]
+        mock_request.side_effect = [broken, complete]
+        file_path = self.tmp_dir / "data.bin"
+
+        size = routes.download_file("/files/1/data.bin", file_path)
+
+        self.assertEqual(size, 10)
+        self.assertEqual(file_path.read_bytes(), b"whole file")
+        self.assertEqual(mock_request.call_count, 2)
+        for call in mock_request.call_args_list:
+            self.assertEqual(call.kwargs["timeout"], NO_DELAY.timeout)
+
+    @patch("tidecli.api.routes.get_default_policy", return_value=NO_DELAY)
+    @patch("tidecli.api.routes.FILE_CACHE_ENABLED", False)
+    @patch("tidecli.api.routes.get_signed_in_user")
+    @patch("requests.Session.request")
+    def test_slot_released_before_retry(self, mock_request, mock_user, _):
+        """
+        Other requests may run while a download waits before starting over
+        """
+        mock_user.return_value = User("test", "test")
+        governor = RequestGovernor(max_in_flight=1)
+        in_flight = []
+        broken = MagicMock(status_code=200, headers={})
+        broken.iter_content.side_effect = requests.exceptions.ChunkedEncodingError()
+        complete = MagicMock(status_code=200, headers={})
+        complete.iter_content.return_value = [b"file"]
+        mock_request.side_effect = [broken, complete]
+
+        with patch.object(routes, "get_governor", return_value=governor), patch(
+            "tidecli.api.retry.RetryPolicy.sleep",
+            side_effect=lambda _: in_flight.append(governor._in_flight),
+        ):
+            routes.download_file("/files/1/data.bin", self.tmp_dir / "data.bin")
+
+        self.assertEqual(in_flight, [0])
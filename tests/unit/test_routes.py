@@ -1,9 +1,12 @@
+import gzip
+import json
 import os
 import unittest
 import pytest
 from unittest.mock import patch, MagicMock
 
 import click
+import requests
 
 from unit.test_data import (
     validate_token_response,
@@ -14,6 +17,7 @@ from unit.test_data import (
     submit_task_by_id_tim_test_response,
     submit_task_by_id_test_submit,
 )
+from tidecli.api import response_cache, routes
 from tidecli.api.routes import (
     validate_token,
     get_profile,
@@ -26,20 +30,25 @@ from tidecli.models.course import Course
 from tidecli.models.submit_data import SubmitData
 from tidecli.models.task_data import TaskData
 from tidecli.models.tim_feedback import TimFeedback
+from tidecli.utils.handle_token import clear_credential_cache
 
 
 def _create_mock_request(mock_response: dict) -> MagicMock:
     """
     Create a mock request object with wanted response
     """
-    mm = MagicMock()
+    mm = MagicMock(status_code=200)
     mm.json.return_value = mock_response
     return mm
 
 
-@patch("tidecli.api.routes.requests.request")
+@patch("requests.Session.request")
 @patch("keyring.get_password", return_value="test_token")
 class TestRoutes(unittest.TestCase):
+    def setUp(self):
+        clear_credential_cache()
+        response_cache.clear_response_cache()
+
     def test_validate_token(self, kr_mock, mock_request):
         """
         TDD-unit test model for the route to validate valid token
@@ -120,3 +129,112 @@ class TestRoutes(unittest.TestCase):
         res = submit_task(submit_data)
 
         assert res == TimFeedback(**return_value.json().get("result"))
+
+    def test_server_error_is_connection_error(self, kr_mock, mock_request):
+        """
+        A submit that TIM failed to process can be sent again later
+        """
+        mock_request.return_value = MagicMock(
+            status_code=503, reason="Service Unavailable"
+        )
+
+        with self.assertRaises(routes.TimConnectionError):
+            submit_task(SubmitData(**submit_task_by_id_test_submit))
+
+    def test_error_page_is_not_connection_error(self, kr_mock, mock_request):
+        """
+        A response that is not JSON, e.g. a proxy login page, is not retried later
+        """
+        response = MagicMock(status_code=200)
+        response.json.side_effect = requests.JSONDecodeError("Expecting value", "", 0)
+        mock_request.return_value = response
+
+        with self.assertRaises(click.ClickException) as context:
+            submit_task(SubmitData(**submit_task_by_id_test_submit))
+
+        self.assertNotIsInstance(context.exception, routes.TimConnectionError)
+
+    def test_error_answer_is_rejection(self, kr_mock, mock_request):
+        """
+        An error answered by TIM is a rejection, an error of the token is not
+        """
+        response = _create_mock_request({"error": "Task not found"})
+        response.status_code = 404
+        mock_request.return_value = response
+
+        with self.assertRaises(routes.TimRejectedError):
+            submit_task(SubmitData(**submit_task_by_id_test_submit))
+
+        response.status_code = 401
+        with self.assertRaises(routes.TokenRejectedError):
+            submit_task(SubmitData(**submit_task_by_id_test_submit))
+
+        response.json.side_effect = ValueError("Expecting value")
+        with self.assertRaises(routes.TokenRejectedError):
+            submit_task(SubmitData(**submit_task_by_id_test_submit))
+
+
+@patch("tidecli.api.routes.HTTP_GZIP_REQUESTS", True)
+@patch("tidecli.api.routes.HTTP_GZIP_MIN_BYTES", 100)
+@patch("requests.Session.request")
+@patch("keyring.get_password", return_value="test_token")
+class TestCompressedSubmit(unittest.TestCase):
+    def setUp(self):
+        clear_credential_cache()
+        routes._gzip_rejected = False
+        self.submit_data = SubmitData(**submit_task_by_id_test_submit)
+
+    def tearDown(self):
+        routes._gzip_rejected = False
+
+    def test_large_body_compressed(self, kr_mock, mock_request):
+        """
+        Submit bodies larger than the limit are sent gzip compressed
+        """
+        mock_request.return_value = _create_mock_request(
+            submit_task_by_id_tim_test_response
+        )
+
+        submit_task(self.submit_data)
+
+        kwargs = mock_request.call_args.kwargs
+        self.assertEqual(kwargs["headers"]["Content-Encoding"], "gzip")
+        self.assertEqual(
+            json.loads(gzip.decompress(kwargs["data"])),
+            self.submit_data.submit_json(),
+        )
+
+    def test_small_body_not_compressed(self, kr_mock, mock_request):
+        """
+        Submit bodies smaller than the limit are sent as JSON
+        """
+        mock_request.return_value = _create_mock_request(
+            submit_task_by_id_tim_test_response
+        )
+
+        with patch("tidecli.api.routes.HTTP_GZIP_MIN_BYTES", 100_000):
+            submit_task(self.submit_data)
+
+        kwargs = mock_request.call_args.kwargs
+        self.assertNotIn("Content-Encoding", kwargs["headers"])
+        self.assertEqual(kwargs["json"], self.submit_data.submit_json())
+
+    def test_unsupported_falls_back(self, kr_mock, mock_request):
+        """
+        When TIM refuses compressed bodies, the submit is sent again as JSON
+        and later submits are not compressed
+        """
+        refused = _create_mock_request({"error": "Unsupported Media Type"})
+        refused.status_code = 415
+        accepted = _create_mock_request(submit_task_by_id_tim_test_response)
+        accepted.status_code = 200
+        mock_request.side_effect = [refused, accepted, accepted]
+
+        submit_task(self.submit_data)
+        submit_task(self.submit_data)
+
+        calls = mock_request.call_args_list
+        self.assertEqual(len(calls), 3)
+        self.assertIn("data", calls[0].kwargs)
+        self.assertEqual(calls[1].kwargs["json"], self.submit_data.submit_json())
+        self.assertEqual(calls[2].kwargs["json"], self.submit_data.submit_json())
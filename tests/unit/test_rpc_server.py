@@ -0,0 +1,123 @@
+import io
+import json
+import unittest
+from unittest.mock import patch
+
+from unit.test_data import get_ide_courses_test_response
+from unit.test_routes import _create_mock_request
+from unit.test_response_cache import _age_cache
+from tidecli.api import response_cache
+from tidecli.api.response_cache import clear_response_cache
+from tidecli.api.routes import get_ide_courses
+from tidecli.main import tim_ide
+from tidecli.utils.handle_token import clear_credential_cache, clear_introspection
+from tidecli.models.course import Course
+from tidecli.models.user import User
+from tidecli.utils.rpc_server import (
+    METHOD_NOT_FOUND,
+    PARSE_ERROR,
+    params_to_args,
+    serve,
+)
+
+
+def _serve(*requests: str, options: list[str] | None = None) -> list[dict]:
+    stdin = io.StringIO("".join(r + "\n" for r in requests))
+    stdout = io.StringIO()
+    serve(tim_ide, stdin, stdout, options)
+    return [json.loads(line) for line in stdout.getvalue().splitlines()]
+
+
+class TestRpcServer(unittest.TestCase):
+    def setUp(self):
+        clear_credential_cache()
+        clear_introspection()
+        clear_response_cache()
+
+    @patch("requests.Session.request")
+    @patch("tidecli.api.routes.get_signed_in_user")
+    @patch("tidecli.utils.login_handler.is_logged_in")
+    def test_courses(self, mock_is_logged_in, mock_get_signed_in_user, mock_request):
+        """
+        Commands are run in the server process and their JSON output is parsed
+        """
+        mock_is_logged_in.return_value = True
+        mock_get_signed_in_user.return_value = User("test", "test")
+        mock_request.return_value = _create_mock_request(get_ide_courses_test_response)
+        courses = [
+            Course(**course).model_dump() for course in get_ide_courses_test_response
+        ]
+
+        responses = _serve(
+            json.dumps(
+                {"jsonrpc": "2.0", "id": 1, "method": "courses", "params": ["--json"]}
+            ),
+            json.dumps(
+                {
+                    "jsonrpc": "2.0",
+                    "id": 2,
+                    "method": "courses",
+                    "params": {"jsondata": True},
+                }
+            ),
+        )
+
+        self.assertEqual([r["id"] for r in responses], [1, 2])
+        for response in responses:
+            self.assertEqual(response["result"]["exit_code"], 0)
+            self.assertEqual(response["result"]["data"], courses)
+
+    @patch("requests.Session.request")
+    @patch("keyring.get_password", return_value="test_token")
+    def test_stale_listing_reported(self, kr_mock, mock_request):
+        """
+        Commands run through the main group, so options and stale markers apply
+        """
+        mock_request.return_value = _create_mock_request(get_ide_courses_test_response)
+        get_ide_courses()
+        _age_cache(2 * 3600)
+        mock_request.reset_mock()
+
+        responses = _serve(
+            json.dumps({"jsonrpc": "2.0", "id": 1, "method": "courses"}),
+            options=["--offline"],
+        )
+
+        result = responses[0]["result"]
+        self.assertEqual(result["exit_code"], 0)
+        self.assertIn(
+            "Stale: /ide/ideCourses was cached 2 h ago (offline mode).",
+            result["errors"],
+        )
+        mock_request.assert_not_called()
+        # The option applies only while the command runs
+        self.assertFalse(response_cache.is_offline())
+        self.assertEqual(response_cache.stale_responses(), [])
+
+    def test_errors(self):
+        """
+        Invalid requests get JSON-RPC errors and the server keeps running
+        """
+        responses = _serve(
+            "not json",
+            json.dumps({"jsonrpc": "2.0", "id": 1, "method": "rm -rf"}),
+            json.dumps({"jsonrpc": "2.0", "id": 2, "method": "shutdown"}),
+            json.dumps({"jsonrpc": "2.0", "id": 3, "method": "courses"}),
+        )
+
+        self.assertEqual(responses[0]["error"]["code"], PARSE_ERROR)
+        self.assertEqual(responses[1]["error"]["code"], METHOD_NOT_FOUND)
+        self.assertEqual(responses[2], {"jsonrpc": "2.0", "id": 2, "result": None})
+        self.assertEqual(len(responses), 3)
+
+    def test_params_to_args(self):
+        """
+        Named params are converted to options and positional arguments
+        """
+        create = tim_ide.commands["task"].commands["create"]
+
+        args = params_to_args(
+            create, {"demo_path": "kurssit/Demo1", "all_tasks": True, "force": False}
+        )
+
+        self.assertEqual(args, ["--all", "--", "kurssit/Demo1"])
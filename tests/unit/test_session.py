@@ -0,0 +1,86 @@
+import gzip
+import http.server
+import threading
+import unittest
+from unittest.mock import patch
+
+from tidecli.api import session as tide_session
+from tidecli.api.session import create_session
+
+
+class _KeepAliveHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        body = b"{}"
+        compress = self.path == "/gzip" and "gzip" in self.headers["Accept-Encoding"]
+        if compress:
+            body = gzip.compress(b'{"compressed": true}')
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        if compress:
+            self.send_header("Content-Encoding", "gzip")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def _stats_after(session, url: str, count: int) -> tuple[int, int]:
+    """Make requests and return the (requests, connections) they added."""
+    before = tide_session.connection_stats()
+    for _ in range(count):
+        with patch.object(tide_session, "get_session", return_value=session):
+            tide_session.request("GET", url).raise_for_status()
+    after = tide_session.connection_stats()
+    return (
+        after["requests"] - before["requests"],
+        after["connections"] - before["connections"],
+    )
+
+
+class TestSession(unittest.TestCase):
+    def setUp(self):
+        self.server = http.server.ThreadingHTTPServer(
+            ("127.0.0.1", 0), _KeepAliveHandler
+        )
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/"
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_connection_is_reused(self):
+        """
+        Consecutive requests should use the same pooled connection
+        """
+        session = create_session(pool_size=2, keep_alive=True)
+
+        self.assertEqual(_stats_after(session, self.url, 5), (5, 1))
+        session.close()
+
+    def test_keep_alive_disabled(self):
+        """
+        Without keep-alive every request opens a new connection
+        """
+        session = create_session(pool_size=2, keep_alive=False)
+
+        self.assertEqual(_stats_after(session, self.url, 3), (3, 3))
+        session.close()
+
+    def test_compressed_response(self):
+        """
+        Compressed responses are requested and decoded
+        """
+        session = create_session()
+
+        with patch.object(tide_session, "get_session", return_value=session):
+            res = tide_session.request("GET", self.url + "gzip")
+
+        self.assertEqual(res.headers["Content-Encoding"], "gzip")
+        self.assertEqual(res.json(), {"compressed": True})
+        session.close()
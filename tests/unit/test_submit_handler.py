@@ -0,0 +1,95 @@
+import io
+import threading
+import time
+import unittest
+from contextlib import redirect_stdout
+from unittest.mock import patch
+
+import click
+
+from unit.test_data import submit_task_by_id_tim_test_response
+from tidecli.main import submit_answer_files
+from tidecli.models.task_data import TaskFile
+from tidecli.models.tim_feedback import TimFeedback
+from tidecli.utils.submit_handler import submit_file, submit_files
+
+
+def _task_file(name: str) -> TaskFile:
+    return TaskFile(task_id_ext=f"1.{name}", content="", file_name=name, task_type="py")
+
+
+class TestSubmitFiles(unittest.TestCase):
+    @patch("tidecli.utils.submit_handler.submit_task")
+    def test_results_keep_file_order(self, mock_submit_task):
+        """
+        Results are in file order even when later files finish first
+        """
+        feedback = TimFeedback(**submit_task_by_id_tim_test_response["result"])
+        delays = {"a.py": 0.2, "b.py": 0.1, "c.py": 0.0}
+        running = 0
+        max_running = 0
+        lock = threading.Lock()
+
+        def fake_submit(submit_data):
+            nonlocal running, max_running
+            name = submit_data.code_files[0].file_name
+            with lock:
+                running += 1
+                max_running = max(max_running, running)
+            time.sleep(delays[name])
+            with lock:
+                running -= 1
+            if name == "b.py":
+                raise click.ClickException("Could not complete API call")
+            return feedback
+
+        mock_submit_task.side_effect = fake_submit
+        files = [_task_file(name) for name in delays]
+        completed = []
+
+        results = submit_files(
+            files,
+            workers=3,
+            on_complete=lambda i, f, r: completed.append(f.file_name),
+        )
+
+        self.assertEqual(completed, ["c.py", "b.py", "a.py"])
+        self.assertEqual(results[0], feedback)
+        self.assertIsInstance(results[1], click.ClickException)
+        self.assertEqual(results[2], feedback)
+        self.assertEqual(max_running, 3)
+
+    @patch("tidecli.utils.submit_handler.submit_task")
+    def test_unknown_task_type(self, mock_submit_task):
+        """
+        A file without a task type is not sent to TIM
+        """
+        task_file = _task_file("a.py")
+        task_file.task_type = None
+
+        with self.assertRaises(click.ClickException):
+            submit_file(task_file)
+        mock_submit_task.assert_not_called()
+
+    @patch("tidecli.main.SUBMIT_QUEUE_ENABLED", False)
+    @patch("tidecli.utils.submit_handler.submit_task")
+    def test_failed_files_not_reported_submitted(self, mock_submit_task):
+        """
+        Files that could not be submitted are reported as failed
+        """
+        feedback = TimFeedback(**submit_task_by_id_tim_test_response["result"])
+
+        def fake_submit(submit_data):
+            if submit_data.code_files[0].file_name == "b.py":
+                raise click.ClickException("Could not complete API call")
+            return feedback
+
+        mock_submit_task.side_effect = fake_submit
+        out = io.StringIO()
+
+        with redirect_stdout(out), self.assertRaises(click.ClickException):
+            submit_answer_files([_task_file("a.py"), _task_file("b.py")], 2, {})
+
+        self.assertIn("Submitted: a.py", out.getvalue())
+        self.assertIn("Failed: b.py", out.getvalue())
+        self.assertNotIn("Submitted: b.py", out.getvalue())
@@ -0,0 +1,215 @@
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+import click
+import requests
+
+from unit.test_data import submit_task_by_id_tim_test_response
+from tidecli.api.retry import RetryPolicy
+from tidecli.api.routes import TimConnectionError, TimRejectedError
+from tidecli.main import submit_answer_files
+from tidecli.models.task_data import TaskFile
+from tidecli.models.tim_feedback import TimFeedback
+from tidecli.models.user import User
+from tidecli.tide_config import SUBMIT_QUEUE_DIR
+from tidecli.utils.submit_handler import answer_hash, answer_key, load_submitted_hashes
+from tidecli.utils.submit_queue import (
+    AnswerMaybeSavedError,
+    enqueue,
+    flush_queue,
+    queued_submits,
+    start_background_flush,
+)
+
+NO_DELAY = RetryPolicy(retries=1, backoff=0)
+
+
+def _task_file(name: str, content: str = "") -> TaskFile:
+    return TaskFile(
+        task_id_ext=f"1.{name}", content=content, file_name=name, task_type="py"
+    )
+
+
+def _unreachable() -> TimConnectionError:
+    # The connection could not be opened, so the answer was never sent
+    error = TimConnectionError("unreachable")
+    error.__cause__ = requests.ConnectTimeout()
+    return error
+
+
+class TestSubmitQueue(unittest.TestCase):
+    def setUp(self):
+        shutil.rmtree(SUBMIT_QUEUE_DIR, ignore_errors=True)
+        self.metadata_dir = Path(tempfile.mkdtemp())
+        self.feedback = TimFeedback(**submit_task_by_id_tim_test_response["result"])
+
+    def tearDown(self):
+        shutil.rmtree(self.metadata_dir)
+        shutil.rmtree(SUBMIT_QUEUE_DIR, ignore_errors=True)
+
+    def test_latest_answer_kept(self):
+        """
+        Queueing a file again replaces the earlier answer
+        """
+        enqueue(_task_file("a.py", "first"), "test")
+        enqueue(_task_file("b.py"), "test")
+        enqueue(_task_file("a.py", "second"), "test")
+        enqueue(_task_file("a.py"), "other")
+
+        entries = queued_submits("test")
+
+        self.assertEqual([e.task_file.file_name for e in entries], ["b.py", "a.py"])
+        self.assertEqual(entries[1].task_file.content, "second")
+
+    @patch("tidecli.utils.submit_handler.submit_task")
+    def test_flush_in_order(self, mock_submit_task):
+        """
+        Queued answers are submitted oldest first and accepted ones recorded
+        """
+        mock_submit_task.return_value = self.feedback
+        for name in ["a.py", "b.py"]:
+            enqueue(_task_file(name), "test", self.metadata_dir)
+        submitted = []
+
+        remaining = flush_queue(
+            "test",
+            NO_DELAY,
+            on_result=lambda entry, result: submitted.append(entry.task_file.file_name),
+        )
+
+        self.assertEqual(remaining, [])
+        self.assertEqual(submitted, ["a.py", "b.py"])
+        self.assertEqual(queued_submits("test"), [])
+        hashes = load_submitted_hashes(self.metadata_dir)
+        task_file = _task_file("a.py")
+        self.assertEqual(hashes[answer_key(task_file)], answer_hash(task_file))
+
+    @patch("tidecli.utils.submit_handler.submit_task")
+    def test_flush_stops_when_unreachable(self, mock_submit_task):
+        """
+        Flushing stops after the retries and keeps the rest of the queue
+        """
+        mock_submit_task.side_effect = [self.feedback, _unreachable(), _unreachable()]
+        for name in ["a.py", "b.py", "c.py"]:
+            enqueue(_task_file(name), "test")
+
+        remaining = flush_queue("test", NO_DELAY)
+
+        self.assertEqual(mock_submit_task.call_count, 3)
+        self.assertEqual([e.task_file.file_name for e in remaining], ["b.py", "c.py"])
+        self.assertEqual(len(queued_submits("test")), 2)
+
+    @patch("tidecli.utils.submit_handler.submit_task")
+    def test_sent_answer_not_resent(self, mock_submit_task):
+        """
+        An answer TIM may have saved without answering is kept but not resent
+        """
+        mock_submit_task.side_effect = TimConnectionError("504 Server Error")
+        for name in ["a.py", "b.py"]:
+            enqueue(_task_file(name), "test")
+
+        with self.assertRaises(AnswerMaybeSavedError) as context:
+            flush_queue("test", NO_DELAY)
+
+        self.assertEqual(mock_submit_task.call_count, 1)
+        self.assertIn("a.py may already have been saved", str(context.exception))
+        self.assertEqual(len(queued_submits("test")), 2)
+
+    @patch("tidecli.utils.submit_handler.submit_task")
+    def test_rejected_answer_removed(self, mock_submit_task):
+        """
+        Answers that TIM rejects do not block the queue
+        """
+        mock_submit_task.side_effect = TimRejectedError("Task not found")
+        enqueue(_task_file("a.py"), "test")
+
+        self.assertEqual(flush_queue("test", NO_DELAY), [])
+        self.assertEqual(queued_submits("test"), [])
+
+    @patch("tidecli.utils.submit_handler.submit_task")
+    def test_other_errors_keep_answers(self, mock_submit_task):
+        """
+        Answers are kept when TIM did not answer them, e.g. the token was rejected
+        """
+        mock_submit_task.side_effect = [
+            self.feedback,
+            click.ClickException("invalid_token"),
+        ]
+        for name in ["a.py", "b.py", "c.py"]:
+            enqueue(_task_file(name), "test")
+
+        with self.assertRaises(click.ClickException):
+            flush_queue("test", NO_DELAY)
+
+        entries = queued_submits("test")
+        self.assertEqual([e.task_file.file_name for e in entries], ["b.py", "c.py"])
+
+    def test_background_flush_skipped_while_command_runs(self):
+        """
+        The lock of the commands is only checked, it is not held while flushing
+        """
+        lock = threading.Lock()
+        flushed = threading.Event()
+        held = []
+
+        def flush():
+            held.append(lock.locked())
+            flushed.set()
+
+        with patch("tidecli.utils.submit_queue._flush_signed_in_user", flush):
+            with lock:
+                stop = start_background_flush(0.01, lock)
+                time.sleep(0.05)
+                self.assertEqual(held, [])
+            try:
+                self.assertTrue(flushed.wait(1))
+            finally:
+                stop.set()
+
+        self.assertFalse(held[0])
+
+    @patch("tidecli.utils.handle_token.get_signed_in_user")
+    @patch("tidecli.utils.submit_handler.submit_task")
+    def test_failed_submit_queued(self, mock_submit_task, mock_user):
+        """
+        Files are queued when TIM cannot be reached while submitting
+        """
+        mock_user.return_value = User("test", "test")
+        mock_submit_task.side_effect = _unreachable()
+        files = [_task_file("a.py"), _task_file("b.py")]
+
+        with self.assertRaises(click.ClickException):
+            submit_answer_files(files, 1, {}, self.metadata_dir)
+
+        # The rest are queued without trying once TIM could not be reached
+        self.assertEqual(mock_submit_task.call_count, 1)
+        entries = queued_submits("test")
+        self.assertEqual([e.task_file.file_name for e in entries], ["a.py", "b.py"])
+        self.assertEqual(entries[0].metadata_dir, self.metadata_dir)
+
+        mock_submit_task.side_effect = None
+        mock_submit_task.return_value = self.feedback
+        submit_answer_files(files[:1], 1, {}, self.metadata_dir)
+
+        # The queued older answer does not replace the submitted one
+        entries = queued_submits("test")
+        self.assertEqual([e.task_file.file_name for e in entries], ["b.py"])
+
+    @patch("tidecli.utils.handle_token.get_signed_in_user")
+    @patch("tidecli.utils.submit_handler.submit_task")
+    def test_sent_submit_not_queued(self, mock_submit_task, mock_user):
+        """
+        Files that TIM may have saved without answering are not queued
+        """
+        mock_user.return_value = User("test", "test")
+        mock_submit_task.side_effect = TimConnectionError("504 Server Error")
+
+        with self.assertRaises(click.ClickException):
+            submit_answer_files([_task_file("a.py")], 1, {}, self.metadata_dir)
+
+        self.assertEqual(queued_submits("test"), [])
@@ -1,10 +1,16 @@
 """File utility tests."""
 
+import io
 import os
+import re
 import shutil
+import tempfile
 import unittest
+import click
 import unit.test_data as testdata
 from pathlib import Path
+from unittest.mock import patch
+from tidecli.models.task_data import TaskData
 from tidecli.utils import file_handler
 
 # from src.tidecli.models.TaskData import TaskData
@@ -414,3 +420,352 @@ class TestResetNoneditableSections(unittest.TestCase):
         )
 
         self.assertEqual(result, expected)
+
+    def test_multiple_gaps(self):
+        """Every gap of the answer is kept and everything else is reset."""
+        original = "\n".join(
+            [
+                "a = 1",
+                "# Write your code below this line",
+                "pass",
+                "# Write your code above this line",
+                "b = 2",
+                "# Write your code below this line",
+                "pass",
+                "# Write your code above this line",
+                "print(a + b)",
+            ]
+        )
+        answer = "\n".join(
+            [
+                "a = 100",
+                "# Write your code below this line",
+                "x = 1",
+                "y = 2",
+                "# Write your code above this line",
+                "# Write your code below this line",
+                "z = 3",
+                "# Write your code above this line",
+                "print(a)",
+            ]
+        )
+        expected = "\n".join(
+            [
+                "a = 1",
+                "# Write your code below this line",
+                "x = 1",
+                "y = 2",
+                "# Write your code above this line",
+                "b = 2",
+                "# Write your code below this line",
+                "z = 3",
+                "# Write your code above this line",
+                "print(a + b)",
+            ]
+        )
+
+        result = file_handler.answer_with_original_noneditable_sections(
+            answer, original
+        )
+
+        self.assertEqual(result, expected)
+
+    def test_gap_count_mismatch(self):
+        """The answer is kept as is when its gaps do not match the original."""
+        original = (
+            "# Write your code below this line\n# Write your code above this line"
+        )
+        answer = "no gaps here"
+
+        result = file_handler.answer_with_original_noneditable_sections(
+            answer, original
+        )
+
+        self.assertEqual(result, answer)
+
+
+class TestFindGaps(unittest.TestCase):
+    """Test scanning files for gaps."""
+
+    def test_multiple_gaps(self):
+        """All gaps are found in order."""
+        lines = [
+            "header",
+            "// Write your code below this line",
+            "code",
+            "// Write your code above this line",
+            "middle",
+            "// Write your code below this line",
+            "// Write your code above this line",
+        ]
+
+        self.assertEqual(file_handler.find_gaps_in_tasks(lines), [(1, 3), (5, 6)])
+
+    def test_unpaired_markers(self):
+        """An end marker without a begin marker and a repeated begin are handled."""
+        lines = [
+            "// Write your code above this line",
+            "// Write your code below this line",
+            "// Write your code below this line",
+            "code",
+            "// Write your code above this line",
+            "// Write your code below this line",
+        ]
+
+        self.assertEqual(file_handler.find_gaps_in_tasks(lines), [(2, 4)])
+        self.assertEqual(file_handler.find_gaps_in_tasks(["no gaps"]), [])
+
+    def test_split_lines(self):
+        """Lines are split like re.split(r"\\r?\\n") splits them."""
+        for content in ["", "a", "a\n", "a\r\nb", "a\rb\r", "x\r\r\ny\n\r"]:
+            self.assertEqual(
+                file_handler.split_lines(content), re.split(r"\r?\n", content)
+            )
+
+    def test_split_multiple_gaps(self):
+        """Gap contents of all gaps are separated from the rest of the file."""
+        content = "\r\n".join(
+            [
+                "a",
+                "// Write your code below this line",
+                "gap 1",
+                "// Write your code above this line",
+                "b",
+                "// Write your code below this line",
+                "gap 2",
+                "// Write your code above this line",
+                "c",
+            ]
+        )
+
+        bycode, gap_content = file_handler.split_file_contents(content)
+
+        self.assertEqual(gap_content, ["gap 1", "gap 2"])
+        self.assertEqual(
+            bycode,
+            [
+                "a",
+                "// Write your code below this line",
+                "// Write your code above this line",
+                "b",
+                "// Write your code below this line",
+                "// Write your code above this line",
+                "c",
+            ],
+        )
+
+
+def _fake_download(source: str, file_path: Path, on_progress=None) -> int:
+    if "broken" in source:
+        raise click.ClickException(
+            f"Could not get the content of the file from {source}"
+        )
+    file_path.write_bytes(source.encode("utf-8"))
+    return len(source)
+
+
+class TestConcurrentDownloads(unittest.TestCase):
+    """Test downloading supplementary files concurrently."""
+
+    def setUp(self):
+        self.tmp_dir = Path(tempfile.mkdtemp())
+        self.task = TaskData(
+            path="kurssit/Demo1",
+            type="py",
+            doc_id=1,
+            ide_task_id="t1",
+            task_files=[
+                {"task_id_ext": "1.t1", "content": "print(1)", "file_name": "main.py"}
+            ],
+            supplementary_files=[
+                {
+                    "file_name": f"data{i}.txt",
+                    "content": None,
+                    "source": f"files/data{i}",
+                }
+                for i in range(5)
+            ]
+            + [{"file_name": "broken.txt", "content": None, "source": "files/broken"}],
+        )
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    @patch("tidecli.utils.file_handler.download_from_source")
+    def test_download_files(self, mock_download):
+        """Every source is downloaded once and errors are returned per path."""
+        mock_download.side_effect = _fake_download
+        a1, a2, b, broken = (self.tmp_dir / name for name in ("a1", "a2", "b", "c"))
+        downloads = [
+            ("files/a", a1),
+            ("files/broken", broken),
+            ("files/a", a2),
+            ("files/b", b),
+        ]
+
+        results = file_handler.download_files(downloads, max_workers=3)
+
+        self.assertEqual(mock_download.call_count, 3)
+        self.assertEqual(results[a1], 7)
+        self.assertEqual(a2.read_bytes(), b"files/a")
+        self.assertEqual(b.read_bytes(), b"files/b")
+        self.assertIsInstance(results[broken], click.ClickException)
+        self.assertFalse(broken.exists())
+
+    @patch("tidecli.utils.file_handler.download_from_source")
+    def test_failed_download_does_not_stop_others(self, mock_download):
+        """Files after a failed download are still saved."""
+        mock_download.side_effect = _fake_download
+
+        results = file_handler.save_task_files(self.task, self.tmp_dir)
+
+        statuses = {r["file_name"]: r["status"] for r in results}
+        self.assertEqual(statuses.pop("broken.txt"), "error")
+        self.assertTrue(all(status == "written" for status in statuses.values()))
+        for i in range(5):
+            self.assertEqual(
+                (self.tmp_dir / "Demo1" / "t1" / f"data{i}.txt").read_bytes(),
+                f"files/data{i}".encode("utf-8"),
+            )
+        self.assertFalse((self.tmp_dir / "Demo1" / "t1" / "broken.txt").exists())
+
+
+class TestBatchedMetadata(unittest.TestCase):
+    """Test writing the metadata of a create operation at once."""
+
+    def setUp(self):
+        self.tmp_dir = Path(tempfile.mkdtemp())
+        self.task_sets = [
+            [
+                TaskData(
+                    path=f"kurssit/Demo{demo}",
+                    type="py",
+                    doc_id=demo,
+                    ide_task_id=f"t{task}",
+                    task_files=[
+                        {
+                            "task_id_ext": f"{demo}.t{task}",
+                            "content": "print(1)",
+                            "file_name": "main.py",
+                        }
+                    ],
+                )
+                for task in range(3)
+            ]
+            for demo in range(2)
+        ]
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    @patch("tidecli.utils.file_handler.write_atomic", wraps=file_handler.write_atomic)
+    def test_metadata_written_once(self, mock_write):
+        """All created tasks end up in .timdata with a single write."""
+        file_handler.create_course_tasks(
+            self.task_sets, overwrite=False, user_path=str(self.tmp_dir)
+        )
+
+        mock_write.assert_called_once()
+        metadata, _ = file_handler.get_metadata(self.tmp_dir)
+        for demo in range(2):
+            tasks = metadata.course_parts[f"kurssit/Demo{demo}"].tasks
+            self.assertEqual(sorted(tasks), ["t0", "t1", "t2"])
+
+
+class _Terminal(io.StringIO):
+    def isatty(self):
+        return True
+
+
+class TestDownloadProgress(unittest.TestCase):
+    """Test the combined progress line of downloads."""
+
+    def test_shown_for_large_downloads(self):
+        """Progress of all files is summed on one line."""
+        stream = _Terminal()
+        progress = file_handler.DownloadProgress(min_bytes=1024 * 1024, stream=stream)
+
+        progress.callback("a")(512 * 1024, 2 * 1024 * 1024)
+        progress.callback("b")(1024 * 1024, None)
+        progress.close()
+
+        self.assertTrue(stream.getvalue().endswith("2 files: 1.5/3.0 MiB\n"))
+
+    def test_hidden_for_small_downloads(self):
+        """Nothing is shown for downloads smaller than the threshold."""
+        stream = _Terminal()
+        progress = file_handler.DownloadProgress(min_bytes=1024 * 1024, stream=stream)
+
+        progress.callback("a")(100, 100)
+        progress.close()
+
+        self.assertEqual(stream.getvalue(), "")
+
+
+class TestParallelCourseCreate(unittest.TestCase):
+    """Test creating the tasks of a course in parallel."""
+
+    def setUp(self):
+        self.tmp_dir = Path(tempfile.mkdtemp())
+        self.task_sets = [
+            [
+                TaskData(
+                    path=f"kurssit/Demo{demo}",
+                    type="py",
+                    doc_id=demo,
+                    ide_task_id=f"t{task}",
+                    task_files=[
+                        {
+                            "task_id_ext": f"{demo}.t{task}",
+                            "content": f"print({task})",
+                            "file_name": "main.py",
+                        }
+                    ],
+                    supplementary_files=[
+                        {
+                            "file_name": "data.txt",
+                            "content": None,
+                            "source": f"files/data{demo}{task}",
+                        }
+                    ],
+                )
+                for task in range(4)
+            ]
+            for demo in range(3)
+        ]
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    @patch("tidecli.utils.file_handler.download_from_source")
+    def test_same_result_as_sequential(self, mock_download):
+        """Parallel creation writes the same files and metadata in task order."""
+        mock_download.side_effect = _fake_download
+        sequential_dir = self.tmp_dir / "sequential"
+        parallel_dir = self.tmp_dir / "parallel"
+
+        sequential = file_handler.create_course_tasks(
+            self.task_sets, overwrite=False, user_path=str(sequential_dir)
+        )
+        parallel = file_handler.create_course_tasks(
+            self.task_sets, overwrite=False, user_path=str(parallel_dir), workers=4
+        )
+
+        def relative(results, root):
+            return [
+                [(Path(f["path"]).relative_to(root), f["status"]) for f in task.files]
+                for task in results
+            ]
+
+        self.assertEqual(
+            relative(parallel, parallel_dir), relative(sequential, sequential_dir)
+        )
+        self.assertEqual(
+            (parallel_dir / file_handler.METADATA_NAME).read_text(),
+            (sequential_dir / file_handler.METADATA_NAME).read_text(),
+        )
+        self.assertEqual(
+            file_handler.created_files_summary(parallel),
+            file_handler.created_files_summary(sequential),
+        )
+        self.assertEqual(file_handler.created_files_summary(parallel)[0], 24)